@@ -1,8 +1,21 @@
 import pandas as pd
+import hashlib
+import heapq
+import json
+import re
+from collections import Counter
 from datetime import datetime
 import sys
 from pathlib import Path
 
+try:
+    import pyarrow  # Enables the Parquet package cache
+except ImportError:
+    pyarrow = None
+
+from keyword_matcher import get_filter
+from package_catalogue import PackageCatalogue
+
 # Add keyword lists as constants
 INCLUSION_KEYWORDS = [
     "phylo", "kmer", "populat", "metagen", "antimicrob", "antibio", "resistance",
@@ -22,12 +35,36 @@ EXCLUSION_KEYWORDS = [
     "singlemolecule", "singlecell", "radseq", "rad", "wgs", "wes", "wholeexome"
 ]
 
-def load_package_data(file_path):
+# Characters dropped by the cleaners: anything str.isalnum() rejects except
+# hyphens (and whitespace for free text); \w also admits '_', so drop it explicitly
+NON_NAME_CHARS = re.compile(r'[^\w-]|_')
+NON_TEXT_CHARS = re.compile(r'[^\w\s-]|_')
+
+# Package-type counts reported by analyze_bioconda_packages
+PACKAGE_TYPE_PREFIXES = {
+    'Bioconductor packages': 'bioconductor-',
+    'R packages': 'r-',
+    'Python packages': 'python-',
+    'Perl packages': 'perl-',
+}
+
+# Text columns of the package TSV, read as strings whatever a chunk holds
+PACKAGE_TEXT_DTYPES = {'Package_Name': str, 'Description': str}
+
+# Parsed frames already loaded in this process, keyed by source file state
+_FRAME_CACHE = {}
+
+def load_package_data(file_path, use_cache=True):
     """
     Load and validate package data from TSV file.
+
+    The parsed, filtered frame is kept in memory for the rest of the process
+    and in an on-disk columnar cache next to the TSV (see _read_frame_cache),
+    so repeat loads skip parsing entirely. Callers get their own copy.
     
     Args:
         file_path (str): Path to TSV file
+        use_cache (bool): Reuse/populate the in-process and on-disk caches
         
     Returns:
         pandas.DataFrame: Loaded and processed dataframe
@@ -35,31 +72,150 @@ def load_package_data(file_path):
     try:
         if not Path(file_path).exists():
             raise FileNotFoundError(f"Input file not found: {file_path}")
-            
-        # Read TSV with first row as header
-        df = pd.read_csv(file_path, sep='\t')
-        
-        # Validate required columns
-        required_cols = ['Package_Name', 'Description', 'Updated_Date']
-        if not all(col in df.columns for col in required_cols):
-            raise ValueError("Missing required columns in input file")
-        
-        # Rename columns to match expected names
-        df = df.rename(columns={'Package_Name': 'Package'})
-        
-        # Apply package filtering with keywords
-        df['Package'] = df['Package'].apply(filter_package_name)
-        df = df.dropna(subset=['Package'])  # Remove filtered out packages
-            
-        # Convert date and validate 
-        df['Updated_Date'] = pd.to_datetime(df['Updated_Date'], format='%Y-%m-%d')
-        
-        return df
+
+        path = Path(file_path).resolve()
+        stat = path.stat()
+        key = (str(path), stat.st_mtime_ns, stat.st_size, _filter_signature())
+        if use_cache and key in _FRAME_CACHE:
+            return _FRAME_CACHE[key].copy()
+
+        df = _read_frame_cache(path, stat) if use_cache else None
+        if df is None:
+            df = _parse_package_data(path)
+            if use_cache:
+                _write_frame_cache(path, stat, df)
+
+        if use_cache:
+            _FRAME_CACHE.clear()
+            _FRAME_CACHE[key] = df
+        return df.copy()
         
     except Exception as e:
         print(f"Error loading package data: {str(e)}")
         sys.exit(1)
 
+def load_catalogue_data(catalogue_path):
+    """
+    Load package data from the crawler's SQLite catalogue instead of a TSV.
+
+    The catalogue holds every scraped row, so changed keyword lists take
+    effect without a new crawl. Its full-text index selects the rows whose
+    name contains an inclusion keyword, and the same filtering and
+    conversion as load_package_data is applied to them.
+    """
+    if not Path(catalogue_path).exists():
+        raise FileNotFoundError(f"Catalogue not found: {catalogue_path}")
+    catalogue = PackageCatalogue(catalogue_path)
+    try:
+        rows = catalogue.match_rows(INCLUSION_KEYWORDS, columns=("name",))
+    finally:
+        catalogue.close()
+    return _prepare_package_frame(pd.DataFrame(rows, columns=['Package_Name', 'Description', 'Updated_Date']))
+
+def _load_data(file_path, catalogue_path=None):
+    if catalogue_path:
+        try:
+            return load_catalogue_data(catalogue_path)
+        except Exception as e:
+            print(f"Error loading package data: {str(e)}")
+            sys.exit(1)
+    return load_package_data(file_path)
+
+def _parse_package_data(file_path):
+    # Read TSV with first row as header
+    return _prepare_package_frame(pd.read_csv(file_path, sep='\t', dtype=PACKAGE_TEXT_DTYPES))
+
+def iter_package_chunks(file_path, chunksize):
+    """
+    Stream the package TSV as prepared frames of at most `chunksize` rows,
+    each filtered and converted exactly like load_package_data's result.
+    """
+    if not Path(file_path).exists():
+        raise FileNotFoundError(f"Input file not found: {file_path}")
+    # Fixed dtypes: a chunk whose names or descriptions are all empty would otherwise be read as float64
+    for chunk in pd.read_csv(file_path, sep='\t', chunksize=chunksize, dtype=PACKAGE_TEXT_DTYPES):
+        yield _prepare_package_frame(chunk)
+
+def _prepare_package_frame(df):
+    # Validate required columns
+    required_cols = ['Package_Name', 'Description', 'Updated_Date']
+    if not all(col in df.columns for col in required_cols):
+        raise ValueError("Missing required columns in input file")
+    
+    # Rename columns to match expected names
+    df = df.rename(columns={'Package_Name': 'Package'})
+    
+    # Apply package filtering with keywords
+    df['Package'] = filter_package_names(df['Package'])
+    df = df.dropna(subset=['Package'])  # Remove filtered out packages
+        
+    # Convert date and validate 
+    df['Updated_Date'] = pd.to_datetime(df['Updated_Date'], format='%Y-%m-%d')
+
+    # Few distinct prefixes, so categorical is far smaller and faster to count
+    df['Prefix'] = df['Package'].str.split('-').str[0].astype('category')
+    
+    return df
+
+def _filter_signature():
+    # Cached frames are only valid for the keyword lists they were filtered with
+    keywords = "\0".join(INCLUSION_KEYWORDS) + "\1" + "\0".join(EXCLUSION_KEYWORDS)
+    return hashlib.sha256(keywords.encode()).hexdigest()
+
+def _file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _cache_paths(file_path):
+    suffix = '.cache.parquet' if pyarrow is not None else '.cache.pkl'
+    return file_path.with_suffix(suffix), file_path.with_suffix('.cache.json')
+
+def _read_frame_cache(file_path, stat):
+    """
+    Return the cached frame for file_path, or None if there is no valid cache.
+    A cache is valid when it was built with the current keyword lists and the
+    source still has the same mtime and size, or failing that the same SHA-256.
+    """
+    data_path, meta_path = _cache_paths(file_path)
+    if not (data_path.exists() and meta_path.exists()):
+        return None
+    try:
+        meta = json.loads(meta_path.read_text())
+        if meta.get('filters') != _filter_signature():
+            return None
+        if (meta.get('mtime_ns'), meta.get('size')) != (stat.st_mtime_ns, stat.st_size):
+            if meta.get('sha256') != _file_sha256(file_path):
+                return None
+            # Touched but unchanged: refresh the fast-path key
+            meta.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            meta_path.write_text(json.dumps(meta))
+        if data_path.suffix == '.parquet':
+            return pd.read_parquet(data_path)
+        return pd.read_pickle(data_path)
+    except Exception as e:
+        print(f"Ignoring unreadable package cache {data_path}: {str(e)}")
+        return None
+
+def _write_frame_cache(file_path, stat, df):
+    data_path, meta_path = _cache_paths(file_path)
+    try:
+        if data_path.suffix == '.parquet':
+            df.to_parquet(data_path, index=False)
+        else:
+            df.to_pickle(data_path)
+        meta = {
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha256': _file_sha256(file_path),
+            'filters': _filter_signature(),
+        }
+        meta_path.write_text(json.dumps(meta))
+    except Exception as e:
+        print(f"Could not write package cache {data_path}: {str(e)}")
+
 def filter_package_name(name):
     """
     Filter and standardize package names using inclusion/exclusion keywords.
@@ -78,18 +234,33 @@ def filter_package_name(name):
     while '--' in clean_name:
         clean_name = clean_name.replace('--', '-')
         
-    # Check inclusion keywords (at least one must match)
-    has_inclusion = any(keyword in clean_name for keyword in INCLUSION_KEYWORDS)
-    if not has_inclusion:
-        return None
-        
-    # Check exclusion keywords (none should match)
-    has_exclusion = any(keyword in clean_name for keyword in EXCLUSION_KEYWORDS)
-    if has_exclusion:
+    # At least one inclusion keyword and no exclusion keyword must match
+    if not get_filter(INCLUSION_KEYWORDS, EXCLUSION_KEYWORDS).keep(clean_name):
         return None
         
     return clean_name
 
+def filter_package_names(names):
+    """
+    Vectorised filter_package_name over a Series of package names.
+    Returns the cleaned names, with NaN where a package is filtered out.
+    """
+    valid = names.str.strip().str.len() >= 2  # NaN for missing names, so also False
+    clean = (names.str.lower()
+             .str.replace(r'[._ ]', '-', regex=True)
+             .str.replace(NON_NAME_CHARS, '', regex=True)
+             .str.strip('-')
+             .str.replace(r'-{2,}', '-', regex=True))
+
+    keyword_filter = get_filter(INCLUSION_KEYWORDS, EXCLUSION_KEYWORDS)
+    keep = valid & _contains(clean, keyword_filter.include) & ~_contains(clean, keyword_filter.exclude)
+    return clean.where(keep)
+
+def _contains(series, matcher):
+    if matcher.pattern is None:
+        return pd.Series(False, index=series.index)
+    return series.str.contains(matcher.pattern, na=False)
+
 def clean_package_name(name):
     """
     Clean and standardize package names.
@@ -117,17 +288,108 @@ def clean_text(text):
     text = ' '.join(text.split())
     return text
 
-def analyze_bioconda_packages(file_path):
+def clean_texts(texts):
+    """Vectorised clean_text over a Series of text fields"""
+    # map(str), not astype(str): missing values must become "nan" as str() makes them in clean_text
+    return (texts.map(str).str.lower()
+            .str.replace(NON_TEXT_CHARS, '', regex=True)
+            .str.replace(r'\s+', ' ', regex=True)
+            .str.strip())
+
+class PackageStats:
+    """
+    Incremental version of the statistics printed by analyze_bioconda_packages.
+    Feed it prepared frames with update(); memory use depends only on the
+    number of distinct dates and prefixes, not on the number of rows.
+    """
+    def __init__(self, top_n=10):
+        self.top_n = top_n
+        self.total = 0
+        self.dates = set()
+        self.prefix_counts = Counter()
+        self.type_counts = Counter()
+        self.newest = None
+        self.oldest = None
+        self.desc_length_sum = 0
+        self.desc_length_count = 0
+        self._recent = []  # Min-heap of (date, sequence, package), size <= top_n
+        self._sequence = 0
+
+    def update(self, df):
+        if df.empty:
+            return
+        self.total += len(df)
+        dates = df['Updated_Date'].dropna()  # Rows without a date count nowhere, as with nunique()/max()
+        self.dates.update(dates.unique())
+        self.prefix_counts.update(df['Prefix'].astype(str).value_counts().to_dict())
+        for label, prefix in PACKAGE_TYPE_PREFIXES.items():
+            self.type_counts[label] += int(df['Package'].str.startswith(prefix).sum())
+
+        if not dates.empty:
+            newest, oldest = dates.max(), dates.min()
+            self.newest = newest if self.newest is None else max(self.newest, newest)
+            self.oldest = oldest if self.oldest is None else min(self.oldest, oldest)
+
+        lengths = df['Description'].str.len()
+        self.desc_length_sum += lengths.sum()
+        self.desc_length_count += lengths.count()
+
+        # Only a chunk's own top N can make the overall top N
+        for package, date in df.nlargest(self.top_n, 'Updated_Date')[['Package', 'Updated_Date']].itertuples(index=False):
+            item = (date, -self._sequence, package)
+            self._sequence += 1
+            if len(self._recent) < self.top_n:
+                heapq.heappush(self._recent, item)
+            else:
+                heapq.heappushpop(self._recent, item)
+
+    def statistics(self):
+        return {
+            'Total packages': self.total,
+            'Unique update dates': len(self.dates),
+            **{label: self.type_counts[label] for label in PACKAGE_TYPE_PREFIXES},
+            'Most recent update': self.newest.strftime('%Y-%m-%d') if self.newest is not None else 'n/a',
+            'Oldest update': self.oldest.strftime('%Y-%m-%d') if self.oldest is not None else 'n/a',
+            'Average desc length': (self.desc_length_sum / self.desc_length_count
+                                    if self.desc_length_count else float('nan')),
+        }
+
+    def most_recent(self):
+        recent = sorted(self._recent, reverse=True)
+        return pd.DataFrame([(package, date) for date, _, package in recent],
+                            columns=['Package', 'Updated_Date'])
+
+    def top_prefixes(self, n=10):
+        return pd.Series(dict(self.prefix_counts.most_common(n)), dtype='int64')
+
+def analyze_bioconda_packages(file_path, chunksize=None, catalogue_path=None):
     """
     Analyze Bioconda package data and print statistics.
     
     Args:
         file_path (str): Path to TSV file
+        chunksize (int): If set, stream the file in chunks of this many rows
+            and accumulate the statistics incrementally
+        catalogue_path (str): If set, read the packages from this crawler
+            catalogue instead of the TSV
     """
-    df = load_package_data(file_path)
+    if chunksize and not catalogue_path:
+        try:
+            package_stats = PackageStats()
+            for chunk in iter_package_chunks(file_path, chunksize):
+                chunk['Package'] = clean_texts(chunk['Package'])
+                package_stats.update(chunk)
+        except Exception as e:
+            print(f"Error loading package data: {str(e)}")
+            sys.exit(1)
+        _print_statistics(package_stats.statistics(), package_stats.most_recent(),
+                          package_stats.top_prefixes())
+        return
+
+    df = _load_data(file_path, catalogue_path)
     
     # Clean package names
-    df['Package'] = df['Package'].apply(clean_text)
+    df['Package'] = clean_texts(df['Package'])
     
     # Sort by update date, most recent first
     df_sorted = df.sort_values('Updated_Date', ascending=False)
@@ -136,15 +398,17 @@ def analyze_bioconda_packages(file_path):
     stats = {
         'Total packages': len(df),
         'Unique update dates': df['Updated_Date'].nunique(),
-        'Bioconductor packages': df['Package'].str.startswith('bioconductor-').sum(),
-        'R packages': df['Package'].str.startswith('r-').sum(),
-        'Python packages': df['Package'].str.startswith('python-').sum(),
-        'Perl packages': df['Package'].str.startswith('perl-').sum(),
+        **{label: df['Package'].str.startswith(prefix).sum()
+           for label, prefix in PACKAGE_TYPE_PREFIXES.items()},
         'Most recent update': df['Updated_Date'].max().strftime('%Y-%m-%d'),
         'Oldest update': df['Updated_Date'].min().strftime('%Y-%m-%d'),
         'Average desc length': df['Description'].str.len().mean()
     }
     
+    _print_statistics(stats, df_sorted[['Package', 'Updated_Date']].head(10),
+                      df['Prefix'].value_counts().head(10))
+
+def _print_statistics(stats, recent, prefixes):
     # Print formatted statistics
     print("\n=== Package Statistics ===")
     for key, value in stats.items():
@@ -154,15 +418,14 @@ def analyze_bioconda_packages(file_path):
             print(f"{key}: {value}")
             
     print("\n=== Most Recently Updated Packages ===")
-    print(df_sorted[['Package', 'Updated_Date']].head(10).to_string(index=False))
+    print(recent.to_string(index=False))
     
     print("\n=== Package Type Distribution ===")
     print("(Top 10 package prefixes)")
-    prefixes = df['Package'].str.split('-').str[0].value_counts().head(10)
     for prefix, count in prefixes.items():
         print(f"{prefix}: {count}")
 
-def clean_descriptions(input_file, output_file):
+def clean_descriptions(input_file, output_file, chunksize=None, catalogue_path=None):
     """
     Clean package names and descriptions by standardizing case,
     removing special characters, and normalizing text.
@@ -170,19 +433,27 @@ def clean_descriptions(input_file, output_file):
     Args:
         input_file (str): Input TSV file path
         output_file (str): Output TSV file path  
+        chunksize (int): If set, stream the file in chunks of this many rows,
+            deduplicating against a running set of seen package names
+        catalogue_path (str): If set, read the packages from this crawler
+            catalogue instead of input_file
     """
+    if chunksize and not catalogue_path:
+        _clean_descriptions_streaming(input_file, output_file, chunksize)
+        return
+
     try:
-        df = load_package_data(input_file)
+        df = _load_data(input_file, catalogue_path)
         
         # Clean descriptions only - package names already filtered
-        df['Description'] = df['Description'].apply(clean_text)
+        df['Description'] = clean_texts(df['Description'])
         
         # Remove duplicates after filtering
         original_count = len(df)
         df = df.drop_duplicates(subset=['Package'])
         
         # Save cleaned data
-        df.to_csv(output_file, sep='\t', index=False)
+        df.drop(columns=['Prefix']).to_csv(output_file, sep='\t', index=False)
         
         # Print summary
         print(f"\nCleaning summary:")
@@ -195,13 +466,50 @@ def clean_descriptions(input_file, output_file):
         print(f"Error cleaning data: {str(e)}")
         sys.exit(1)
 
+def _clean_descriptions_streaming(input_file, output_file, chunksize):
+    try:
+        seen = set()
+        first_chunk = True
+        original_count = 0
+        kept_count = 0
+        for chunk in iter_package_chunks(input_file, chunksize):
+            chunk['Description'] = clean_texts(chunk['Description'])
+            original_count += len(chunk)
+
+            # Keep the first occurrence across the whole file, as drop_duplicates does
+            chunk = chunk.drop_duplicates(subset=['Package'])
+            chunk = chunk[~chunk['Package'].isin(seen)]
+            seen.update(chunk['Package'])
+
+            chunk.drop(columns=['Prefix']).to_csv(output_file, sep='\t', index=False,
+                                                   header=first_chunk, mode='w' if first_chunk else 'a')
+            first_chunk = False
+            kept_count += len(chunk)
+
+        print(f"\nCleaning summary:")
+        print(f"Original packages: {original_count}")
+        print(f"After cleaning: {kept_count}")
+        print(f"Removed duplicates: {original_count - kept_count}")
+        print(f"Output saved to: {output_file}")
+
+    except Exception as e:
+        print(f"Error cleaning data: {str(e)}")
+        sys.exit(1)
+
 if __name__ == '__main__':
-    input_file = "bioconda_filtered_packages.tsv"
-    output_file = "bioconda_filtered_packages_clean.tsv"
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Analyze and clean the filtered Bioconda package table.")
+    parser.add_argument("--input_file", type=str, default="bioconda_filtered_packages.tsv", help="Package TSV to analyze.")
+    parser.add_argument("--output_file", type=str, default="bioconda_filtered_packages_clean.tsv", help="Path for the cleaned TSV.")
+    parser.add_argument("--chunksize", type=int, default=None, help="Stream the input in chunks of this many rows.")
+    parser.add_argument("--catalogue", type=str, default=None, help="Read packages from the crawler's SQLite catalogue instead of --input_file.")
+    args = parser.parse_args()
     
     try:
-        analyze_bioconda_packages(input_file)
-        clean_descriptions(input_file, output_file)
+        analyze_bioconda_packages(args.input_file, chunksize=args.chunksize, catalogue_path=args.catalogue)
+        clean_descriptions(args.input_file, args.output_file, chunksize=args.chunksize,
+                           catalogue_path=args.catalogue)
     except KeyboardInterrupt:
         print("\nProcess interrupted by user")
         sys.exit(1)
\ No newline at end of file
@@ -1,23 +1,52 @@
 import requests
-import yaml
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from atomic_file import atomic_write
+from channel_index import load_channel_index
+from env_scan import build_dependency_index, parse_env_file
+from http_session import setup_session
+from metadata_cache import ANACONDA_API, RECIPE_PAGE, default_cache
+from metrics import default_metrics
 
 # Directory containing the YAML files
 yaml_dir = "env/"
 
+# Seconds to wait for bioconda.github.io / api.anaconda.org
+REQUEST_TIMEOUT = 30
+
+# A "- spec" list item, optionally quoted, with an optional trailing comment
+DEPENDENCY_LINE = re.compile(r'^(\s*-\s+)(["\']?)([^\s#"\']+)\2(\s*(?:#.*)?)$')
+NESTED_LIST = re.compile(r'^-\s+[^\s#]+:\s*(?:#.*)?$')  # e.g. "- pip:"
+
+# Function to check whether a Bioconda recipe page exists for a dependency
+def is_bioconda_recipe(dependency, session, cache=None):
+    cache = cache or default_cache()
+    cached = cache.get_membership(dependency, RECIPE_PAGE)
+    if cached is not None:
+        return cached
+
+    package_url = f"https://bioconda.github.io/recipes/{dependency}/README.html#package-{dependency}"
+    response = session.get(package_url, timeout=REQUEST_TIMEOUT)
+    
+    # If the page exists (status code 200), consider it a Bioconda package
+    on_bioconda = response.status_code == 200
+    if response.status_code in (200, 404):  # Don't cache transient failures
+        cache.set_membership(dependency, RECIPE_PAGE, on_bioconda)
+    return on_bioconda
+
 # Function to check if the package exists on Bioconda and fetch its latest version
-def check_bioconda_package(dependency, version=None):
+def check_bioconda_package(dependency, version=None, session=None, cache=None):
+    session = session or setup_session()
     package_url = f"https://bioconda.github.io/recipes/{dependency}/README.html#package-{dependency}"
     print(f"Checking {package_url}")
     
-    response = requests.get(package_url)
-    
-    # If the page exists (status code 200), consider it a Bioconda package
-    if response.status_code == 200:
+    if is_bioconda_recipe(dependency, session, cache):
         print(f"{dependency} is a Bioconda package.")
         
         # Check version if provided
-        latest_version = fetch_bioconda_version(dependency)
+        latest_version = fetch_bioconda_version(dependency, session, cache)
         if version:
             print(f"Installed version: {version}, Latest Bioconda version: {latest_version}")
             if version == latest_version:
@@ -32,85 +61,155 @@ def check_bioconda_package(dependency, version=None):
         return None
 
 # Function to fetch the latest version of a Bioconda package using the Anaconda API
-def fetch_bioconda_version(package_name):
+def fetch_bioconda_version(package_name, session=None, cache=None):
+    cache = cache or default_cache()
+    cached = cache.get_version(package_name)
+    if cached and cached.fresh:
+        return cached.version
+    if cached is None and cache.get_membership(package_name, ANACONDA_API) is False:
+        return None  # The API answered 404 recently
+
+    session = session or setup_session()
     api_url = f"https://api.anaconda.org/package/bioconda/{package_name}"
-    response = requests.get(api_url)
+    # Revalidate a stale entry instead of downloading it again
+    headers = {"If-None-Match": cached.etag} if cached and cached.etag else {}
+    response = session.get(api_url, headers=headers, timeout=REQUEST_TIMEOUT)
     
+    if response.status_code == 304 and cached:
+        cache.touch_version(package_name)
+        return cached.version
     if response.status_code == 200:
         package_info = response.json()
         latest_version = package_info['latest_version']
+        cache.set_version(package_name, latest_version, response.headers.get("ETag"))
         return latest_version
     else:
+        if response.status_code == 404:
+            cache.set_membership(package_name, ANACONDA_API, False)
         print(f"Failed to fetch version info for {package_name}.")
         return None
 
-# Function to collect unique dependencies from the YAML files
-def collect_unique_dependencies(yaml_dir):
-    unique_dependencies = set()
-    
-    for yaml_file in os.listdir(yaml_dir):
-        if yaml_file.endswith(".yaml"):
-            print(f"Processing {yaml_file}...")
-            dependencies = parse_yaml_for_dependencies(os.path.join(yaml_dir, yaml_file))
-            unique_dependencies.update(dependencies)
+# Function to look up the latest Bioconda version of a dependency (None if not on Bioconda)
+def lookup_latest_version(dependency, session, cache=None, index=None):
+    if index is not None:
+        return index.latest_version(dependency)
+    try:
+        if not is_bioconda_recipe(dependency, session, cache):
+            return None
+        return fetch_bioconda_version(dependency, session, cache)
+    except requests.exceptions.RequestException as e:
+        print(f"Lookup failed for {dependency}: {e}")
+        return None
+
+# Function to resolve the latest versions of many dependencies concurrently over one session
+def resolve_latest_versions(package_names, session=None, workers=8, cache=None, index=None):
+    package_names = sorted(set(package_names))
+    if index is not None:
+        # Offline: one dictionary lookup per package instead of two requests
+        print(f"Resolving {len(package_names)} unique packages against the local channel index...")
+        return {name: index.latest_version(name) for name in package_names}
+
+    session = session or setup_session(pool_size=workers)
+    cache = cache or default_cache()
+    print(f"Looking up {len(package_names)} unique packages with {workers} workers...")
     
-    return unique_dependencies
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        latest_versions = pool.map(lambda name: lookup_latest_version(name, session, cache), package_names)
+        return dict(zip(package_names, latest_versions))
+
+# Function to collect unique (package, version) pairs from the YAML files
+def collect_unique_dependencies(yaml_dir, workers=None):
+    index = build_dependency_index(yaml_dir, workers=workers)
+    return {(name, version) for name, envs in index.items() for version in envs.values()}
 
 # Function to parse the dependencies from a YAML file, extracting both package names and versions
 def parse_yaml_for_dependencies(yaml_file):
-    with open(yaml_file) as f:
-        environment = yaml.safe_load(f)
-    
-    dependencies = environment.get('dependencies', [])
-    parsed_dependencies = []
-    
-    for dep in dependencies:
-        if isinstance(dep, str):
-            # Handle simple string dependencies like "package=1.0"
-            dep_parts = dep.split('=')
-            package_name = dep_parts[0]
-            package_version = dep_parts[1] if len(dep_parts) > 1 else None
-            parsed_dependencies.append((package_name, package_version))
-        elif isinstance(dep, dict):
-            # Handle dictionaries (sometimes conda has complex dependencies)
-            for key in dep.keys():
-                parsed_dependencies.append((key, None))
-    
-    return parsed_dependencies
+    return [(name, version) for name, version, source in parse_env_file(yaml_file) if source == "conda"]
 
-# Function to update the YAML files with newer versions
+# Function to re-pin conda dependencies in the text of an environment YAML
+def rewrite_pins(text, updated_packages):
+    """
+    Return text with each conda dependency in updated_packages re-pinned to
+    "name=version". Every other line, the key order, comments and nested
+    pip: entries are left exactly as they were.
+    """
+    lines = []
+    section = None
+    nested_indent = None
+    for line in text.splitlines(keepends=True):
+        body = line.rstrip('\r\n')
+        stripped = body.strip()
+        indent = len(body) - len(body.lstrip())
+        if not stripped or stripped.startswith('#'):
+            lines.append(line)
+            continue
+        if indent == 0 and not stripped.startswith('-'):
+            section = stripped.split(':')[0]  # Top-level key
+            nested_indent = None
+        elif section == 'dependencies':
+            if nested_indent is not None and indent > nested_indent:
+                lines.append(line)  # Inside a nested list such as pip:
+                continue
+            nested_indent = indent if NESTED_LIST.match(stripped) else None
+            match = DEPENDENCY_LINE.match(body)
+            if nested_indent is None and match:
+                prefix, quote, spec, rest = match.groups()
+                package_name = spec.split('=')[0]
+                if package_name in updated_packages:
+                    new_spec = f"{package_name}={updated_packages[package_name]}"
+                    line = f"{prefix}{quote}{new_spec}{quote}{rest}{line[len(body):]}"
+        lines.append(line)
+    return ''.join(lines)
+
+# Function to update the YAML files with newer versions; returns True if the file changed
 def update_yaml_with_new_versions(yaml_file, updated_packages):
     with open(yaml_file, 'r') as f:
-        environment = yaml.safe_load(f)
-    
-    for i, dep in enumerate(environment['dependencies']):
-        if isinstance(dep, str):
-            package_name = dep.split('=')[0]
-            if package_name in updated_packages:
-                new_version = updated_packages[package_name]
-                environment['dependencies'][i] = f"{package_name}={new_version}"
+        text = f.read()
+
+    new_text = rewrite_pins(text, updated_packages)
+    if new_text == text:
+        return False
 
-    with open(yaml_file, 'w') as f:
-        yaml.dump(environment, f)
+    with atomic_write(yaml_file) as f:
+        f.write(new_text)
+    return True
 
 # Main function to check if each dependency is in Bioconda, compare versions, and update YAML if necessary
-def main():
-    unique_dependencies = collect_unique_dependencies(yaml_dir)
-    updated_packages = {}
+def main(workers=8, channel_index=None):
+    # One scan of env/ gives package -> {env file: pinned version}, so each
+    # package is looked up once however many environments pin it
+    metrics = default_metrics()
+    with metrics.timer("stage_seconds", stage="scan"):
+        dependency_index = build_dependency_index(yaml_dir)
+    with metrics.timer("stage_seconds", stage="resolve"):
+        latest_versions = resolve_latest_versions(dependency_index, workers=workers,
+                                                  index=load_channel_index(channel_index))
     
-    # Prepare the output file
-    for yaml_file in os.listdir(yaml_dir):
-        if yaml_file.endswith(".yaml"):
-            updated_packages = {}
-            for dependency, version in parse_yaml_for_dependencies(os.path.join(yaml_dir, yaml_file)):
-                latest_version = check_bioconda_package(dependency, version)
-                if latest_version:
-                    updated_packages[dependency] = latest_version
-            if updated_packages:
-                print(f"Updating {yaml_file} with newer versions: {updated_packages}")
-                update_yaml_with_new_versions(os.path.join(yaml_dir, yaml_file), updated_packages)
+    updates = {}
+    for dependency, envs in dependency_index.items():
+        latest_version = latest_versions.get(dependency)
+        for yaml_file, version in envs.items():
+            if version and latest_version and version != latest_version:
+                updates.setdefault(yaml_file, {})[dependency] = latest_version
+
+    for yaml_file, updated_packages in sorted(updates.items()):
+        with metrics.timer("stage_seconds", stage="rewrite"):
+            changed = update_yaml_with_new_versions(os.path.join(yaml_dir, yaml_file), updated_packages)
+        if changed:
+            metrics.inc("env_files_updated_total")
+            print(f"Updated {yaml_file} with newer versions: {updated_packages}")
     
     print("Finished updating YAML files with newer Bioconda versions.")
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Bump env/*.yaml pins to the latest Bioconda versions.")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent version lookups.")
+    parser.add_argument("--channel_index", type=str, default=None, help="Offline index built by channel_index.py (default: bioconda_channel_index.json if present).")
+    parser.add_argument("--metrics_file", type=str, default=None, help="Write request/stage metrics here (.json, or .prom for Prometheus text).")
+    args = parser.parse_args()
+
+    main(workers=args.workers, channel_index=args.channel_index)
+    if args.metrics_file:
+        default_metrics().write_report(args.metrics_file)
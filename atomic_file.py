@@ -0,0 +1,23 @@
+import contextlib
+import os
+import threading
+
+@contextlib.contextmanager
+def atomic_write(path, mode="w", **open_kwargs):
+    """
+    Open a temporary file next to `path` and move it over `path` when the
+    with-block finishes, so a crash never leaves a truncated file behind and
+    readers see either the old or the new contents. If the block raises, the
+    temporary file is removed and `path` is left as it was.
+    """
+    path = os.fspath(path)
+    # Per process and thread, so concurrent writers of the same path never share a temp file
+    tmp_file = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_file, mode, **open_kwargs) as f:
+            yield f
+        os.replace(tmp_file, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_file)
+        raise
@@ -0,0 +1,66 @@
+"""
+Timing of the vectorised name filter and text cleaner in analyze_packages
+against the per-row apply() versions, on a synthetic package table built by
+perturbing bioconda_filtered_packages.tsv. Parity is covered by
+tests/test_analyze_packages.py.
+
+    python benchmarks/bench_analyze_vectorised.py --rows 1000000
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from analyze_packages import clean_text, clean_texts, filter_package_name, filter_package_names
+
+DEFAULT_TSV = Path(__file__).resolve().parent.parent / "bioconda_filtered_packages.tsv"
+NOISE = [".", "_", " ", "--", "-", "!", "(", ")", ",", "\t", "é", "2", "  "]
+
+def synthetic_table(tsv_file, rows, seed=0):
+    """Build a `rows`-long Package/Description frame with punctuation and case noise."""
+    rng = random.Random(seed)
+    base = pd.read_csv(tsv_file, sep="\t")
+    # str() per value: pandas 3 keeps NaN through astype(str)
+    names = [str(name) for name in base["Package_Name"]]
+    descriptions = [str(description) for description in base["Description"]]
+
+    def perturb(text):
+        chars = list(text)
+        for _ in range(rng.randint(0, 3)):
+            chars.insert(rng.randint(0, len(chars)), rng.choice(NOISE))
+        text = "".join(chars)
+        return text.upper() if rng.random() < 0.1 else text
+
+    picks = [rng.randrange(len(names)) for _ in range(rows)]
+    return pd.DataFrame({
+        "Package": [perturb(names[i]) for i in picks],
+        "Description": [perturb(descriptions[i]) for i in picks],
+    })
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark vectorised package filtering and cleaning.")
+    parser.add_argument("--tsv", type=str, default=str(DEFAULT_TSV), help="Seed package TSV.")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Rows in the synthetic table.")
+    args = parser.parse_args()
+
+    df = synthetic_table(args.tsv, args.rows)
+    print(f"Rows: {len(df):,}")
+
+    for label, scalar, vectorised, column in [
+        ("filter_package_name", filter_package_name, filter_package_names, "Package"),
+        ("clean_text", clean_text, clean_texts, "Description"),
+    ]:
+        apply_time, _ = timed(lambda s: s.apply(scalar), df[column])
+        vector_time, _ = timed(vectorised, df[column])
+        print(f"{label}: apply {apply_time:.2f}s, vectorised {vector_time:.2f}s, "
+              f"speedup {apply_time / vector_time:.1f}x")
@@ -0,0 +1,57 @@
+"""
+Wall-clock comparison of the serial and concurrent repo crawlers.
+
+Both crawlers run against a local stub server (see stub_repo.py) that adds a
+fixed per-request latency; the resulting TSVs must be byte-identical.
+
+    python benchmarks/bench_crawler.py --latency 0.2 --workers 8
+"""
+import argparse
+import contextlib
+import filecmp
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import bioconda_search
+from stub_repo import load_pages, serve_pages
+
+def run_crawl(base_url, output_file, workers, window, rate):
+    # The serial crawler runs without its fixed politeness sleep (the thing the
+    # limiter replaces) so the comparison is pure fetch throughput.
+    start = time.perf_counter()
+    # The crawlers log every row; keep the benchmark output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        bioconda_search.search_and_write_package_details(
+            bioconda_search.keywords, bioconda_search.exclusion_keywords, output_file,
+            workers=workers, window=window, rate=rate, delay=0, base_url=base_url)
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark serial vs concurrent crawling against a stub server.")
+    parser.add_argument("--pages_dir", type=str, default=None, help="Directory of recorded page_N.html files.")
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulated per-request latency in seconds.")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent fetchers for the concurrent run.")
+    parser.add_argument("--window", type=int, default=16, help="Pages in flight for the concurrent run.")
+    parser.add_argument("--rate", type=float, default=50.0, help="Limiter rate (req/s) for the concurrent run.")
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages_dir)
+    with tempfile.TemporaryDirectory() as tmp, serve_pages(pages, args.latency) as base_url:
+        serial_out = Path(tmp) / "serial.tsv"
+        concurrent_out = Path(tmp) / "concurrent.tsv"
+        serial = run_crawl(base_url, serial_out, 1, 1, args.rate)
+        concurrent = run_crawl(base_url, concurrent_out, args.workers, args.window, args.rate)
+        identical = filecmp.cmp(serial_out, concurrent_out, shallow=False)
+
+    print(f"Pages: {len(pages)}, latency: {args.latency:.3f}s")
+    print(f"Serial:     {serial:.2f}s")
+    print(f"Concurrent: {concurrent:.2f}s ({args.workers} workers, window {args.window})")
+    print(f"Speedup:    {serial / concurrent:.1f}x")
+    print(f"Identical output: {identical}")
+    if not identical:
+        sys.exit(1)
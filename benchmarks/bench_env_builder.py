@@ -0,0 +1,34 @@
+"""
+Wall time of env_builder.py with a worker pool against the serial sum,
+using the stub conda in benchmarks/stub_conda (each build sleeps instead of
+solving). One environment fails once to exercise the retry path.
+
+    python benchmarks/bench_env_builder.py --seconds 1 --workers 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from env_builder import build_envs, package_jobs, print_summary, summarise
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the parallel conda environment builder.")
+    parser.add_argument("--seconds", type=float, default=1.0, help="Simulated build time per environment.")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["PATH"] = f"{ROOT / 'benchmarks' / 'stub_conda'}{os.pathsep}{os.environ['PATH']}"
+        os.environ.update(STUB_CONDA_SECONDS=str(args.seconds), STUB_CONDA_FAIL_ONCE="kma_env",
+                          STUB_CONDA_STATE=tmp)
+        results, wall_seconds = build_envs(package_jobs(), workers=args.workers, log_dir=Path(tmp) / "logs",
+                                           retries=1, retry_delay=0, pkgs_root=Path(tmp) / "pkgs")
+        summary = summarise(results, wall_seconds)
+    print_summary(summary)
+    if summary["failed"] or next(r for r in results if r.name == "kma_env").attempts != 2:
+        sys.exit(1)
@@ -0,0 +1,70 @@
+"""
+Micro-benchmark of the compiled keyword matcher against the per-keyword
+`in` loops it replaced, over the rows of bioconda_filtered_packages.tsv.
+Parity is covered by tests/test_keyword_matcher.py.
+
+    python benchmarks/bench_keyword_matcher.py --repeat 20
+"""
+import argparse
+import csv
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from keyword_matcher import get_filter
+from analyze_packages import EXCLUSION_KEYWORDS, INCLUSION_KEYWORDS
+from bioconda_search import exclusion_keywords, keywords
+
+DEFAULT_TSV = Path(__file__).resolve().parent.parent / "bioconda_filtered_packages.tsv"
+
+def naive_keep(text, keywords, exclusion_keywords):
+    # The original bioconda_search.filter_text keyword check
+    text = text.lower()
+    has_inclusion = any(keyword.lower() in text for keyword in keywords)
+    has_exclusion = any(ex_keyword.lower() in text for ex_keyword in exclusion_keywords)
+    return has_inclusion and not has_exclusion
+
+def compiled_keep(text, keywords, exclusion_keywords):
+    return get_filter(keywords, exclusion_keywords).keep(text)
+
+def time_filter(func, texts, keywords, exclusion_keywords, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        decisions = [func(text, keywords, exclusion_keywords) for text in texts]
+    return time.perf_counter() - start, decisions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the compiled keyword matcher.")
+    parser.add_argument("--tsv", type=str, default=str(DEFAULT_TSV), help="Package TSV to match against.")
+    parser.add_argument("--repeat", type=int, default=10, help="Passes over the rows per timing.")
+    args = parser.parse_args()
+
+    with open(args.tsv, newline="") as f:
+        reader = csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE)
+        next(reader)
+        rows = [r for r in reader if len(r) >= 3]
+    texts = [r[0] for r in rows] + [r[1] for r in rows]
+
+    suites = [
+        ("bioconda_search", keywords, exclusion_keywords),
+        ("analyze_packages", INCLUSION_KEYWORDS, EXCLUSION_KEYWORDS),
+    ]
+    for name, include, exclude in suites:
+        naive, _ = time_filter(naive_keep, texts, include, exclude, args.repeat)
+        compiled, _ = time_filter(compiled_keep, texts, include, exclude, args.repeat)
+        calls = len(texts) * args.repeat
+        print(f"{name}: {len(include)}+{len(exclude)} keywords, {len(texts)} texts x {args.repeat}")
+        print(f"  naive:    {naive:.3f}s ({calls / naive:,.0f} texts/s)")
+        print(f"  compiled: {compiled:.3f}s ({calls / compiled:,.0f} texts/s)")
+        print(f"  speedup:  {naive / compiled:.1f}x")
+
+        hits = Counter()
+        matcher = get_filter(include, exclude)
+        for text in texts:
+            included, excluded = matcher.explain(text)
+            hits.update(included)
+        top = ", ".join(f"{k}={v}" for k, v in hits.most_common(5))
+        print(f"  top inclusion keywords: {top}")
@@ -0,0 +1,41 @@
+"""
+Speed and Spearman drift against float32 of the PRIME CPU modes (bf16
+autocast, int8 dynamic quantisation), on a tiny random-weight model.
+
+    python benchmarks/bench_prime_cpu_modes.py --records 32 --threads 4
+"""
+import argparse
+import random
+import sys
+from pathlib import Path
+
+import torch
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from prime_cpu_modes import compare_modes, print_results
+from prime_mutant_scoring import CPU_MODES, Record, configure_threads
+from tiny_prime import build_tiny_model, random_sequence
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark PRIME CPU modes.")
+    parser.add_argument("--records", type=int, default=32, help="Synthetic held-out records.")
+    parser.add_argument("--min_length", type=int, default=100)
+    parser.add_argument("--max_length", type=int, default=500)
+    parser.add_argument("--hidden_size", type=int, default=256)
+    parser.add_argument("--layers", type=int, default=4)
+    parser.add_argument("--modes", nargs="+", choices=CPU_MODES, default=list(CPU_MODES))
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--compile", action="store_true")
+    args = parser.parse_args()
+
+    configure_threads(args.threads)
+    model, tokenizer = build_tiny_model(hidden_size=args.hidden_size, layers=args.layers)
+    rng = random.Random(0)
+    records = [Record("heldout", i, f"seq{i}", random_sequence(rng.randint(args.min_length, args.max_length), seed=i))
+               for i in range(args.records)]
+
+    results = compare_modes(records, model, tokenizer, torch.device("cpu"), modes=args.modes,
+                            compile_model=args.compile)
+    print_results(results, len(records))
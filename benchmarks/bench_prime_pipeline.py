@@ -0,0 +1,78 @@
+"""
+Wall time of the pipelined PRIME scoring loop (prefetch and writer threads)
+against the serial loop, on a tiny random-weight model (CPU) over a folder
+of FASTA files. Also checks that both write identical score matrices.
+
+    python benchmarks/bench_prime_pipeline.py --files 16 --records 16 --output_format csv
+"""
+import argparse
+import contextlib
+import io
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from prime_mutant_scoring import iter_records, score_records, score_records_pipelined
+from saturation_io import OUTPUT_FORMATS, load_matrix
+from tiny_prime import build_tiny_model, random_sequence, write_fasta
+
+def run(score, sequence_folder, output_folder, model, tokenizer, **options):
+    output_folder.mkdir()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # Silence the per-record progress lines
+        completed, failed = score(iter_records(sequence_folder), model, tokenizer, "cpu", output_folder, **options)
+    return time.perf_counter() - start, len(completed), len(failed)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark pipelined PRIME scoring.")
+    parser.add_argument("--files", type=int, default=16, help="Synthetic FASTA files.")
+    parser.add_argument("--records", type=int, default=16, help="Records per file.")
+    parser.add_argument("--min_length", type=int, default=50)
+    parser.add_argument("--max_length", type=int, default=400)
+    parser.add_argument("--batch_size", type=int, default=8)
+    parser.add_argument("--prefetch", type=int, default=2)
+    parser.add_argument("--output_format", choices=OUTPUT_FORMATS, default="csv")
+    args = parser.parse_args()
+
+    torch.set_grad_enabled(False)
+    model, tokenizer = build_tiny_model()
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        sequence_folder = tmp / "fasta"
+        sequence_folder.mkdir()
+        for i in range(args.files):
+            write_fasta(sequence_folder / f"protein{i}.fasta",
+                        {f"seq{j}": random_sequence(rng.randint(args.min_length, args.max_length), seed=i * 1000 + j)
+                         for j in range(args.records)})
+
+        options = dict(batch_size=args.batch_size, output_format=args.output_format)
+        serial_time, completed, failed = run(score_records, sequence_folder, tmp / "serial", model, tokenizer, **options)
+        pipeline_time, pipeline_completed, pipeline_failed = run(score_records_pipelined, sequence_folder,
+                                                                 tmp / "pipeline", model, tokenizer,
+                                                                 prefetch=args.prefetch, **options)
+
+        outputs = sorted(p.name for p in (tmp / "serial").iterdir())
+        max_diff = 0.0
+        for name in outputs:
+            serial_matrix, _ = load_matrix(tmp / "serial" / name)
+            pipeline_matrix, _ = load_matrix(tmp / "pipeline" / name)
+            max_diff = max(max_diff, float(np.abs(serial_matrix - pipeline_matrix).max()))
+
+    records = args.files * args.records
+    print(f"Records: {records} in {args.files} files, lengths {args.min_length}-{args.max_length}, "
+          f"batch_size={args.batch_size}, output {args.output_format}")
+    print(f"serial:    {serial_time:.2f}s ({records / serial_time:.1f} seq/s), {failed} failed")
+    print(f"pipelined: {pipeline_time:.2f}s ({records / pipeline_time:.1f} seq/s), {pipeline_failed} failed, "
+          f"prefetch={args.prefetch}")
+    print(f"Speedup: {serial_time / pipeline_time:.2f}x, max |diff| pipelined vs serial: {max_diff:.2e}")
+    if pipeline_completed != completed or pipeline_failed or max_diff > 1e-6:
+        sys.exit(1)
@@ -0,0 +1,80 @@
+"""
+CPU timing of the vectorised PRIME scoring engine against the per-mutant
+loop it replaced, on a tiny random-weight model. Parity is covered by
+tests/test_prime_scoring.py.
+
+    python benchmarks/bench_prime_scoring.py --lengths 100 300 1000
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from prime_mutant_scoring import (compute_log_probs, generate_mutants, saturation_matrix,
+                                  saturation_table, score_mutants)
+from tiny_prime import build_tiny_model, random_sequence
+
+def reference_saturation(log_probs, sequence, tokenizer):
+    # The original score_auto loop: one vocab rebuild and one .item() per mutant
+    scores = []
+    for mutant in generate_mutants(sequence):
+        wt, idx, mt = mutant[0], int(mutant[1:-1]) - 1, mutant[-1]
+        scores.append((log_probs[idx, tokenizer.get_vocab()[mt]] - log_probs[idx, tokenizer.get_vocab()[wt]]).item())
+    return np.array(scores)
+
+def reference_multi(log_probs, mutants, tokenizer):
+    # The ProteinGym notebook's score() loop
+    scores = []
+    for mutant in mutants:
+        score = 0
+        for sub_mutant in mutant.split(":"):
+            wt, idx, mt = sub_mutant[0], int(sub_mutant[1:-1]) - 1, sub_mutant[-1]
+            score += (log_probs[idx, tokenizer.get_vocab()[mt]] - log_probs[idx, tokenizer.get_vocab()[wt]]).item()
+        scores.append(score)
+    return np.array(scores)
+
+def random_multi_mutants(sequence, count, seed=0):
+    rng = random.Random(seed)
+    mutants = []
+    for _ in range(count):
+        positions = rng.sample(range(len(sequence)), rng.randint(1, 4))
+        mutants.append(":".join(f"{sequence[p]}{p + 1}{rng.choice('ACDEFGHIKLMNPQRSTVWY')}"
+                                for p in sorted(positions)))
+    return mutants
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark vectorised PRIME mutant scoring.")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[100, 300, 1000], help="Protein lengths to score.")
+    parser.add_argument("--multi_mutants", type=int, default=5000, help="Random multi-mutants per protein.")
+    args = parser.parse_args()
+
+    torch.set_grad_enabled(False)
+    model, tokenizer = build_tiny_model()
+    device = torch.device("cpu")
+    for length in args.lengths:
+        sequence = random_sequence(length, seed=length)
+        log_probs = compute_log_probs(sequence, model, tokenizer, device)
+
+        loop_time, _ = timed(reference_saturation, log_probs, sequence, tokenizer)
+        vector_time, _ = timed(lambda: saturation_table(saturation_matrix(log_probs, sequence, tokenizer), sequence))
+
+        mutants = random_multi_mutants(sequence, args.multi_mutants, seed=length)
+        multi_loop, _ = timed(reference_multi, log_probs, mutants, tokenizer)
+        multi_vector, _ = timed(score_mutants, log_probs, mutants, tokenizer)
+
+        print(f"L={length}: saturation loop {loop_time:.3f}s, vectorised {vector_time:.4f}s "
+              f"({loop_time / vector_time:.0f}x)")
+        print(f"        {len(mutants)} multi-mutants loop {multi_loop:.3f}s, vectorised {multi_vector:.4f}s "
+              f"({multi_loop / multi_vector:.0f}x)")
@@ -0,0 +1,70 @@
+"""
+Throughput of prime_sharded_scoring against the number of worker processes,
+on a tiny random-weight model saved to disk (CPU). Each worker count scores
+the same synthetic FASTA folder into a fresh output folder; the total
+number of torch threads is kept fixed, so the sweep shows what splitting
+cores between processes buys over intra-op threading.
+
+    python benchmarks/bench_prime_sharded.py --workers 1 2 4 --files 32
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import prime_sharded_scoring
+from tiny_prime import random_sequence, save_tiny_model, write_fasta
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark sharded PRIME scoring across worker counts.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Worker counts to try.")
+    parser.add_argument("--threads", type=int, default=os.cpu_count(), help="Torch threads shared by all workers.")
+    parser.add_argument("--files", type=int, default=32, help="Synthetic FASTA files.")
+    parser.add_argument("--records", type=int, default=4, help="Records per file.")
+    parser.add_argument("--min_length", type=int, default=100)
+    parser.add_argument("--max_length", type=int, default=600)
+    parser.add_argument("--batch_size", type=int, default=4)
+    parser.add_argument("--start_method", choices=["spawn", "forkserver", "fork"], default=None)
+    parser.add_argument("--report", type=str, default=None, help="Write the sweep to this JSON file.")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            model_path = save_tiny_model(tmp / "model")
+        sequence_folder = tmp / "fasta"
+        sequence_folder.mkdir()
+        for i in range(args.files):
+            write_fasta(sequence_folder / f"protein{i}.fasta",
+                        {f"seq{j}": random_sequence(rng.randint(args.min_length, args.max_length), seed=i * 100 + j)
+                         for j in range(args.records)})
+
+        for workers in args.workers:
+            # Parent-side progress only; workers still print to the inherited stdout
+            with contextlib.redirect_stdout(io.StringIO()):
+                manifest = prime_sharded_scoring.main(
+                    sequence_folder, tmp / f"out_{workers}", str(model_path), workers=workers,
+                    threads_per_worker=max(1, args.threads // workers), batch_size=args.batch_size,
+                    start_method=args.start_method)
+            run = manifest["runs"][-1]
+            runs.append(run)
+            print(f"workers={workers} x {run['threads_per_worker']} threads: {run['seconds']:.2f}s, "
+                  f"{run['files_per_second']:.2f} files/s, {run['records_per_second']:.1f} records/s, "
+                  f"{run['failed']} failed")
+
+    base = runs[0]["records_per_second"]
+    for run in runs[1:]:
+        print(f"{run['workers']} workers vs {runs[0]['workers']}: {run['records_per_second'] / max(base, 1e-9):.2f}x")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump({"files": args.files, "records": args.files * args.records, "runs": runs}, f, indent=2)
@@ -0,0 +1,51 @@
+"""
+Offline run of the ProteinGym harness (scripts/proteingym_benchmark.py) on
+synthetic assays and a tiny random-weight model, producing the same JSON
+report as a real run: per-assay Spearman, per-stage timings and peak RSS.
+Spearman is meaningless on random weights; the run tracks throughput and
+checks that the harness end to end still works.
+
+    python benchmarks/bench_proteingym.py --assays 8 --report bench_proteingym.json
+"""
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import torch
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from proteingym_benchmark import compare_reports, iter_assays, print_summary, run_benchmark
+from tiny_prime import build_tiny_model, write_proteingym_fixture
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the ProteinGym harness on a tiny model.")
+    parser.add_argument("--assays", type=int, default=4)
+    parser.add_argument("--length", type=int, default=300)
+    parser.add_argument("--mutants", type=int, default=20000, help="Mutants per assay.")
+    parser.add_argument("--report", type=str, default=None, help="Write the JSON report here.")
+    parser.add_argument("--baseline", type=str, default=None, help="Earlier report to check for regressions.")
+    args = parser.parse_args()
+
+    model, tokenizer = build_tiny_model()
+    with tempfile.TemporaryDirectory() as tmp:
+        sequence_folder, mutant_folder = write_proteingym_fixture(tmp, args.assays, args.length, args.mutants)
+        with torch.inference_mode():
+            report = run_benchmark(iter_assays(sequence_folder, mutant_folder), model, tokenizer,
+                                   torch.device("cpu"), output_folder=Path(tmp) / "scores")
+    report.update(model_path="tiny_prime", mode="fp32", device="cpu", threads=torch.get_num_threads())
+    print_summary(report["summary"])
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_reports(report, json.load(f))
+        for message in regressions:
+            print(f"Regression: {message}")
+        if regressions:
+            sys.exit(1)
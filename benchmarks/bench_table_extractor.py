@@ -0,0 +1,39 @@
+"""
+Timing of the streaming package-table extractor against the BeautifulSoup
+path, on recorded listing pages or pages synthesised from
+bioconda_filtered_packages.tsv. Parity is covered by tests/test_package_table.py.
+
+    python benchmarks/bench_table_extractor.py --pages_dir recorded_pages/
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bioconda_search import parse_package_rows_soup
+from package_table import extract_package_rows
+from stub_repo import EMPTY_PAGE, load_pages
+
+def time_parser(func, pages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = [func(page) for page in pages]
+    return time.perf_counter() - start, results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark listing-page row extraction.")
+    parser.add_argument("--pages_dir", type=str, default=None, help="Directory of recorded page_N.html files.")
+    parser.add_argument("--repeat", type=int, default=5, help="Passes over the pages per timing.")
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages_dir) + [EMPTY_PAGE]
+    soup_time, expected = time_parser(lambda page: parse_package_rows_soup(page.decode("utf-8")), pages, args.repeat)
+    stream_time, _ = time_parser(extract_package_rows, pages, args.repeat)
+
+    rows = sum(len(r) for r in expected if r)
+    print(f"Pages: {len(pages)}, rows: {rows}, repeat: {args.repeat}")
+    print(f"BeautifulSoup: {soup_time:.3f}s ({rows * args.repeat / soup_time:,.0f} rows/s)")
+    print(f"Streaming:     {stream_time:.3f}s ({rows * args.repeat / stream_time:,.0f} rows/s)")
+    print(f"Speedup:       {soup_time / stream_time:.1f}x")
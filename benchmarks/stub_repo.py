@@ -0,0 +1,83 @@
+"""
+Local stand-in for https://anaconda.org/bioconda/repo used by the benchmarks.
+
+Pages come either from a directory of recorded listing pages (page_1.html,
+page_2.html, ...) or are synthesised from bioconda_filtered_packages.tsv in
+the same four-column table layout the scraper expects.
+"""
+import csv
+import html
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_TSV = REPO_ROOT / "bioconda_filtered_packages.tsv"
+EMPTY_PAGE = b"<html><body><p>No packages found.</p></body></html>"
+
+def render_listing_page(rows):
+    """Render (name, description, updated_date) rows as an anaconda.org-style listing page."""
+    body = ["<html><head><title>bioconda repo</title></head><body>",
+            "<table class='full-width'><thead><tr><th>Package</th><th>Access</th>"
+            "<th>Summary</th><th>Updated</th></tr></thead><tbody>"]
+    for name, description, updated in rows:
+        body.append(
+            f"<tr><td><a href='/bioconda/{html.escape(name)}'><span>{html.escape(name)}</span></a></td>"
+            f"<td><span class='label'>public</span></td>"
+            f"<td>{html.escape(description)}</td>"
+            f"<td><span>{html.escape(updated)}</span></td></tr>"
+        )
+    body.append("</tbody></table></body></html>")
+    return "\n".join(body).encode("utf-8")
+
+def load_pages(pages_dir=None, tsv_file=DEFAULT_TSV, rows_per_page=50, repeat=1):
+    """
+    Return a list of page bodies (bytes), page 1 first.
+    Recorded pages win over synthesised ones when `pages_dir` is given.
+    """
+    if pages_dir:
+        files = sorted(Path(pages_dir).glob("page_*.html"), key=lambda p: int(p.stem.split("_")[1]))
+        return [p.read_bytes() for p in files]
+
+    with open(tsv_file, newline="") as f:
+        reader = csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE)
+        next(reader)
+        rows = [tuple(r[:3]) for r in reader if len(r) >= 3] * repeat
+    return [render_listing_page(rows[i:i + rows_per_page])
+            for i in range(0, len(rows), rows_per_page)]
+
+@contextmanager
+def serve_pages(pages, latency=0.0):
+    """
+    Serve `pages` at http://127.0.0.1:<port>/bioconda/repo?page=N on a background
+    thread, sleeping `latency` seconds per request to emulate network round trips.
+    Yields the repo base URL.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            page = int(query.get("page", ["1"])[0])
+            body = pages[page - 1] if 1 <= page <= len(pages) else EMPTY_PAGE
+            if latency:
+                time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/bioconda/repo"
+    finally:
+        server.shutdown()
+        server.server_close()
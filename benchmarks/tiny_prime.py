@@ -0,0 +1,95 @@
+"""
+Tiny random-weight stand-in for the PRIME model, for offline benchmarks.
+
+It is a two-layer ESM masked-LM with an ESM-style residue vocabulary, so it
+tokenises raw protein strings, adds <cls>/<eos> around them and returns
+`.logits` exactly like the model prime_mutant_scoring.py loads.
+"""
+import random
+import tempfile
+from pathlib import Path
+
+import torch
+from transformers import EsmConfig, EsmForMaskedLM, EsmTokenizer
+
+VOCAB = ["<cls>", "<pad>", "<eos>", "<unk>",
+         *"LAGVSERTIDPKQNFYMHWC", "X", "B", "U", "Z", "O", ".", "-", "<null_1>", "<mask>"]
+RESIDUES = "ACDEFGHIKLMNPQRSTVWY"
+
+def build_tiny_model(seed=0, hidden_size=64, layers=2, heads=4, max_length=1024):
+    """Return (model, tokenizer) with deterministic random weights, in eval mode."""
+    torch.manual_seed(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        vocab_file = Path(tmp) / "vocab.txt"
+        vocab_file.write_text("\n".join(VOCAB))
+        tokenizer = EsmTokenizer(str(vocab_file))
+    config = EsmConfig(
+        vocab_size=len(VOCAB),
+        hidden_size=hidden_size,
+        num_hidden_layers=layers,
+        num_attention_heads=heads,
+        intermediate_size=hidden_size * 2,
+        max_position_embeddings=max_length + 2,
+        pad_token_id=tokenizer.pad_token_id,
+        mask_token_id=tokenizer.mask_token_id,
+        position_embedding_type="rotary",
+    )
+    model = EsmForMaskedLM(config)
+    model.eval()
+    return model, tokenizer
+
+# Remote-code module saved next to the tiny model, so AutoModel (as used by
+# prime_mutant_scoring.load_model) returns the masked LM, like PRIME does
+MODELING_SOURCE = """from transformers import EsmForMaskedLM
+
+class TinyPrime(EsmForMaskedLM):
+    pass
+"""
+
+def save_tiny_model(folder, **kwargs):
+    """
+    Save the tiny model and tokenizer to folder so it loads through
+    load_model(folder, ...) in another process. Returns the folder.
+    """
+    folder = Path(folder)
+    model, tokenizer = build_tiny_model(**kwargs)
+    model.config.auto_map = {"AutoModel": "modeling_tiny_prime.TinyPrime"}
+    model.save_pretrained(folder)
+    tokenizer.save_pretrained(folder)
+    (folder / "modeling_tiny_prime.py").write_text(MODELING_SOURCE)
+    return folder
+
+def random_sequence(length, seed=0):
+    rng = random.Random(seed)
+    return "".join(rng.choice(RESIDUES) for _ in range(length))
+
+def write_fasta(path, records):
+    """Write {record_id: sequence} to a FASTA file."""
+    with open(path, "w") as f:
+        for record_id, sequence in records.items():
+            f.write(f">{record_id}\n{sequence}\n")
+
+def write_proteingym_fixture(folder, assays=4, length=200, mutants=2000, seed=0):
+    """
+    Write a ProteinGym-shaped fixture under folder: fasta/<assay>.fasta and
+    mutant/<assay>.csv with "mutant" (single and double substitutions) and
+    a random DMS "score" column. Returns (sequence_folder, mutant_folder).
+    """
+    folder = Path(folder)
+    sequence_folder, mutant_folder = folder / "fasta", folder / "mutant"
+    sequence_folder.mkdir(parents=True, exist_ok=True)
+    mutant_folder.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    for i in range(assays):
+        stem = f"ASSAY{i}_SYNTH"
+        sequence = random_sequence(length, seed=seed + i)
+        write_fasta(sequence_folder / f"{stem}.fasta", {stem: sequence})
+        with open(mutant_folder / f"{stem}.csv", "w") as f:
+            f.write("mutant,score\n")
+            for _ in range(mutants):
+                subs = []
+                for position in sorted(rng.sample(range(length), rng.choice((1, 1, 1, 2)))):
+                    mt = rng.choice([aa for aa in RESIDUES if aa != sequence[position]])
+                    subs.append(f"{sequence[position]}{position + 1}{mt}")
+                f.write(f"{':'.join(subs)},{rng.gauss(0, 1):.4f}\n")
+    return sequence_folder, mutant_folder
@@ -1,23 +1,83 @@
 import requests
 from bs4 import BeautifulSoup
+import json
+import os
+import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
+
+from atomic_file import atomic_write
+from http_session import setup_session
+from keyword_matcher import get_filter
+from metrics import default_metrics
+from package_catalogue import DEFAULT_CATALOGUE_PATH, PackageCatalogue
+from package_table import extract_package_rows
+from tsv_writer import BatchedTSVWriter, ProgressReporter
 
 BIOCONDA_REPO_URL = "https://anaconda.org/bioconda/repo"
+ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiter whose refill rate adapts to the server.
+    The rate is halved whenever a response shows throttling (429 or retries
+    triggered by the session's Retry policy) and grows back by `increase`
+    requests/second after each clean response, up to `max_rate`.
+    """
+    def __init__(self, rate=0.5, max_rate=2.0, min_rate=0.05, increase=0.05, capacity=None):
+        self.rate = rate
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.increase = increase
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Block until a request token is available; the whole wait is observed once."""
+        with default_metrics().timer("stage_seconds", stage="rate_limit_wait"):
+            while True:
+                with self.lock:
+                    self._refill()
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+                time.sleep(wait)
 
-def setup_session():
-    session = requests.Session()
-    retries = Retry(
-        total=5, 
-        backoff_factor=2,  # Gradual backoff
-        status_forcelist=[524, 502, 503, 504], 
-        allowed_methods=["GET"]
-    )
-    session.mount('http://', HTTPAdapter(max_retries=retries))
-    session.mount('https://', HTTPAdapter(max_retries=retries))
-    return session
+    def on_success(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after=None):
+        with self.lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate / 2)
+            # Drop any saved-up burst; honour Retry-After by going into token debt
+            self.tokens = min(self.tokens, 0)
+            if retry_after:
+                self.tokens = min(self.tokens, -retry_after * self.rate)
+
+def _retry_after(response):
+    value = response.headers.get("Retry-After")
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+def _was_throttled(response):
+    if response.status_code == 429:
+        return True
+    retries = getattr(response.raw, "retries", None)
+    return bool(retries is not None and retries.history)
 
 def filter_package_name(name: str) -> bool:
     """
@@ -48,82 +108,380 @@ def filter_text(text: str, keywords: List[str], exclusion_keywords: List[str]) -
     if not filter_package_name(text):
         return False
     
-    # Then do regular keyword filtering
-    has_inclusion = any(keyword.lower() in text for keyword in keywords)
-    has_exclusion = any(ex_keyword.lower() in text for ex_keyword in exclusion_keywords)
-    
-    return has_inclusion and not has_exclusion
+    # Then do regular keyword filtering (compiled once per keyword set)
+    return get_filter(keywords, exclusion_keywords).keep(text)
+
+def parse_package_rows(content, encoding="utf-8"):
+    """
+    Extract (name, description, updated_date) tuples from a repo listing page.
+    Returns None when the page has no package table (past the last page).
+    Uses the streaming extractor; parse_package_rows_soup is the DOM reference.
+    """
+    with default_metrics().timer("stage_seconds", stage="parse"):
+        return extract_package_rows(content, encoding)
+
+def parse_package_rows_soup(html):
+    """
+    BeautifulSoup version of parse_package_rows, kept as the parity reference.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    package_table = soup.find('table')
+    if not package_table:
+        return None
+
+    rows = []
+    for row in package_table.find_all('tr')[1:]:  # Skip header row
+        columns = row.find_all('td')
+        if len(columns) < 4:
+            continue  # Skip rows that do not have enough columns
+
+        package_name = columns[0].find('a').text.strip()
+        description = columns[2].text.strip() if len(columns) > 2 else "No description available"
+        updated_date = columns[3].text.strip() if len(columns) > 3 else "No date available"
+        rows.append((package_name, description, updated_date))
+    return rows
+
+def write_filtered_rows(writer, rows, keywords, exclusion_keywords, progress=None, catalogue=None):
+    """
+    Write the rows that pass the name and keyword filters to a BatchedTSVWriter.
+    With a PackageCatalogue, every row is also stored there unfiltered.
+    Returns the number of rows written.
+    """
+    metrics = default_metrics()
+    if catalogue is not None:
+        with metrics.timer("stage_seconds", stage="catalogue"):
+            catalogue.add_rows(rows)
+
+    written = 0
+    with metrics.timer("stage_seconds", stage="filter"):
+        for package_name, description, updated_date in rows:
+            # First check package name
+            if not filter_package_name(package_name):
+                continue
+
+            # Then check content
+            name_ok = filter_text(package_name, keywords, exclusion_keywords)
+            desc_ok = filter_text(description, keywords, exclusion_keywords)
+
+            if not (name_ok or desc_ok):
+                continue
 
-def fetch_package_details(session, keywords, exclusion_keywords, output_file):
+            writer.write_row((package_name, description, updated_date))
+            written += 1
+
+    metrics.inc("rows_scraped_total", len(rows))
+    metrics.inc("rows_kept_total", written)
+    if progress:
+        progress.update(pages=1, processed=len(rows), kept=written)
+    return written
+
+def fetch_package_details(session, keywords, exclusion_keywords, writer,
+                          base_url=BIOCONDA_REPO_URL, delay=5, progress=None, catalogue=None):
+    """
+    Crawl the repo listing page by page. Returns True only if the crawl
+    reached the end of the listing; False if a request failed on the way.
+    """
     page = 1
     found_packages = False  # To detect when we've fetched at least one package
 
     while True:
         try:
-            print(f"Searching page {page}...")
-            response = session.get(f"{BIOCONDA_REPO_URL}?page={page}", timeout=30)
+            response = session.get(f"{base_url}?page={page}", timeout=30)
             response.raise_for_status()
 
-            soup = BeautifulSoup(response.text, 'html.parser')
-            package_table = soup.find('table')
+            rows = parse_package_rows(response.content, response.encoding)
 
             # Stop if no more packages are found on the page
-            if not package_table:
+            if rows is None:
                 if found_packages:
                     print("No more packages found. Ending search.")
                 else:
                     print("No packages found at all. Check if the URL or repository structure has changed.")
-                break
+                return page > 1  # A listing without any table is not a finished crawl
+
+            if write_filtered_rows(writer, rows, keywords, exclusion_keywords, progress, catalogue):
+                found_packages = True  # Mark that we found a valid package
 
-            with open(output_file, "a") as f:
-                for row in package_table.find_all('tr')[1:]:  # Skip header row
-                    columns = row.find_all('td')
-                    if len(columns) < 4:
-                        continue  # Skip rows that do not have enough columns
-
-                    package_name = columns[0].find('a').text.strip()
-                    description = columns[2].text.strip() if len(columns) > 2 else "No description available"
-                    updated_date = columns[3].text.strip() if len(columns) > 3 else "No date available"
-
-                    print(f"Processing package: {package_name}")
-
-                    # First check package name
-                    if not filter_package_name(package_name):
-                        print(f"Filtered out {package_name} - excluded prefix")
-                        continue
-
-                    # Then check content
-                    name_ok = filter_text(package_name, keywords, exclusion_keywords)
-                    desc_ok = filter_text(description, keywords, exclusion_keywords)
-                    
-                    if not (name_ok or desc_ok):
-                        print(f"Filtered out {package_name} - no matching keywords")
-                        continue
-
-                    f.write(f"{package_name}\t{description}\t{updated_date}\n")
-                    print(f"Added {package_name} to TSV file.")
-                    found_packages = True  # Mark that we found a valid package
-                    
             page += 1
-            time.sleep(5)  # Avoid rate-limiting
+            with default_metrics().timer("stage_seconds", stage="delay"):
+                time.sleep(delay)  # Avoid rate-limiting
 
         except requests.exceptions.Timeout:
             print(f"Timeout occurred for page {page}. Retrying...")
         except requests.exceptions.HTTPError as e:
             print(f"HTTP Error for page {page}: {e}")
-            break
+            return False
         except requests.exceptions.RequestException as e:
             print(f"Request failed: {e}")
+            return False
+
+def fetch_page_rows(session, page, limiter, base_url=BIOCONDA_REPO_URL, max_timeouts=3):
+    """
+    Fetch and parse one listing page, pacing the request through `limiter`.
+    Timeouts are retried up to `max_timeouts` times before being raised.
+    """
+    for attempt in range(1, max_timeouts + 1):
+        limiter.acquire()
+        try:
+            response = session.get(f"{base_url}?page={page}", timeout=30)
+        except requests.exceptions.Timeout:
+            limiter.on_throttle()
+            if attempt == max_timeouts:
+                raise
+            print(f"Timeout occurred for page {page}. Retrying...")
+            continue
+
+        if _was_throttled(response):
+            limiter.on_throttle(_retry_after(response))
+        else:
+            limiter.on_success()
+        response.raise_for_status()
+        return parse_package_rows(response.content, response.encoding)
+
+def fetch_package_details_concurrent(session, keywords, exclusion_keywords, writer,
+                                     workers=4, window=8, limiter=None, base_url=BIOCONDA_REPO_URL,
+                                     progress=None, catalogue=None):
+    """
+    Crawl the repo listing with up to `window` pages in flight on a thread pool.
+    Pages are consumed strictly in page order, so the TSV is identical to the
+    one the serial crawler writes; pacing comes from an adaptive TokenBucket
+    instead of a fixed sleep. Returns True only if the crawl reached the end
+    of the listing, like fetch_package_details.
+    """
+    limiter = limiter or TokenBucket()
+    window = max(window, workers)
+    found_packages = False
+    completed = False
+    pending = {}
+    next_page = 1
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        def submit_next():
+            nonlocal next_page
+            pending[next_page] = pool.submit(fetch_page_rows, session, next_page, limiter, base_url)
+            next_page += 1
+
+        for _ in range(window):
+            submit_next()
+
+        page = 1
+        while True:
+            try:
+                rows = pending.pop(page).result()
+            except requests.exceptions.HTTPError as e:
+                print(f"HTTP Error for page {page}: {e}")
+                break
+            except requests.exceptions.RequestException as e:
+                print(f"Request failed: {e}")
+                break
+
+            if rows is None:
+                if found_packages:
+                    print("No more packages found. Ending search.")
+                else:
+                    print("No packages found at all. Check if the URL or repository structure has changed.")
+                completed = page > 1
+                break
+
+            if write_filtered_rows(writer, rows, keywords, exclusion_keywords, progress, catalogue):
+                found_packages = True
+
+            page += 1
+            submit_next()
+
+        # Pages queued past the end of the listing are not needed
+        for future in pending.values():
+            future.cancel()
+    return completed
+
+
+def _is_iso_date(value):
+    return bool(ISO_DATE.fullmatch(value))
+
+def load_checkpoint(checkpoint_file):
+    """
+    Load the crawl checkpoint, or return an empty one if none exists yet.
+    Keys: 'high_water' (newest Updated_Date merged so far), 'pages' (per-page
+    ETag/Last-Modified) and 'run' (last_page/newest of an unfinished crawl).
+    """
+    if not os.path.exists(checkpoint_file):
+        return {"high_water": None, "pages": {}, "run": None}
+    with open(checkpoint_file) as f:
+        return json.load(f)
+
+def save_checkpoint(checkpoint_file, checkpoint):
+    with atomic_write(checkpoint_file) as f:
+        json.dump(checkpoint, f, indent=2)
+
+def _read_tsv_rows(path, has_header=True):
+    rows = []
+    if not os.path.exists(path):
+        return rows
+    with open(path) as f:
+        if has_header:
+            next(f, None)
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) == 3:
+                rows.append(tuple(fields))
+    return rows
+
+def merge_into_tsv(output_file, staging_file):
+    """
+    Merge staged rows into the existing TSV and rewrite it atomically.
+    Staged rows come first (they are the newest) and replace existing rows
+    for the same package. Returns the number of packages not seen before.
+    """
+    existing = _read_tsv_rows(output_file)
+    known = {name for name, _, _ in existing}
+    merged = {}
+    for name, description, updated_date in _read_tsv_rows(staging_file, has_header=False):
+        merged.setdefault(name, (name, description, updated_date))
+    added = sum(1 for name in merged if name not in known)
+    for row in existing:
+        merged.setdefault(row[0], row)
+
+    with BatchedTSVWriter(output_file) as writer:
+        for row in merged.values():
+            writer.write_row(row)
+    return added
+
+def fetch_package_details_incremental(session, keywords, exclusion_keywords, output_file,
+                                      checkpoint_file=None, base_url=BIOCONDA_REPO_URL, delay=5,
+                                      batch_size=500, progress=None, catalogue=None):
+    """
+    Crawl only what changed since the last run and merge it into `output_file`.
+
+    Pages are requested with If-None-Match/If-Modified-Since from the previous
+    run; the crawl stops at the first unchanged (304) page or once it reaches
+    packages older than the stored high-water mark. Progress is checkpointed
+    after every page, so an interrupted crawl resumes where it stopped.
+    Returns True if the crawl finished and was merged.
+    """
+    checkpoint_file = checkpoint_file or f"{output_file}.checkpoint.json"
+    staging_file = f"{output_file}.partial"
+    checkpoint = load_checkpoint(checkpoint_file)
+    high_water = checkpoint.get("high_water")
+    validators = checkpoint.setdefault("pages", {})
+
+    run = checkpoint.get("run")
+    if run and os.path.exists(staging_file):
+        print(f"Resuming interrupted crawl after page {run['last_page']}...")
+        mode = "a"
+    else:
+        run = {"last_page": 0, "newest": None}
+        mode = "w"
+    page = run["last_page"] + 1
+    staging = BatchedTSVWriter(staging_file, header=None, batch_size=batch_size, atomic=False, mode=mode)
+
+    while True:
+        headers = {}
+        cached = validators.get(str(page), {})
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        try:
+            response = session.get(f"{base_url}?page={page}", headers=headers, timeout=30)
+            if response.status_code == 304:
+                print(f"Page {page} unchanged since last crawl. Ending search.")
+                break
+            response.raise_for_status()
+        except requests.exceptions.Timeout:
+            print(f"Timeout occurred for page {page}. Retrying...")
+            continue
+        except requests.exceptions.RequestException as e:
+            print(f"Request failed for page {page}: {e}")
+            print(f"Crawl checkpointed at page {run['last_page']}; rerun to resume.")
+            staging.commit()
+            return False
+
+        rows = parse_package_rows(response.content, response.encoding)
+        if rows is None:
+            print("No more packages found. Ending search.")
             break
 
+        write_filtered_rows(staging, rows, keywords, exclusion_keywords, progress, catalogue)
+        # Staged rows must be on disk before the checkpoint claims this page
+        staging.flush()
 
-def search_and_write_package_details(keywords, exclusion_keywords, output_file):
-    # Open and write the header of the TSV file
-    with open(output_file, "w") as f:
-        f.write("Package_Name\tDescription\tUpdated_Date\n")
+        dates = [updated_date for _, _, updated_date in rows if _is_iso_date(updated_date)]
+        run["newest"] = max(filter(None, dates + [run["newest"]]), default=None)
+        validators[str(page)] = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        run["last_page"] = page
+        checkpoint["run"] = run
+        save_checkpoint(checkpoint_file, checkpoint)
 
-    session = setup_session()
-    fetch_package_details(session, keywords, exclusion_keywords, output_file)
+        # The listing is sorted by Updated_Date, so everything past here is already merged
+        if high_water and dates and min(dates) < high_water:
+            print(f"Reached packages older than {high_water}. Ending search.")
+            break
+
+        page += 1
+        with default_metrics().timer("stage_seconds", stage="delay"):
+            time.sleep(delay)
+
+    staging.commit()
+    if progress:
+        progress.done()
+    added = merge_into_tsv(output_file, staging_file)
+    checkpoint["high_water"] = max(filter(None, (high_water, run["newest"])), default=None)
+    checkpoint["run"] = None
+    save_checkpoint(checkpoint_file, checkpoint)
+    os.remove(staging_file)
+    print(f"Merged {added} new packages into {output_file}.")
+    return True
+
+def export_from_catalogue(catalogue, keywords, exclusion_keywords, output_file, batch_size=500):
+    """
+    Regenerate the filtered TSV from the local catalogue, without any requests.
+    The full-text index narrows the rows to those containing an inclusion
+    keyword; the crawler's own filters then decide exactly as during a crawl.
+    """
+    start = time.perf_counter()
+    candidates = catalogue.match_rows(keywords)
+    with BatchedTSVWriter(output_file, batch_size=batch_size) as writer:
+        write_filtered_rows(writer, candidates, keywords, exclusion_keywords)
+    print(f"Wrote {writer.rows_written} of {len(catalogue)} catalogued packages to {output_file} "
+          f"({len(candidates)} candidates, {time.perf_counter() - start:.3f}s).")
+
+def search_and_write_package_details(keywords, exclusion_keywords, output_file,
+                                     workers=1, window=8, rate=0.5, delay=5, incremental=False,
+                                     batch_size=500, progress_interval=5.0, base_url=BIOCONDA_REPO_URL,
+                                     catalogue=None):
+    session = setup_session(pool_size=max(10, workers))
+    progress = ProgressReporter(interval=progress_interval)
+    if incremental:
+        # Keeps the existing TSV and merges new rows into it
+        return fetch_package_details_incremental(session, keywords, exclusion_keywords, output_file,
+                                                 base_url=base_url, delay=delay, batch_size=batch_size,
+                                                 progress=progress, catalogue=catalogue)
+
+    # One buffered handle for the whole crawl; the TSV is only replaced once it finishes
+    with BatchedTSVWriter(output_file, batch_size=batch_size) as writer:
+        if workers > 1:
+            limiter = TokenBucket(rate=rate, max_rate=max(rate, 2.0))
+            completed = fetch_package_details_concurrent(session, keywords, exclusion_keywords, writer,
+                                                         workers=workers, window=window, limiter=limiter,
+                                                         base_url=base_url, progress=progress,
+                                                         catalogue=catalogue)
+        else:
+            completed = fetch_package_details(session, keywords, exclusion_keywords, writer,
+                                              base_url=base_url, delay=delay, progress=progress,
+                                              catalogue=catalogue)
+        if not completed:
+            # A partial crawl must not replace the previous complete TSV
+            writer.abort()
+    progress.done()
+    if completed:
+        print(f"Wrote {writer.rows_written} packages to {output_file}.")
+    else:
+        print(f"Crawl did not finish; {output_file} was left unchanged.")
+    return completed
 
 # Example usage
 keywords = [
@@ -165,6 +523,36 @@ exclusion_keywords = [
 
 ]
 
-output_file = "bioconda_filtered_packages.tsv"
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Scrape the Bioconda repo listing into a filtered TSV.")
+    parser.add_argument("--output_file", type=str, default="bioconda_filtered_packages.tsv", help="Path of the TSV to write.")
+    parser.add_argument("--workers", type=int, default=1, help="Concurrent page fetchers (1 keeps the serial crawl).")
+    parser.add_argument("--window", type=int, default=8, help="Maximum number of pages in flight at once.")
+    parser.add_argument("--rate", type=float, default=0.5, help="Initial requests per second for the adaptive limiter.")
+    parser.add_argument("--incremental", action="store_true", help="Only fetch packages updated since the last crawl and merge them into the TSV.")
+    parser.add_argument("--batch_size", type=int, default=500, help="Rows buffered before each write to disk.")
+    parser.add_argument("--progress_interval", type=float, default=5.0, help="Seconds between progress lines.")
+    parser.add_argument("--catalogue", type=str, default=DEFAULT_CATALOGUE_PATH, help="SQLite catalogue that keeps every scraped row.")
+    parser.add_argument("--no_catalogue", action="store_true", help="Do not store scraped rows in the catalogue.")
+    parser.add_argument("--from_catalogue", action="store_true", help="Regenerate the TSV from the catalogue without crawling.")
+    parser.add_argument("--metrics_file", type=str, default=None, help="Write request/stage metrics here (.json, or .prom for Prometheus text).")
+    args = parser.parse_args()
+
+    completed = True
+    if args.from_catalogue:
+        export_from_catalogue(PackageCatalogue(args.catalogue), keywords, exclusion_keywords,
+                              args.output_file, batch_size=args.batch_size)
+    else:
+        completed = search_and_write_package_details(keywords, exclusion_keywords, args.output_file,
+                                                     workers=args.workers, window=args.window, rate=args.rate,
+                                                     incremental=args.incremental, batch_size=args.batch_size,
+                                                     progress_interval=args.progress_interval,
+                                                     catalogue=None if args.no_catalogue else PackageCatalogue(args.catalogue))
 
-search_and_write_package_details(keywords, exclusion_keywords, output_file)
+    if args.metrics_file:
+        default_metrics().write_report(args.metrics_file)
+    if not completed:
+        sys.exit(1)
@@ -0,0 +1,170 @@
+import bz2
+import json
+import os
+import re
+import time
+from functools import cmp_to_key
+
+from atomic_file import atomic_write
+
+BIOCONDA_CHANNEL_URL = "https://conda.anaconda.org/bioconda"
+DEFAULT_INDEX_PATH = "bioconda_channel_index.json"
+DEFAULT_MAX_AGE = 7 * 24 * 3600  # Seconds before a persisted index is considered out of date
+
+_NUMERIC = (1, 0, "")  # Padding component: versions compare as if right-padded with zeros
+
+def version_key(version):
+    """
+    Split a conda version string into comparable components, following
+    conda's ordering closely enough to pick the latest release:
+    dev < other strings (alpha, beta, rc) < numbers < post.
+    """
+    version = str(version).strip().lower()
+    epoch, _, rest = version.rpartition("!")
+    components = []
+    for segment in re.split(r"[._-]", rest.split("+")[0]):
+        for token in re.findall(r"\d+|[a-z]+", segment):
+            if token.isdigit():
+                components.append((1, int(token), ""))
+            elif token == "post":
+                components.append((2, 0, ""))
+            elif token == "dev":
+                components.append((-2, 0, ""))
+            else:
+                components.append((-1, 0, token))
+    return int(epoch) if epoch.isdigit() else 0, components
+
+def compare_versions(a, b):
+    """Return -1, 0 or 1 as conda version a is older, equal or newer than b."""
+    (epoch_a, parts_a), (epoch_b, parts_b) = version_key(a), version_key(b)
+    if epoch_a != epoch_b:
+        return -1 if epoch_a < epoch_b else 1
+    length = max(len(parts_a), len(parts_b))
+    parts_a = parts_a + [_NUMERIC] * (length - len(parts_a))
+    parts_b = parts_b + [_NUMERIC] * (length - len(parts_b))
+    return (parts_a > parts_b) - (parts_a < parts_b)
+
+def newest_version(versions):
+    return max(versions, key=cmp_to_key(compare_versions))
+
+class ChannelIndex:
+    """
+    Offline name -> latest-version map for the bioconda channel.
+
+    Built once from a channeldata.json or one or more repodata.json
+    snapshots (plain or .bz2), persisted as a small JSON file, and then
+    answers membership and latest-version questions without any network
+    requests. Package names are matched case-insensitively.
+    """
+    def __init__(self, versions, source=None, built_at=None):
+        self.versions = {name.lower(): version for name, version in versions.items()}
+        self.source = source
+        self.built_at = built_at or time.time()
+
+    def __contains__(self, name):
+        return str(name).lower() in self.versions
+
+    def __len__(self):
+        return len(self.versions)
+
+    def latest_version(self, name):
+        """Return the latest version of name, or None if it is not on the channel."""
+        return self.versions.get(str(name).lower())
+
+    @property
+    def age(self):
+        """Seconds since the index was built."""
+        return time.time() - self.built_at
+
+    @classmethod
+    def from_snapshots(cls, paths):
+        """
+        Build an index from channeldata/repodata files. Several repodata
+        files (e.g. noarch and linux-64) are merged, keeping the newest version.
+        """
+        candidates = {}
+        for path in paths:
+            data = _read_json(path)
+            if "channeldata_version" in data:
+                for name, info in data.get("packages", {}).items():
+                    if info.get("version"):
+                        candidates.setdefault(name, set()).add(info["version"])
+            else:
+                for key in ("packages", "packages.conda"):
+                    for record in data.get(key, {}).values():
+                        candidates.setdefault(record["name"], set()).add(record["version"])
+        versions = {name: newest_version(found) for name, found in candidates.items()}
+        return cls(versions, source=", ".join(str(p) for p in paths))
+
+    @classmethod
+    def download(cls, session, output_path, channel_url=BIOCONDA_CHANNEL_URL):
+        """Fetch channeldata.json in one request, save the snapshot and build the index."""
+        response = session.get(f"{channel_url}/channeldata.json", timeout=300)
+        response.raise_for_status()
+        with open(output_path, "wb") as f:
+            f.write(response.content)
+        return cls.from_snapshots([output_path])
+
+    def save(self, path=DEFAULT_INDEX_PATH):
+        with atomic_write(path) as f:
+            json.dump({"source": self.source, "built_at": self.built_at,
+                       "packages": dict(sorted(self.versions.items()))}, f)
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data["packages"], source=data.get("source"), built_at=data.get("built_at"))
+
+def load_channel_index(path=None, max_age=None):
+    """
+    Load the persisted index from `path`, $BIOCONDA_CHANNEL_INDEX or the
+    default location. Returns None if no index has been built, so callers
+    can fall back to per-package lookups.
+
+    An index older than `max_age` seconds (default: $BIOCONDA_CHANNEL_INDEX_MAX_AGE
+    or 7 days) is only used when `path` names it explicitly, with a warning;
+    one picked up implicitly is ignored, so an old file left in the working
+    directory cannot silently pin every lookup to outdated versions.
+    """
+    explicit = path is not None
+    path = path or os.environ.get("BIOCONDA_CHANNEL_INDEX", DEFAULT_INDEX_PATH)
+    if not os.path.exists(path):
+        return None
+    index = ChannelIndex.load(path)
+    if max_age is None:
+        max_age = float(os.environ.get("BIOCONDA_CHANNEL_INDEX_MAX_AGE", DEFAULT_MAX_AGE))
+    if index.age > max_age:
+        days = index.age / 86400
+        if not explicit:
+            print(f"Ignoring {path}: built {days:.1f} days ago (rebuild it with channel_index.py, "
+                  f"or pass it with --channel_index to use it anyway)")
+            return None
+        print(f"Warning: {path} was built {days:.1f} days ago; versions may be out of date")
+    return index
+
+def _read_json(path):
+    opener = bz2.open if str(path).endswith(".bz2") else open
+    with opener(path, "rt") as f:
+        return json.load(f)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the offline bioconda name -> latest-version index.")
+    parser.add_argument("snapshots", nargs="*", help="Local channeldata.json / repodata.json(.bz2) files.")
+    parser.add_argument("--download", action="store_true", help="Download channeldata.json from the bioconda channel first.")
+    parser.add_argument("--snapshot_file", type=str, default="bioconda_channeldata.json", help="Where --download saves the snapshot.")
+    parser.add_argument("--output", type=str, default=DEFAULT_INDEX_PATH, help="Path of the index to write.")
+    args = parser.parse_args()
+
+    if args.download:
+        from http_session import setup_session
+        index = ChannelIndex.download(setup_session(), args.snapshot_file)
+    elif args.snapshots:
+        index = ChannelIndex.from_snapshots(args.snapshots)
+    else:
+        parser.error("give snapshot files or --download")
+
+    index.save(args.output)
+    print(f"Indexed {len(index)} bioconda packages from {index.source} into {args.output}")
@@ -1,59 +1,65 @@
-import requests
-import os
-import yaml
+from channel_index import load_channel_index
+from env_scan import build_dependency_index
+from http_session import setup_session
+from metadata_cache import ANACONDA_PAGE, default_cache
+from metrics import default_metrics
 
 BIOCONDA_BASE_URL = "https://anaconda.org/bioconda/"
 
 bioinformatics_keywords = ["bioconda"]
 
-def is_bioconda_package(package_name):
+def is_bioconda_package(package_name, cache=None, session=None):
+    # Reuse a recent answer (positive or negative) from the shared metadata cache
+    cache = cache or default_cache()
+    cached = cache.get_membership(package_name, ANACONDA_PAGE)
+    if cached is not None:
+        return cached
+
     # Check if the package is listed in bioconda
     url = f"{BIOCONDA_BASE_URL}{package_name}"
-    response = requests.get(url)
+    response = (session or setup_session()).get(url, timeout=30)
     
-    if response.status_code == 200 and any(keyword in response.text for keyword in bioinformatics_keywords):
-        return True  # Package is a bioinformatics tool in bioconda
-    else:
-        return False  # Package is not found in bioconda
+    on_bioconda = response.status_code == 200 and any(keyword in response.text for keyword in bioinformatics_keywords)
+    if response.status_code in (200, 404):  # Don't cache transient failures
+        cache.set_membership(package_name, ANACONDA_PAGE, on_bioconda)
+    return on_bioconda  # True if the package is a bioinformatics tool in bioconda
 
 def extract_dependencies_from_yaml(env_folder):
-    dependencies = set()
-
-    # List all YAML files in the environment directory
-    yaml_files = [f for f in os.listdir(env_folder) if f.endswith(".yaml")]
-
-    for yaml_file in yaml_files:
-        with open(os.path.join(env_folder, yaml_file), "r") as file:
-            env_data = yaml.safe_load(file)
-            # Check for the dependencies section
-            if "dependencies" in env_data:
-                for dep in env_data["dependencies"]:
-                    if isinstance(dep, str):
-                        # If it's a string, extract package name
-                        dep_name = dep.split("=")[0]
-                        dependencies.add(dep_name)
-                    elif isinstance(dep, dict):
-                        # If it's a dictionary (like pip packages), extract pip deps
-                        if "pip" in dep:
-                            for pip_dep in dep["pip"]:
-                                dep_name = pip_dep.split("=")[0]
-                                dependencies.add(dep_name)
-    return dependencies
-
-def filter_bioconda_dependencies(dependencies):
+    # Conda and pip package names from every environment, via the shared cached scan
+    return set(build_dependency_index(env_folder, include_pip=True))
+
+def filter_bioconda_dependencies(dependencies, index=None, session=None):
+    # With a local channel index this is a dictionary lookup per dependency
+    if index is not None:
+        return [dep for dep in dependencies if dep in index]
+
+    # One pooled, instrumented session for all lookups
+    session = session or setup_session()
     bioinformatics_tools = []
     for dep in dependencies:
-        if is_bioconda_package(dep):
+        if is_bioconda_package(dep, session=session):
             bioinformatics_tools.append(dep)
     return bioinformatics_tools
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="List env/*.yaml dependencies that are Bioconda packages.")
+    parser.add_argument("--channel_index", type=str, default=None, help="Offline index built by channel_index.py (default: bioconda_channel_index.json if present).")
+    parser.add_argument("--metrics_file", type=str, default=None, help="Write request/stage metrics here (.json, or .prom for Prometheus text).")
+    args = parser.parse_args()
+
+    metrics = default_metrics()
     env_folder = "env/"  # Adjust this to point to the correct directory
-    dependencies = extract_dependencies_from_yaml(env_folder)
-    bioinformatics_tools = filter_bioconda_dependencies(dependencies)
+    with metrics.timer("stage_seconds", stage="scan"):
+        dependencies = extract_dependencies_from_yaml(env_folder)
+    with metrics.timer("stage_seconds", stage="resolve"):
+        bioinformatics_tools = filter_bioconda_dependencies(dependencies, load_channel_index(args.channel_index))
     
     # Print or write the results to a file
     with open("bioinformatics_tools.txt", "w") as f:
         for tool in bioinformatics_tools:
             f.write(f"{tool}\n")
     print(f"Bioinformatics tools saved to bioinformatics_tools.txt")
+    if args.metrics_file:
+        metrics.write_report(args.metrics_file)
@@ -0,0 +1,253 @@
+import json
+import os
+import queue
+import subprocess
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import yaml
+
+from atomic_file import atomic_write
+from env_scan import SafeLoader, env_hashes
+
+# Per-tool environments created by install_individual_envs.sh: package -> environment name
+PACKAGES_ENVS = {
+    "emboss": "emboss_env",
+    "kma": "kma_env",
+    "pandaseq": "pandaseq_env",
+    "spades": "spades_env",
+    "manta": "manta_env",
+    "blast": "blast_env",
+    "samtools": "samtools_env",
+    "bowtie2": "bowtie2_env",
+    "minimap2": "minimap2_env",
+    "mash": "mash_env",
+    "hmmer": "hmmer_env",
+    "recycler": "recycler_env",
+    "plasmidfinder": "plasmidfinder_env",
+    "mob_suite": "mob_suite_env",
+    "gapfiller": "gapfiller_env",
+}
+
+DEFAULT_CHANNELS = ("conda-forge", "bioconda")
+DEFAULT_LOG_DIR = "env_build_logs"
+DEFAULT_WORKERS = 4
+# conda's package cache (pkgs_dirs) has no reliable cross-process lock: two builds fetching or
+# extracting the same package can corrupt it. Parallel builds therefore each get their own
+# cache, <pkgs_root>/worker<i>, through CONDA_PKGS_DIRS.
+DEFAULT_PKGS_ROOT = "env_build_pkgs"
+MANIFEST_NAME = ".env_manifest.json"  # Kept in the YAML directory: env file -> hash of the last good build
+
+# One environment to build: its name, the command that builds it and the YAML it comes from (if any)
+BuildJob = namedtuple("BuildJob", ["name", "command", "yaml_file"], defaults=[None])
+# Outcome of a job: final exit code, seconds across all attempts, attempts made, log path
+BuildResult = namedtuple("BuildResult", ["name", "returncode", "seconds", "attempts", "log_file"])
+
+def package_jobs(packages_envs=None, conda="conda", channels=DEFAULT_CHANNELS):
+    """
+    Jobs creating one environment per bioconda package. The package is
+    installed by the create command itself, without global channel changes.
+    """
+    channel_args = [arg for channel in channels for arg in ("-c", channel)]
+    return [BuildJob(env_name, [conda, "create", "-n", env_name, "-y", *channel_args, f"bioconda::{package}"])
+            for package, env_name in (packages_envs or PACKAGES_ENVS).items()]
+
+def yaml_env_name(yaml_file):
+    """The environment a YAML creates: its name: field, or the file stem where it has none."""
+    with open(yaml_file) as f:
+        environment = yaml.load(f, Loader=SafeLoader) or {}
+    return environment.get("name") or Path(yaml_file).stem
+
+def yaml_jobs(yaml_files, conda="conda"):
+    """
+    Jobs recreating the environment of each exported YAML, named as conda
+    will name it. Raises ValueError if two YAMLs create the same environment,
+    since parallel builds of it would overwrite each other.
+    """
+    jobs, sources = [], {}
+    for yaml_file in sorted(yaml_files):
+        name = yaml_env_name(yaml_file)
+        if name in sources:
+            raise ValueError(f"{yaml_file} and {sources[name]} both create environment {name!r}")
+        sources[name] = yaml_file
+        jobs.append(BuildJob(name, [conda, "env", "create", "-f", str(yaml_file), "-n", name, "--force"],
+                             str(yaml_file)))
+    return jobs
+
+def load_env_manifest(manifest_file):
+    try:
+        with open(manifest_file) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_env_manifest(manifest_file, manifest):
+    with atomic_write(manifest_file) as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+def changed_yaml_files(yaml_dir, manifest):
+    """
+    Compare each env YAML's dependency hash with the manifest.
+    Returns (YAML files whose hash moved or that were never built, current hashes).
+    """
+    hashes = env_hashes(yaml_dir)
+    changed = [Path(yaml_dir) / yaml_file for yaml_file, digest in hashes.items() if manifest.get(yaml_file) != digest]
+    return changed, hashes
+
+def record_builds(manifest, jobs, results, hashes):
+    """Store the hash of every YAML environment that built successfully (results in job order)."""
+    for job, result in zip(jobs, results):
+        yaml_file = Path(job.yaml_file).name if job.yaml_file else None
+        if result.returncode == 0 and yaml_file in hashes:
+            manifest[yaml_file] = hashes[yaml_file]
+
+def run_job(job, log_dir=DEFAULT_LOG_DIR, retries=1, retry_delay=10, timeout=None, pkgs_dir=None):
+    """
+    Run one build, retrying a failed command up to `retries` more times.
+    Output of every attempt goes to <log_dir>/<env name>.log. With
+    `pkgs_dir`, conda downloads and extracts packages there instead of in
+    its shared package cache.
+    """
+    log_file = Path(log_dir) / f"{job.name}.log"
+    env = None
+    if pkgs_dir is not None:
+        Path(pkgs_dir).mkdir(parents=True, exist_ok=True)
+        env = {**os.environ, "CONDA_PKGS_DIRS": str(Path(pkgs_dir).resolve())}
+    start = time.perf_counter()
+    returncode = None
+    with open(log_file, "w") as log:
+        if pkgs_dir is not None:
+            log.write(f"### package cache: {env['CONDA_PKGS_DIRS']}\n")
+        for attempt in range(1, retries + 2):
+            log.write(f"### attempt {attempt}: {' '.join(job.command)}\n")
+            log.flush()
+            try:
+                returncode = subprocess.run(job.command, stdout=log, stderr=subprocess.STDOUT,
+                                            stdin=subprocess.DEVNULL, timeout=timeout, env=env).returncode
+            except subprocess.TimeoutExpired:
+                returncode = -1
+                log.write(f"### timed out after {timeout}s\n")
+            except OSError as e:  # e.g. conda not on PATH
+                returncode = -1
+                log.write(f"### could not run: {e}\n")
+            log.write(f"### exit code {returncode}\n")
+            log.flush()
+            if returncode == 0 or attempt > retries:
+                break
+            time.sleep(retry_delay)
+    return BuildResult(job.name, returncode, time.perf_counter() - start, attempt, str(log_file))
+
+def build_envs(jobs, workers=DEFAULT_WORKERS, log_dir=DEFAULT_LOG_DIR, retries=1, retry_delay=10, timeout=None,
+               pkgs_root=DEFAULT_PKGS_ROOT):
+    """
+    Run build jobs with at most `workers` at a time.
+    Returns (results in job order, wall-clock seconds).
+
+    With workers > 1 and a `pkgs_root`, each worker slot has its own package
+    cache under pkgs_root, so no two running builds share one (at the cost
+    of downloading a package once per slot). pkgs_root=None shares conda's
+    default cache; a single worker always uses it.
+    """
+    Path(log_dir).mkdir(parents=True, exist_ok=True)
+    # A job takes a free slot, and with it that slot's package cache, for as long as it runs
+    slots = queue.Queue()
+    for slot in range(workers):
+        slots.put(Path(pkgs_root) / f"worker{slot}" if pkgs_root and workers > 1 else None)
+
+    def run_in_slot(job):
+        pkgs_dir = slots.get()
+        try:
+            return run_job(job, log_dir, retries, retry_delay, timeout, pkgs_dir=pkgs_dir)
+        finally:
+            slots.put(pkgs_dir)
+
+    start = time.perf_counter()
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_in_slot, job): job for job in jobs}
+        for future in as_completed(futures):
+            result = future.result()
+            results[result.name] = result
+            status = "ok" if result.returncode == 0 else f"FAILED (exit {result.returncode})"
+            print(f"{result.name}: {status} in {result.seconds:.1f}s after {result.attempts} attempt(s)")
+    return [results[job.name] for job in jobs], time.perf_counter() - start
+
+def summarise(results, wall_seconds):
+    """Summary of a build run: per-env results plus wall time against the serial sum."""
+    serial_seconds = sum(r.seconds for r in results)
+    return {
+        "envs": [r._asdict() for r in results],
+        "built": sum(1 for r in results if r.returncode == 0),
+        "failed": [r.name for r in results if r.returncode != 0],
+        "wall_seconds": round(wall_seconds, 2),
+        "serial_seconds": round(serial_seconds, 2),
+        "speedup": round(serial_seconds / max(wall_seconds, 1e-9), 2),
+    }
+
+def print_summary(summary):
+    print(f"\nBuilt {summary['built']} of {len(summary['envs'])} environments in {summary['wall_seconds']:.1f}s "
+          f"(serial sum {summary['serial_seconds']:.1f}s, {summary['speedup']:.1f}x)")
+    if summary["failed"]:
+        print(f"Failed: {', '.join(summary['failed'])} (see logs)")
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Create or recreate conda environments in parallel.")
+    parser.add_argument("source", choices=["packages", "yamls"],
+                        help="Build the per-tool package environments, or recreate env/*.yaml.")
+    parser.add_argument("--yaml_dir", type=str, default="env/", help="Directory of exported environment YAMLs.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Environments built at the same time, each with its own package cache.")
+    parser.add_argument("--pkgs_root", type=str, default=DEFAULT_PKGS_ROOT,
+                        help="Directory for the per-worker package caches of parallel builds.")
+    parser.add_argument("--shared_pkgs", action="store_true",
+                        help="Let parallel builds share conda's default package cache (no per-worker copies).")
+    parser.add_argument("--retries", type=int, default=1, help="Extra attempts for a failed build.")
+    parser.add_argument("--retry_delay", type=float, default=10, help="Seconds to wait before retrying.")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds before a build attempt is killed.")
+    parser.add_argument("--log_dir", type=str, default=DEFAULT_LOG_DIR, help="Directory for per-environment logs.")
+    parser.add_argument("--conda", type=str, default="conda", help="conda executable (looked up on PATH).")
+    parser.add_argument("--report", type=str, default=None, help="Write the summary to this JSON file.")
+    parser.add_argument("--changed_only", action="store_true",
+                        help="Only recreate YAML environments whose dependency hash changed since their last build.")
+    parser.add_argument("--record_only", action="store_true",
+                        help="Record the current YAML hashes as built without building anything.")
+    args = parser.parse_args()
+
+    manifest_file = Path(args.yaml_dir) / MANIFEST_NAME
+    manifest, hashes = {}, {}
+    if args.source == "packages":
+        jobs = package_jobs(conda=args.conda)
+    else:
+        manifest = load_env_manifest(manifest_file)
+        changed, hashes = changed_yaml_files(args.yaml_dir, manifest)
+        if args.record_only:
+            save_env_manifest(manifest_file, {**manifest, **hashes})
+            print(f"Recorded {len(hashes)} environment hashes in {manifest_file}")
+            sys.exit(0)
+        yaml_files = changed if args.changed_only else Path(args.yaml_dir).glob("*.yaml")
+        try:
+            jobs = yaml_jobs(yaml_files, conda=args.conda)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        if args.changed_only:
+            print(f"{len(jobs)} of {len(hashes)} environments changed since their last build")
+
+    results, wall_seconds = build_envs(jobs, workers=args.workers, log_dir=args.log_dir, retries=args.retries,
+                                       retry_delay=args.retry_delay, timeout=args.timeout,
+                                       pkgs_root=None if args.shared_pkgs else args.pkgs_root)
+    if args.source == "yamls":
+        # Failed builds keep their old hash, so the next run retries them
+        record_builds(manifest, jobs, results, hashes)
+        save_env_manifest(manifest_file, manifest)
+    summary = summarise(results, wall_seconds)
+    print_summary(summary)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(summary, f, indent=2)
+    sys.exit(1 if summary["failed"] else 0)
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import yaml
+
+from atomic_file import atomic_write
+from metrics import default_metrics
+
+try:
+    from yaml import CSafeLoader as SafeLoader  # libyaml-backed, several times faster
+except ImportError:
+    from yaml import SafeLoader
+
+DEFAULT_CACHE_PATH = os.path.expanduser("~/.cache/env_scan_cache.json")
+MIN_FILES_FOR_POOL = 8  # Below this, starting worker processes costs more than it saves
+
+def parse_dependency(dep):
+    """Split a conda spec like "samtools=1.17=h00cdaf9_0" into (name, version or None)."""
+    dep_parts = dep.split('=')
+    return dep_parts[0], dep_parts[1] if len(dep_parts) > 1 else None
+
+def parse_pip_dependency(dep):
+    """Split a pip requirement like "numpy==1.26.4" into (name, version or None)."""
+    name, _, version = dep.partition("==")
+    return name.split("=")[0].strip(), version.strip() or None
+
+def parse_env_file(yaml_file):
+    """
+    Return the dependencies of one exported environment as [name, version, source]
+    lists, where source is "conda" or "pip" (from a nested pip: section).
+    """
+    return _parse_env(yaml_file)["dependencies"]
+
+def _parse_env(yaml_file):
+    """The channels (in priority order) and dependencies of one exported environment."""
+    with open(yaml_file) as f:
+        environment = yaml.load(f, Loader=SafeLoader) or {}
+
+    parsed = []
+    for dep in environment.get('dependencies') or []:
+        if isinstance(dep, str):
+            parsed.append([*parse_dependency(dep), "conda"])
+        elif isinstance(dep, dict):
+            for pip_dep in dep.get("pip") or []:
+                parsed.append([*parse_pip_dependency(pip_dep), "pip"])
+    return {"channels": [str(channel) for channel in environment.get("channels") or []], "dependencies": parsed}
+
+def _file_key(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+def load_scan_cache(cache_path):
+    try:
+        with open(cache_path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_scan_cache(cache_path, cache):
+    os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+    with atomic_write(cache_path) as f:
+        json.dump(cache, f)
+
+def _scan_env_entries(env_dir, workers=None, cache_path=None):
+    """
+    Parse every *.yaml in env_dir and return {file name: {"channels": [...], "dependencies": [...]}}.
+
+    Parsed entries are cached (by default in ~/.cache/env_scan_cache.json, or
+    $ENV_SCAN_CACHE) keyed by each file's mtime and size, so only new or
+    changed files are read again; those are parsed in a process pool.
+    Entries for files since deleted from env_dir are dropped from the cache.
+    """
+    cache_path = cache_path or os.environ.get("ENV_SCAN_CACHE", DEFAULT_CACHE_PATH)
+    cache = load_scan_cache(cache_path)
+
+    env_dir = os.path.abspath(env_dir)
+    files, stale = {}, {}
+    for yaml_file in sorted(os.listdir(env_dir)):
+        if yaml_file.endswith(".yaml"):
+            path = os.path.join(env_dir, yaml_file)
+            files[yaml_file] = path
+            # Taken before parsing: a file rewritten mid-parse then keeps an old key and is read again next run
+            key = _file_key(path)
+            entry = cache.get(path)
+            if entry is None or entry["key"] != key or "channels" not in entry:
+                stale[path] = key
+
+    # Forget files deleted from this directory (or from anywhere) since the last scan
+    current = set(files.values())
+    removed = [path for path in cache
+               if path not in current and (os.path.dirname(path) == env_dir or not os.path.exists(path))]
+    for path in removed:
+        del cache[path]
+
+    if stale:
+        print(f"Parsing {len(stale)} of {len(files)} environment files...")
+        if len(stale) >= MIN_FILES_FOR_POOL and workers != 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parsed = list(pool.map(_parse_env, stale, chunksize=4))
+        else:
+            parsed = [_parse_env(path) for path in stale]
+        for (path, key), environment in zip(stale.items(), parsed):
+            cache[path] = {"key": key, **environment}
+    if stale or removed:
+        save_scan_cache(cache_path, cache)
+
+    default_metrics().inc("cache_lookups_total", len(files) - len(stale), cache="env_scan", result="hit")
+    default_metrics().inc("cache_lookups_total", len(stale), cache="env_scan", result="miss")
+    return {yaml_file: cache[path] for yaml_file, path in files.items()}
+
+def scan_env_dir(env_dir, workers=None, cache_path=None):
+    """
+    Parse every *.yaml in env_dir and return {file name: [[name, version, source], ...]},
+    through the same cache as env_hashes.
+    """
+    return {yaml_file: entry["dependencies"]
+            for yaml_file, entry in _scan_env_entries(env_dir, workers, cache_path).items()}
+
+def build_dependency_index(env_dir, include_pip=False, workers=None, cache_path=None):
+    """
+    Inverted index of the environments in env_dir: package -> {env file: pinned version}.
+    The version is None where an environment lists a package without a pin.
+    """
+    index = {}
+    for yaml_file, dependencies in scan_env_dir(env_dir, workers, cache_path).items():
+        for name, version, source in dependencies:
+            if source == "conda" or include_pip:
+                index.setdefault(name, {})[yaml_file] = version
+    return index
+
+def dependency_hash(dependencies, channels=()):
+    """
+    Content hash of an environment's dependency set, independent of the
+    order the YAML lists it in, so only a real change of pins moves it.
+    Channels are hashed in order, since their order sets solver priority.
+    """
+    digest = hashlib.sha256()
+    if channels:
+        digest.update(json.dumps(["channels", *channels]).encode())
+        digest.update(b"\n")
+    for entry in sorted(json.dumps(list(dep)) for dep in dependencies):
+        digest.update(entry.encode())
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+def env_hashes(env_dir, workers=None, cache_path=None):
+    """Return {env file: dependency_hash} for every *.yaml in env_dir."""
+    return {yaml_file: dependency_hash(entry["dependencies"], entry["channels"])
+            for yaml_file, entry in _scan_env_entries(env_dir, workers, cache_path).items()}
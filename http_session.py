@@ -0,0 +1,20 @@
+import requests
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
+
+from metrics import instrument_session
+
+def setup_session(pool_size=10, metrics=None):
+    session = requests.Session()
+    retries = Retry(
+        total=5, 
+        backoff_factor=2,  # Gradual backoff
+        status_forcelist=[429, 524, 502, 503, 504], 
+        allowed_methods=["GET"]
+    )
+    # Size the connection pool so concurrent fetchers don't discard connections
+    adapter = HTTPAdapter(max_retries=retries, pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    # Latency, status, retry and byte counts of every request (metrics.default_metrics by default)
+    return instrument_session(session, metrics)
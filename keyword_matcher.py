@@ -0,0 +1,104 @@
+import re
+from functools import lru_cache
+
+def normalise_keywords(keywords):
+    """
+    Lowercase, strip and deduplicate keywords, keeping first-seen order.
+    """
+    seen = {}
+    for keyword in keywords:
+        keyword = str(keyword).strip().lower()
+        if keyword:
+            seen.setdefault(keyword, None)
+    return tuple(seen)
+
+def _trie_pattern(keywords):
+    """
+    Build a regex from a character trie of the keywords, so shared prefixes
+    are tested once per text position instead of once per keyword. Optional
+    tails are greedy, so a match is always the longest keyword at its start.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node):
+        terminal = "" in node
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if terminal else body
+
+    return render(trie)
+
+class KeywordMatcher:
+    """
+    Substring matcher for a fixed keyword set, compiled once into a single
+    trie-shaped regex. Matching is case-insensitive and equivalent to
+    `any(keyword in text.lower() for keyword in keywords)`.
+    """
+    def __init__(self, keywords):
+        self.keywords = normalise_keywords(keywords)
+        pattern = _trie_pattern(self.keywords)
+        # Compiled pattern (None for an empty set), also usable with pandas .str.contains
+        self.pattern = re.compile(pattern) if self.keywords else None
+        self._pattern = self.pattern
+        self._scanner = re.compile(f"(?=({pattern}))") if self.keywords else None
+        # Every keyword that occurs inside another one, so overlapping hits aren't lost
+        self._contained = {
+            keyword: frozenset(other for other in self.keywords if other in keyword)
+            for keyword in self.keywords
+        }
+
+    def search(self, text):
+        """Return True if any keyword occurs in text."""
+        return self._search_lower(str(text).lower())
+
+    def matches(self, text):
+        """Return the set of every keyword that occurs in text."""
+        return self._matches_lower(str(text).lower())
+
+    def _search_lower(self, text):
+        return self._pattern is not None and self._pattern.search(text) is not None
+
+    def _matches_lower(self, text):
+        found = set()
+        if self._scanner is not None:
+            for match in self._scanner.finditer(text):
+                found |= self._contained[match.group(1)]
+        return found
+
+class KeywordFilter:
+    """
+    Inclusion/exclusion keyword filter: text is kept when it contains at
+    least one inclusion keyword and no exclusion keyword.
+    """
+    def __init__(self, keywords, exclusion_keywords):
+        self.include = KeywordMatcher(keywords)
+        self.exclude = KeywordMatcher(exclusion_keywords)
+
+    def keep(self, text):
+        text = str(text).lower()
+        return self.include._search_lower(text) and not self.exclude._search_lower(text)
+
+    def explain(self, text):
+        """
+        Return (matched inclusion keywords, matched exclusion keywords) for text.
+        """
+        text = str(text).lower()
+        return self.include._matches_lower(text), self.exclude._matches_lower(text)
+
+@lru_cache(maxsize=32)
+def _compiled_filter(keywords, exclusion_keywords):
+    return KeywordFilter(keywords, exclusion_keywords)
+
+def get_filter(keywords, exclusion_keywords):
+    """
+    Return a compiled KeywordFilter for the given lists, building it only the
+    first time a given pair of keyword lists is seen.
+    """
+    return _compiled_filter(tuple(keywords), tuple(exclusion_keywords))
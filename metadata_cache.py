@@ -0,0 +1,177 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from functools import lru_cache
+
+from metrics import default_metrics
+
+DEFAULT_CACHE_PATH = os.path.expanduser("~/.cache/bioconda_metadata.sqlite")
+DEFAULT_TTL = 24 * 3600           # Seconds before a positive lookup is re-checked
+DEFAULT_NEGATIVE_TTL = 7 * 24 * 3600  # Seconds before "not on bioconda" is re-checked
+DEFAULT_MAX_ENTRIES = 20000
+
+# Membership checks; each answers a different question, so each is cached separately
+ANACONDA_PAGE = "anaconda_page"  # anaconda.org/bioconda/<name> lists it (check_dependencies)
+RECIPE_PAGE = "recipe_page"      # bioconda.github.io has a recipe README for it (append_new)
+ANACONDA_API = "anaconda_api"    # api.anaconda.org/package/bioconda/<name> knows it (append_new)
+
+CachedVersion = namedtuple("CachedVersion", ["version", "etag", "fresh"])
+
+class MetadataCache:
+    """
+    Persistent cache of Bioconda package metadata shared by check_dependencies.py
+    and append_new.py, stored in SQLite so it survives between pipeline runs.
+
+    Membership answers (including negative ones) are keyed by package and by
+    the check that produced them (ANACONDA_PAGE, RECIPE_PAGE, ANACONDA_API),
+    since the checks do not agree on every package. Each package's latest
+    version is stored with the ETag it was served with. Lookups older than
+    the TTL are reported as misses (a stale version still exposes its ETag
+    for revalidation), and the least recently used rows of each table are
+    evicted beyond `max_entries`. Safe to share between threads. `clock`
+    (seconds, time.time by default) dates every entry and lookup.
+    """
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, negative_ttl=DEFAULT_NEGATIVE_TTL,
+                 max_entries=DEFAULT_MAX_ENTRIES, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self.lock, self.conn:
+            if path != ":memory:":
+                self.conn.execute("PRAGMA journal_mode=WAL")
+            # Caches created before memberships were split out keep unused
+            # on_bioconda/checked_at columns here; they are no longer read
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS packages (
+                    name TEXT PRIMARY KEY,
+                    latest_version TEXT,
+                    etag TEXT,
+                    version_checked_at REAL,
+                    last_used REAL NOT NULL
+                )""")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS packages_last_used ON packages (last_used)")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS memberships (
+                    name TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    on_bioconda INTEGER NOT NULL,
+                    checked_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (name, source)
+                )""")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS memberships_last_used ON memberships (last_used)")
+
+    def get_membership(self, name, source):
+        """
+        Return True/False if the `source` check's answer for name is cached
+        and fresh, else None.
+        """
+        with self.lock, self.conn:
+            row = self.conn.execute("SELECT on_bioconda, checked_at FROM memberships WHERE name = ? AND source = ?",
+                                    (name, source)).fetchone()
+            if row is not None:
+                self.conn.execute("UPDATE memberships SET last_used = ? WHERE name = ? AND source = ?",
+                                  (self.clock(), name, source))
+        if row is None:
+            _record_lookup("membership", "miss", source)
+            return None
+        on_bioconda, checked_at = bool(row[0]), row[1]
+        ttl = self.ttl if on_bioconda else self.negative_ttl
+        if self.clock() - checked_at >= ttl:
+            _record_lookup("membership", "stale", source)
+            return None
+        _record_lookup("membership", "hit", source)
+        return on_bioconda
+
+    def set_membership(self, name, source, on_bioconda):
+        now = self.clock()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO memberships (name, source, on_bioconda, checked_at, last_used) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(name, source) DO UPDATE SET on_bioconda = excluded.on_bioconda, "
+                "checked_at = excluded.checked_at, last_used = excluded.last_used",
+                (name, source, int(bool(on_bioconda)), now, now),
+            )
+            self._evict("memberships")
+
+    def get_version(self, name):
+        """
+        Return a CachedVersion for name, or None if no version was ever cached.
+        `fresh` is False once the entry is older than the TTL.
+        """
+        row = self._get(name, "latest_version, etag, version_checked_at")
+        if row is None or row[2] is None:
+            _record_lookup("version", "miss")
+            return None
+        cached = CachedVersion(row[0], row[1], self.clock() - row[2] < self.ttl)
+        _record_lookup("version", "hit" if cached.fresh else "stale")
+        return cached
+
+    def set_version(self, name, version, etag=None):
+        self._upsert(name, latest_version=version, etag=etag, version_checked_at=self.clock())
+        # A version from the API is also a positive answer from that check
+        self.set_membership(name, ANACONDA_API, True)
+
+    def touch_version(self, name):
+        """Mark a cached version as revalidated (e.g. after a 304 response)."""
+        self._upsert(name, version_checked_at=self.clock())
+
+    def clear(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM packages")
+            self.conn.execute("DELETE FROM memberships")
+
+    def _get(self, name, columns):
+        with self.lock, self.conn:
+            row = self.conn.execute(f"SELECT {columns} FROM packages WHERE name = ?", (name,)).fetchone()
+            if row is not None:
+                self.conn.execute("UPDATE packages SET last_used = ? WHERE name = ?", (self.clock(), name))
+            return row
+
+    def _upsert(self, name, **fields):
+        fields["last_used"] = self.clock()
+        columns = ", ".join(fields)
+        placeholders = ", ".join("?" for _ in fields)
+        updates = ", ".join(f"{column} = excluded.{column}" for column in fields)
+        with self.lock, self.conn:
+            self.conn.execute(
+                f"INSERT INTO packages (name, {columns}) VALUES (?, {placeholders}) "
+                f"ON CONFLICT(name) DO UPDATE SET {updates}",
+                (name, *fields.values()),
+            )
+            self._evict("packages")
+
+    def _evict(self, table):
+        # Drop least recently used rows once the table outgrows max_entries
+        count = self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        if count > self.max_entries:
+            self.conn.execute(
+                f"DELETE FROM {table} WHERE rowid IN "
+                f"(SELECT rowid FROM {table} ORDER BY last_used ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+def _record_lookup(kind, result, source=None):
+    labels = {"source": source} if source else {}
+    default_metrics().inc("cache_lookups_total", cache="metadata", kind=kind, result=result, **labels)
+
+@lru_cache(maxsize=None)
+def default_cache():
+    """
+    Process-wide cache instance. Location and TTLs can be overridden with the
+    BIOCONDA_METADATA_CACHE, BIOCONDA_CACHE_TTL and BIOCONDA_CACHE_NEGATIVE_TTL
+    environment variables (TTLs in seconds).
+    """
+    return MetadataCache(
+        path=os.environ.get("BIOCONDA_METADATA_CACHE", DEFAULT_CACHE_PATH),
+        ttl=float(os.environ.get("BIOCONDA_CACHE_TTL", DEFAULT_TTL)),
+        negative_ttl=float(os.environ.get("BIOCONDA_CACHE_NEGATIVE_TTL", DEFAULT_NEGATIVE_TTL)),
+    )
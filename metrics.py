@@ -0,0 +1,170 @@
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from urllib.parse import urlparse
+
+from atomic_file import atomic_write
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, math.inf)
+
+class Histogram:
+    """Fixed-bucket histogram of observed values, with count, sum and max."""
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile (an estimate)."""
+        if not self.count:
+            return None
+        target, seen = q * self.count, 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return bound if bound != math.inf else self.max
+        return self.max
+
+class Metrics:
+    """
+    Thread-safe registry of counters and histograms, each identified by a
+    name plus labels (e.g. host, status, stage). Exported at the end of a run
+    as JSON or in the Prometheus text format.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.started_at = time.time()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the duration of the with-block (seconds) into a histogram."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.started_at = time.time()
+
+    def to_dict(self):
+        with self.lock:
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self.counters.items())]
+            histograms = [{"name": name, "labels": dict(labels), "count": h.count, "sum": round(h.sum, 6),
+                           "mean": round(h.sum / h.count, 6) if h.count else None, "max": round(h.max, 6),
+                           "p50": h.quantile(0.5), "p95": h.quantile(0.95)}
+                          for (name, labels), h in sorted(self.histograms.items())]
+        return {"started_at": self.started_at, "elapsed_seconds": round(time.time() - self.started_at, 3),
+                "counters": counters, "histograms": histograms}
+
+    def to_prometheus(self):
+        lines = []
+        with self.lock:
+            typed = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{name}{_labels(labels)} {value}")
+            for (name, labels), h in sorted(self.histograms.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} histogram")
+                    typed.add(name)
+                cumulative = 0
+                for bound, count in zip(h.buckets, h.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == math.inf else repr(bound)
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {h.sum}")
+                lines.append(f"{name}_count{_labels(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, path):
+        """Write the metrics to path: Prometheus text for .prom/.txt, JSON otherwise."""
+        text = (self.to_prometheus() if str(path).endswith((".prom", ".txt"))
+                else json.dumps(self.to_dict(), indent=2))
+        with atomic_write(path) as f:
+            f.write(text)
+        print(f"Metrics written to {path}")
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+@lru_cache(maxsize=None)
+def default_metrics():
+    """Process-wide registry shared by the session, caches and pipeline stages."""
+    return Metrics()
+
+def instrument_session(session, metrics=None):
+    """
+    Record every request sent through a requests.Session: latency per host
+    (including the body download), status codes, retries taken by the
+    urllib3 Retry policy, bytes received and connection errors.
+
+    Requests sent with stream=True return before their body is read, so
+    they are left out of http_request_seconds (and the bytes counter)
+    rather than recorded as header-only latencies.
+    """
+    metrics = metrics or default_metrics()
+    send = session.send
+
+    def timed_send(request, **kwargs):
+        host = urlparse(request.url).hostname or ""
+        streamed = kwargs.get("stream")
+        start = time.perf_counter()
+        try:
+            response = send(request, **kwargs)
+        except Exception as e:
+            metrics.inc("http_errors_total", host=host, error=type(e).__name__)
+            raise
+        finally:
+            if not streamed:
+                metrics.observe("http_request_seconds", time.perf_counter() - start, host=host)
+
+        metrics.inc("http_requests_total", host=host, status=str(response.status_code))
+        retries = getattr(response.raw, "retries", None)
+        if retries is not None and retries.history:
+            metrics.inc("http_retries_total", len(retries.history), host=host)
+        if not streamed:
+            metrics.inc("http_response_bytes_total", len(response.content), host=host)
+        return response
+
+    session.send = timed_send
+    return session
@@ -0,0 +1,142 @@
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CATALOGUE_PATH = "bioconda_catalogue.sqlite"
+MIN_TRIGRAM_LENGTH = 3  # The trigram tokenizer cannot match shorter terms
+
+ROW_ORDER = "ORDER BY p.updated_date DESC, p.id ASC"  # Listing order: newest first, then crawl order
+
+class PackageCatalogue:
+    """
+    Local SQLite catalogue of every package row the crawler has scraped,
+    unfiltered, so keyword lists can be changed and re-applied offline.
+
+    Rows are keyed by package name (a re-crawl updates them in place) and
+    mirrored into an FTS5 trigram index over name and description, which
+    answers case-insensitive substring queries like the keyword filters do.
+    Without FTS5 support in the local SQLite, queries fall back to a scan.
+    Safe to share between threads.
+    """
+    def __init__(self, path=DEFAULT_CATALOGUE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self.lock, self.conn:
+            if path != ":memory:":
+                self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS packages (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL UNIQUE,
+                    description TEXT,
+                    updated_date TEXT,
+                    first_seen REAL NOT NULL,
+                    last_seen REAL NOT NULL
+                )""")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS packages_updated_date ON packages (updated_date)")
+            self.has_fts = self._create_fts()
+
+    def _create_fts(self):
+        try:
+            self.conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS packages_fts USING fts5(
+                    name, description, content='packages', content_rowid='id', tokenize='trigram'
+                )""")
+        except sqlite3.OperationalError as e:  # No FTS5, or SQLite older than 3.34
+            print(f"Full-text index unavailable ({e}); catalogue queries will scan")
+            return False
+        # Keep the external-content index in step with the packages table
+        self.conn.executescript("""
+            CREATE TRIGGER IF NOT EXISTS packages_fts_insert AFTER INSERT ON packages BEGIN
+                INSERT INTO packages_fts (rowid, name, description) VALUES (new.id, new.name, new.description);
+            END;
+            CREATE TRIGGER IF NOT EXISTS packages_fts_delete AFTER DELETE ON packages BEGIN
+                INSERT INTO packages_fts (packages_fts, rowid, name, description)
+                VALUES ('delete', old.id, old.name, old.description);
+            END;
+            CREATE TRIGGER IF NOT EXISTS packages_fts_update AFTER UPDATE OF name, description ON packages BEGIN
+                INSERT INTO packages_fts (packages_fts, rowid, name, description)
+                VALUES ('delete', old.id, old.name, old.description);
+                INSERT INTO packages_fts (rowid, name, description) VALUES (new.id, new.name, new.description);
+            END;
+        """)
+        return True
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM packages").fetchone()[0]
+
+    def add_rows(self, rows):
+        """
+        Insert or refresh (name, description, updated_date) rows from one
+        listing page in a single transaction. Returns the number of rows.
+        """
+        now = time.time()
+        params = [(name, description, updated_date, now, now) for name, description, updated_date in rows]
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO packages (name, description, updated_date, first_seen, last_seen) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT(name) DO UPDATE SET "
+                "description = excluded.description, updated_date = excluded.updated_date, "
+                "last_seen = excluded.last_seen",
+                params,
+            )
+        return len(params)
+
+    def rows(self):
+        """Every row as (name, description, updated_date), in listing order."""
+        return self._query(f"SELECT p.name, p.description, p.updated_date FROM packages p {ROW_ORDER}")
+
+    def match_rows(self, keywords, columns=("name", "description")):
+        """
+        Rows whose given columns contain any of the keywords (case-insensitive
+        substrings), in listing order. This only narrows the candidates: the
+        caller's own keyword filter still makes the final decision.
+        """
+        keywords = [str(k) for k in keywords if str(k).strip()]
+        if not keywords:
+            return []
+        if not self.has_fts or min(len(k) for k in keywords) < MIN_TRIGRAM_LENGTH:
+            return self.rows()
+        terms = " OR ".join('"{}"'.format(k.replace('"', '""')) for k in keywords)
+        query = f"{{{' '.join(columns)}}} : ({terms})"
+        return self._query(
+            "SELECT p.name, p.description, p.updated_date FROM packages_fts "
+            f"JOIN packages p ON p.id = packages_fts.rowid WHERE packages_fts MATCH ? {ROW_ORDER}",
+            (query,),
+        )
+
+    def search(self, query, limit=20):
+        """Run a raw FTS5 query, best matches (bm25) first."""
+        return self._query(
+            "SELECT p.name, p.description, p.updated_date FROM packages_fts "
+            "JOIN packages p ON p.id = packages_fts.rowid WHERE packages_fts MATCH ? "
+            "ORDER BY bm25(packages_fts) LIMIT ?",
+            (query, limit),
+        )
+
+    def _query(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query the local catalogue of scraped Bioconda packages.")
+    parser.add_argument("query", nargs="?", help="FTS5 query, e.g. '\"phylo\" OR \"k-mer\"'.")
+    parser.add_argument("--catalogue", type=str, default=DEFAULT_CATALOGUE_PATH, help="Catalogue database path.")
+    parser.add_argument("--limit", type=int, default=20, help="Maximum rows to print.")
+    args = parser.parse_args()
+
+    catalogue = PackageCatalogue(args.catalogue)
+    print(f"{len(catalogue)} packages in {args.catalogue}")
+    if args.query:
+        for name, description, updated_date in catalogue.search(args.query, args.limit):
+            print(f"{name}\t{description}\t{updated_date}")
@@ -0,0 +1,117 @@
+from html.parser import HTMLParser
+
+CHUNK_SIZE = 64 * 1024
+
+class PackageTableParser(HTMLParser):
+    """
+    Streaming parser for the package table on an anaconda.org repo listing.
+
+    Only the first <table> in the document is read and no DOM is built: each
+    <tr> after the header row becomes a (name, description, updated_date)
+    tuple taken from the link text of the first cell and the text of the
+    third and fourth cells, the same fields the BeautifulSoup path extracts.
+    """
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []
+        self.found_table = False
+        self.done = False
+        self._table_depth = 0
+        self._rows_seen = 0
+        self._cells = None
+        self._name = None
+        self._cell = None
+        self._link = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == "table":
+            self.found_table = True
+            self._table_depth += 1
+        elif not self._table_depth:
+            return
+        elif tag == "tr":
+            self._end_row()
+            self._rows_seen += 1
+            if self._rows_seen > 1:  # Skip header row
+                self._cells, self._name = [], None
+        elif tag == "td" and self._cells is not None:
+            self._end_cell()
+            self._cell = []
+        elif tag == "a" and self._cell is not None and not self._cells and self._name is None:
+            self._link = []
+
+    def handle_endtag(self, tag):
+        if self.done or not self._table_depth:
+            return
+        if tag == "a" and self._link is not None:
+            self._name = "".join(self._link)
+            self._link = None
+        elif tag == "td":
+            self._end_cell()
+        elif tag == "tr":
+            self._end_row()
+        elif tag == "table":
+            self._table_depth -= 1
+            if not self._table_depth:
+                self._end_row()
+                self.done = True
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+        if self._link is not None:
+            self._link.append(data)
+
+    def _end_cell(self):
+        if self._cell is not None:
+            if self._link is not None:
+                self._name = "".join(self._link)
+                self._link = None
+            self._cells.append("".join(self._cell))
+            self._cell = None
+
+    def _end_row(self):
+        if self._cells is None:
+            return
+        self._end_cell()
+        cells, name = self._cells, self._name
+        self._cells = None
+        # Same rule as the DOM path: need four cells and a package link
+        if len(cells) >= 4 and name is not None:
+            self.rows.append((name.strip(), cells[2].strip(), cells[3].strip()))
+
+def iter_package_rows(content, encoding="utf-8"):
+    """
+    Yield (name, description, updated_date) tuples from a listing page.
+
+    Args:
+        content (bytes or str): Raw response body or decoded HTML
+        encoding (str): Encoding used when content is bytes
+    """
+    parser = PackageTableParser()
+    yield from _feed(parser, content, encoding)
+
+def extract_package_rows(content, encoding="utf-8"):
+    """
+    Return the listing rows as a list, or None if the page has no table.
+    """
+    parser = PackageTableParser()
+    rows = list(_feed(parser, content, encoding))
+    return rows if parser.found_table else None
+
+def _feed(parser, content, encoding):
+    if isinstance(content, bytes):
+        content = content.decode(encoding or "utf-8", errors="replace")
+    # Feed in chunks so nothing after the package table is ever parsed
+    for start in range(0, len(content), CHUNK_SIZE):
+        parser.feed(content[start:start + CHUNK_SIZE])
+        yield from parser.rows
+        parser.rows.clear()
+        if parser.done:
+            return
+    parser.close()
+    parser._end_row()
+    yield from parser.rows
+    parser.rows.clear()
@@ -0,0 +1,115 @@
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import torch
+
+def model_identity(model, model_path):
+    """
+    Identify the weights a log-prob matrix came from: the model path plus
+    the hub revision (commit hash) when transformers recorded one.
+    """
+    revision = getattr(getattr(model, "config", None), "_commit_hash", None)
+    return f"{model_path}@{revision}" if revision else str(model_path)
+
+class LogitsCache:
+    """
+    Content-addressed disk cache of per-sequence log-softmax matrices.
+
+    Entries are .npy files named by sha256(model identity, variant, sequence),
+    so re-scoring a wild type with another mutant list, output format or after
+    a crash is a file read instead of a forward pass. float32 entries are
+    returned as CPU tensors backed by a copy-on-write memory map, so only the
+    pages a caller touches are read; float16 entries (half the size on disk)
+    are converted to float32 in memory. The least recently used entries are
+    deleted once the cache exceeds `max_bytes`.
+
+    One instance may be shared by threads (the pipelined loop looks entries
+    up in its prefetch thread and stores them from the main thread); the
+    counters, size accounting and eviction run under a lock. A lookup is not
+    a reservation: a sequence that repeats in the next batch is looked up
+    before this batch stores it, so it is scored twice and stored twice.
+    """
+    def __init__(self, cache_dir, model_id, max_bytes=10 * 1024 ** 3, float16=False):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.model_id = model_id
+        self.max_bytes = max_bytes
+        self.float16 = float16
+        self.hits = 0
+        self.misses = 0
+        self._total_bytes = sum(p.stat().st_size for p in self.cache_dir.glob("*.npy"))
+        self._lock = threading.Lock()
+
+    def key(self, sequence, variant=""):
+        digest = hashlib.sha256()
+        for part in (self.model_id, variant, sequence):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def path(self, sequence, variant=""):
+        return self.cache_dir / f"{self.key(sequence, variant)}.npy"
+
+    def get(self, sequence, device=None, variant=""):
+        """Return the cached (L, vocab) float32 tensor for sequence, or None."""
+        path = self.path(sequence, variant)
+        with self._lock:
+            try:
+                # Copy-on-write, so a caller writing into the tensor never touches the file
+                matrix = np.load(path, mmap_mode="c")
+            except (FileNotFoundError, ValueError):
+                self.misses += 1
+                return None
+            try:
+                os.utime(path)  # Mark as recently used for LRU eviction
+            except FileNotFoundError:
+                pass  # Evicted by another process since the load; the mapping stays readable
+            self.hits += 1
+        if matrix.dtype != np.float32:
+            matrix = matrix.astype(np.float32)
+        log_probs = torch.from_numpy(matrix)
+        return log_probs.to(device) if device is not None else log_probs
+
+    def put(self, sequence, log_probs, variant=""):
+        path = self.path(sequence, variant)
+        matrix = log_probs.detach().float().cpu().numpy()
+        if self.float16:
+            matrix = matrix.astype(np.float16)
+        # Write-then-rename so concurrent readers never see a partial file
+        tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, matrix)
+        with self._lock:
+            try:
+                previous = path.stat().st_size
+            except FileNotFoundError:
+                previous = 0
+            os.replace(tmp_path, path)
+            self._total_bytes += os.stat(path).st_size - previous
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits max_bytes."""
+        with self._lock:
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        for p in self.cache_dir.glob("*.npy"):
+            try:
+                stat = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, p))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, p in entries:
+            if total <= self.max_bytes:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
+        self._total_bytes = total
@@ -0,0 +1,91 @@
+import json
+import time
+
+import pandas as pd
+import torch
+
+from prime_mutant_scoring import (CPU_MODES, compute_log_probs_for_records, configure_threads, inference_context,
+                                  iter_records, make_batches, prepare_model, saturation_matrix, saturation_table)
+
+def score_mode(records, model, tokenizer, device, mode, batch_size=8, max_tokens=None):
+    """
+    Score records under one CPU mode.
+    Returns (seconds, {(stem, record_id): predict_score Series}).
+    """
+    scores = {}
+    start = time.perf_counter()
+    with inference_context(mode, device):
+        for batch in make_batches(iter(records), batch_size, max_tokens):
+            log_probs = compute_log_probs_for_records(batch, model, tokenizer, device)
+            for record, record_log_probs in zip(batch, log_probs):
+                table = saturation_table(saturation_matrix(record_log_probs, record.sequence, tokenizer), record.sequence)
+                scores[(record.stem, record.record_id)] = table["predict_score"]
+    return time.perf_counter() - start, scores
+
+def compare_modes(records, model, tokenizer, device, modes=CPU_MODES, compile_model=False, batch_size=8,
+                  max_tokens=None):
+    """
+    Score held-out records in float32 and in each of `modes`, and report the
+    time per mode and the Spearman correlation of every record's mutant
+    scores against float32 (mean and worst record).
+    """
+    records = list(records)
+    reference_time, reference = score_mode(records, prepare_model(model, device, "fp32"), tokenizer, device,
+                                           "fp32", batch_size, max_tokens)
+    results = []
+    for mode in modes:
+        if mode == "fp32" and not compile_model:
+            elapsed, scores = reference_time, reference
+        else:
+            mode_model = prepare_model(model, device, mode, compile_model)
+            elapsed, scores = score_mode(records, mode_model, tokenizer, device, mode, batch_size, max_tokens)
+        rho = pd.Series({key: reference[key].corr(scores[key], method="spearman") for key in reference})
+        results.append({
+            "mode": mode,
+            "compiled": compile_model,
+            "seconds": round(elapsed, 3),
+            "sequences_per_second": round(len(records) / max(elapsed, 1e-9), 3),
+            "speedup": round(reference_time / max(elapsed, 1e-9), 3),
+            "mean_spearman": float(rho.mean()),
+            "min_spearman": float(rho.min()),
+        })
+    return results
+
+def print_results(results, n_records):
+    print(f"Held-out records: {n_records}")
+    for row in results:
+        name = row["mode"] + (" +compile" if row["compiled"] else "")
+        print(f"{name:>14}: {row['seconds']:.2f}s ({row['sequences_per_second']:.2f} seq/s, "
+              f"{row['speedup']:.2f}x), Spearman vs fp32 mean {row['mean_spearman']:.4f} "
+              f"min {row['min_spearman']:.4f}")
+
+if __name__ == "__main__":
+    import argparse
+
+    from transformers import AutoModel, AutoTokenizer
+
+    parser = argparse.ArgumentParser(description="Compare PRIME CPU modes for speed and ranking drift against float32.")
+    parser.add_argument("--sequence_folder", type=str, required=True, help="Folder of held-out FASTA files.")
+    parser.add_argument("--model_path", type=str, default="AI4Protein/Prime_690M", help="Path or hub id of the model.")
+    parser.add_argument("--modes", nargs="+", choices=CPU_MODES, default=list(CPU_MODES), help="Modes to compare.")
+    parser.add_argument("--compile", action="store_true", help="Also wrap each mode in torch.compile.")
+    parser.add_argument("--threads", type=int, default=None, help="Intra-op CPU threads for torch.")
+    parser.add_argument("--interop_threads", type=int, default=None, help="Inter-op CPU threads for torch.")
+    parser.add_argument("--batch_size", type=int, default=8, help="Records per forward pass.")
+    parser.add_argument("--max_tokens", type=int, default=None, help="Cap on padded tokens per batch.")
+    parser.add_argument("--report", type=str, default=None, help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    configure_threads(args.threads, args.interop_threads)
+    device = torch.device("cpu")
+    model = AutoModel.from_pretrained(args.model_path, trust_remote_code=True)
+    tokenizer = AutoTokenizer.from_pretrained(args.model_path, trust_remote_code=True)
+    records = list(iter_records(args.sequence_folder))
+
+    results = compare_modes(records, model, tokenizer, device, modes=args.modes, compile_model=args.compile,
+                            batch_size=args.batch_size, max_tokens=args.max_tokens)
+    print_results(results, len(records))
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump({"model_path": args.model_path, "threads": torch.get_num_threads(),
+                       "records": len(records), "results": results}, f, indent=2)
@@ -1,9 +1,29 @@
+import contextlib
+import queue
+import re
+import threading
+import time
+from collections import namedtuple
+
 import torch
 from transformers import AutoTokenizer, AutoModel
 import pandas as pd
 from Bio import SeqIO
 from pathlib import Path
 
+from logits_cache import LogitsCache, model_identity
+from saturation_io import AMINO_ACIDS, OUTPUT_FORMATS, long_table, output_suffix, write_scores
+
+# One FASTA record to score: source file stem, position in that file, id, sequence
+Record = namedtuple("Record", ["stem", "index", "record_id", "sequence"])
+
+# Fast tokenizers must not be called from two threads at once (the pipelined
+# loop tokenises ahead in a prefetch thread), so every call goes through this
+_TOKENIZER_LOCK = threading.Lock()
+
+# End-of-stream marker on the pipelined scoring queues
+_DONE = object()
+
 def read_seq(seq_file):
     """
     Read the first sequence from a FASTA file.
@@ -11,76 +31,610 @@ def read_seq(seq_file):
     for record in SeqIO.parse(seq_file, "fasta"):
         return str(record.seq)
 
+def read_records(seq_file):
+    """
+    Yield a Record for every sequence in a FASTA file.
+    """
+    stem = Path(seq_file).stem
+    for index, record in enumerate(SeqIO.parse(seq_file, "fasta")):
+        yield Record(stem, index, record.id, str(record.seq))
+
+def iter_records(sequence_folder, failed_files=None):
+    """
+    Stream the records of every FASTA file in a folder, file by file.
+    A file that cannot be parsed is reported, appended to `failed_files`
+    (if given) as (path, error), and skipped; the next file is still read.
+    Records yielded before the error in that file are still scored.
+    """
+    for fasta_file in sorted(Path(sequence_folder).glob("*.fasta")):
+        try:
+            yield from read_records(fasta_file)
+        except Exception as e:
+            print(f"Error reading {fasta_file.name}: {e}")
+            if failed_files is not None:
+                failed_files.append((fasta_file, e))
+
+def record_output_name(record, suffix="_auto.csv"):
+    """
+    Output file name for a record: the first record of a file keeps the
+    historical "<stem>_auto.csv", later ones add their position in the file
+    and their (sanitised) id, "<stem>_<index>_<id>_auto.csv", so ids that
+    sanitise to the same string still get their own file.
+    """
+    if record.index == 0:
+        return f"{record.stem}{suffix}"
+    record_id = re.sub(r"[^A-Za-z0-9_.-]", "_", record.record_id)
+    return f"{record.stem}_{record.index}_{record_id}{suffix}"
+
+def claim_output_name(claimed, record, suffix):
+    """
+    record_output_name, refusing a name that another record of the same run
+    already took (still possible across files, e.g. record 1 "x" of "a.fasta"
+    against the first record of "a_1_x.fasta"). `claimed` maps names to
+    (stem, index) and is updated; raises ValueError on a collision.
+    """
+    name = record_output_name(record, suffix)
+    owner = claimed.setdefault(name, (record.stem, record.index))
+    if owner != (record.stem, record.index):
+        raise ValueError(f"output {name} is already taken by record {owner[1]} of {owner[0]}")
+    return name
+
+def make_batches(records, batch_size=8, max_tokens=None, sort_window=64):
+    """
+    Group a stream of records into batches of similar length to keep padding low.
+
+    Records are buffered `sort_window * batch_size` at a time and sorted by
+    length, then cut into batches of at most `batch_size` sequences and, if
+    given, at most `max_tokens` padded tokens (a longer single sequence still
+    gets a batch of its own).
+    """
+    pool = []
+    for record in records:
+        pool.append(record)
+        if len(pool) >= sort_window * batch_size:
+            yield from _length_buckets(pool, batch_size, max_tokens)
+            pool = []
+    yield from _length_buckets(pool, batch_size, max_tokens)
+
+def _length_buckets(pool, batch_size, max_tokens):
+    batch = []
+    for record in sorted(pool, key=lambda r: len(r.sequence)):
+        # Sorted ascending, so this record sets the padded length (+2 special tokens)
+        padded_tokens = (len(record.sequence) + 2) * (len(batch) + 1)
+        if batch and (len(batch) >= batch_size or (max_tokens and padded_tokens > max_tokens)):
+            yield batch
+            batch = []
+        batch.append(record)
+    if batch:
+        yield batch
+
+# CPU execution modes accepted by load_model / inference_context
+CPU_MODES = ("fp32", "bf16", "int8")
+
 def generate_mutants(sequence):
     """
     Generate all possible single-point mutants for a given sequence.
     """
-    amino_acids = "ACDEFGHIKLMNPQRSTVWY"  # All possible amino acids
     mutants = []
     for i, wt in enumerate(sequence):
-        for mt in amino_acids:
+        for mt in AMINO_ACIDS:
             if wt != mt:  # Exclude the wild-type residue
                 mutants.append(f"{wt}{i+1}{mt}")
     return mutants
 
+def tokenize(sequence, tokenizer, device):
+    """
+    Tokenise one sequence; returns (input_ids, attention_mask) on device.
+    """
+    with _TOKENIZER_LOCK:
+        tokenized_results = tokenizer(sequence, return_tensors="pt")
+    return tokenized_results.input_ids.to(device), tokenized_results.attention_mask.to(device)
+
+@torch.no_grad()
+def forward_log_probs(input_ids, attention_mask, model):
+    """
+    Forward pass over one tokenised sequence; returns per-residue log-probabilities, shape (L, vocab).
+    """
+    # Drop the special tokens added around the sequence
+    # float() keeps the softmax in float32 when running under bfloat16 autocast
+    return model(input_ids, attention_mask=attention_mask).logits[0, 1:-1, :].float().log_softmax(dim=-1)
+
+@torch.no_grad()
+def compute_log_probs(sequence, model, tokenizer, device):
+    """
+    Run one forward pass and return per-residue log-probabilities, shape (L, vocab).
+    """
+    input_ids, attention_mask = tokenize(sequence, tokenizer, device)
+    return forward_log_probs(input_ids, attention_mask, model)
+
 @torch.no_grad()
-def score_auto(fasta, model, tokenizer, device):
+def compute_log_probs_batch(sequences, model, tokenizer, device):
+    """
+    Run one padded forward pass over several sequences and return a list of
+    per-residue log-probability tensors, shape (L_i, vocab), one per sequence.
+    """
+    input_ids, attention_mask = tokenize_batch(sequences, tokenizer)
+    return forward_log_probs_batch(input_ids, attention_mask, model, device)
+
+def tokenize_batch(sequences, tokenizer):
+    """
+    Tokenise several sequences into padded (input_ids, attention_mask) CPU tensors.
+    """
+    with _TOKENIZER_LOCK:
+        tokenized_results = tokenizer(list(sequences), return_tensors="pt", padding=True)
+    return tokenized_results.input_ids, tokenized_results.attention_mask
+
+@torch.no_grad()
+def forward_log_probs_batch(input_ids, attention_mask, model, device):
+    """
+    One padded forward pass over tokenised sequences; returns a list of
+    per-residue log-probability tensors, shape (L_i, vocab), one per sequence.
+    """
+    input_ids = input_ids.to(device)
+    attention_mask = attention_mask.to(device)
+
+    log_probs = model(input_ids, attention_mask=attention_mask).logits.float().log_softmax(dim=-1)
+    results = []
+    for i in range(len(input_ids)):
+        # Real token positions minus the special tokens at either end
+        positions = attention_mask[i].nonzero(as_tuple=True)[0][1:-1]
+        results.append(log_probs[i, positions])
+    return results
+
+def resolve_stride(window, stride=None):
+    """
+    Stride between window starts: `stride`, or window // 2 when it is None.
+    Raises ValueError unless 0 < stride <= window; a larger stride would
+    leave residues between windows that no window covers.
+    """
+    if window < 1:
+        raise ValueError(f"window must be at least 1 residue, got {window}")
+    stride = max(1, window // 2) if stride is None else stride
+    if not 0 < stride <= window:
+        raise ValueError(f"stride must be between 1 and the window ({window}), got {stride}")
+    return stride
+
+def window_starts(length, window, stride):
+    """
+    Start offsets of windows of size `window` every `stride` residues, with a
+    final window flush against the end so every residue is covered.
+    """
+    stride = resolve_stride(window, stride)
+    starts = list(range(0, length - window + 1, stride))
+    if starts[-1] + window < length:
+        starts.append(length - window)
+    return starts
+
+@torch.no_grad()
+def compute_log_probs_windowed(sequence, model, tokenizer, device, window=1022, stride=None,
+                               mode="center", window_batch_size=4):
+    """
+    Per-residue log-probabilities for sequences longer than the model context.
+
+    The sequence is scored in overlapping windows of `window` residues every
+    `stride` residues (default window // 2), `window_batch_size` windows per
+    forward pass, so peak memory depends on the window, not the protein.
+    With mode="center" each residue takes its values from the window whose
+    centre is closest to it; mode="mean" averages all windows covering it.
+    Sequences that fit in one window go through compute_log_probs unchanged.
+    """
+    stride = resolve_stride(window, stride)
+    if mode not in ("center", "mean"):
+        raise ValueError(f"Unknown window mode: {mode}")
+    length = len(sequence)
+    if length <= window:
+        return compute_log_probs(sequence, model, tokenizer, device)
+
+    starts = window_starts(length, window, stride)
+    positions = torch.arange(length, device=device)
+    combined, weight = None, None
+    for first in range(0, len(starts), window_batch_size):
+        batch_starts = starts[first:first + window_batch_size]
+        window_log_probs = compute_log_probs_batch(
+            [sequence[start:start + window] for start in batch_starts], model, tokenizer, device)
+        for start, log_probs in zip(batch_starts, window_log_probs):
+            if combined is None:
+                combined = torch.zeros(length, log_probs.shape[-1], dtype=log_probs.dtype, device=device)
+                weight = torch.full((length,), float("inf") if mode == "center" else 0.0, device=device)
+            span = slice(start, start + window)
+            if mode == "mean":
+                combined[span] += log_probs
+                weight[span] += 1
+            else:
+                # Distance from each residue to this window's centre; keep the closest window
+                distance = (positions[span] - (start + (window - 1) / 2)).abs()
+                closer = distance < weight[span]
+                combined[span][closer] = log_probs[closer]
+                weight[span] = torch.where(closer, distance, weight[span])
+
+    return combined / weight.unsqueeze(1) if mode == "mean" else combined
+
+# A batch made ready for the model: cached results filled in, the remaining
+# records that fit one forward pass (`short`, indices) tokenised as `tokens`
+PreparedBatch = namedtuple("PreparedBatch", ["records", "results", "short", "tokens"])
+
+def _cache_variant(sequence, window, stride, window_mode):
+    # Windowed matrices differ from full-sequence ones, so they are cached separately
+    if window is None or len(sequence) <= window:
+        return ""
+    return f"window={window},stride={resolve_stride(window, stride)},mode={window_mode}"
+
+def prepare_batch(records, tokenizer, device=None, window=None, stride=None, window_mode="center", cache=None):
+    """
+    CPU side of compute_log_probs_for_records: cache lookups and tokenisation
+    of the records that fit in `window`. Needs no model, so it can run ahead
+    in another thread.
+    """
+    results = [None] * len(records)
+    if cache is not None:
+        for i, record in enumerate(records):
+            results[i] = cache.get(record.sequence, device,
+                                   _cache_variant(record.sequence, window, stride, window_mode))
+    short = [i for i in range(len(records))
+             if results[i] is None and (window is None or len(records[i].sequence) <= window)]
+    tokens = tokenize_batch([records[i].sequence for i in short], tokenizer) if short else None
+    return PreparedBatch(records, results, short, tokens)
+
+def run_batch(prepared, model, tokenizer, device, window=None, stride=None, window_mode="center", cache=None):
+    """
+    Model side of compute_log_probs_for_records: one padded forward pass for
+    the tokenised records, window by window scoring for longer ones, and
+    cache writes for everything computed. Returns the list of log-probs.
+    """
+    records, results = prepared.records, list(prepared.results)
+    pending = [i for i in range(len(records)) if results[i] is None]
+    if prepared.short:
+        batch_log_probs = forward_log_probs_batch(*prepared.tokens, model, device)
+        for i, log_probs in zip(prepared.short, batch_log_probs):
+            results[i] = log_probs
+    for i in pending:
+        if results[i] is None:
+            results[i] = compute_log_probs_windowed(records[i].sequence, model, tokenizer, device,
+                                                    window=window, stride=stride, mode=window_mode)
+
+    if cache is not None:
+        for i in pending:
+            cache.put(records[i].sequence, results[i],
+                      _cache_variant(records[i].sequence, window, stride, window_mode))
+    return results
+
+def compute_log_probs_for_records(records, model, tokenizer, device, window=None, stride=None,
+                                  window_mode="center", cache=None):
+    """
+    Log-probabilities for a batch of records: records that fit in `window`
+    share one padded forward pass, longer ones are scored window by window.
+    With a LogitsCache, cached sequences skip the model and new results are stored.
+    """
+    prepared = prepare_batch(records, tokenizer, device, window=window, stride=stride,
+                             window_mode=window_mode, cache=cache)
+    return run_batch(prepared, model, tokenizer, device, window=window, stride=stride,
+                     window_mode=window_mode, cache=cache)
+
+def get_log_probs(sequence, model, tokenizer, device, window=None, stride=None, window_mode="center", cache=None):
+    """
+    Log-probabilities for one sequence, through the cache and windowing if configured.
+    """
+    record = Record(None, 0, None, sequence)
+    return compute_log_probs_for_records([record], model, tokenizer, device, window=window, stride=stride,
+                                         window_mode=window_mode, cache=cache)[0]
+
+def token_ids(residues, tokenizer, device=None):
+    """
+    Map residue letters to token ids with a single vocab lookup.
+    """
+    vocab = tokenizer.get_vocab()
+    return torch.tensor([vocab[r] for r in residues], dtype=torch.long, device=device)
+
+def saturation_matrix(log_probs, sequence, tokenizer):
+    """
+    Score every substitution at once: returns an (L, 20) tensor whose column j
+    holds log p(AMINO_ACIDS[j]) - log p(wild type) at each position.
+    """
+    aa_ids = token_ids(AMINO_ACIDS, tokenizer, log_probs.device)
+    wt_ids = token_ids(sequence, tokenizer, log_probs.device)
+    wt_log_probs = log_probs.gather(1, wt_ids.unsqueeze(1))
+    return log_probs[:, aa_ids] - wt_log_probs
+
+def saturation_table(matrix, sequence):
+    """
+    Flatten a saturation matrix into the long mutant/predict_score table,
+    in generate_mutants order (wild-type-to-itself entries dropped).
+    """
+    return long_table(matrix.float().cpu().numpy(), sequence)
+
+def score_mutants(log_probs, mutants, tokenizer):
+    """
+    Score (multi-)mutants written as "A12G" or "A12G:K40R" by summing the
+    gathered per-substitution deltas. Returns a numpy array aligned with mutants.
+    """
+    rows, positions, wts, mts = [], [], [], []
+    for row, mutant in enumerate(mutants):
+        for sub_mutant in mutant.split(":"):
+            rows.append(row)
+            positions.append(int(sub_mutant[1:-1]) - 1)
+            wts.append(sub_mutant[0])
+            mts.append(sub_mutant[-1])
+
+    device = log_probs.device
+    positions = torch.tensor(positions, dtype=torch.long, device=device)
+    deltas = (log_probs[positions, token_ids(mts, tokenizer, device)]
+              - log_probs[positions, token_ids(wts, tokenizer, device)])
+    scores = torch.zeros(len(mutants), dtype=deltas.dtype, device=device)
+    scores.index_add_(0, torch.tensor(rows, dtype=torch.long, device=device), deltas)
+    return scores.float().cpu().numpy()
+
+@torch.no_grad()
+def score_auto(fasta, model, tokenizer, device, window=None, stride=None, window_mode="center", cache=None):
     """
     Automatically generate mutants and compute scores.
+    With `window` set, proteins longer than the window are scored in sliding windows;
+    with a LogitsCache, a previously scored wild type skips the forward pass.
     """
     # Read the wild-type sequence
     sequence = read_seq(fasta)
     
-    # Generate mutants
-    mutants = generate_mutants(sequence)
-    
-    # Tokenize the sequence
-    tokenized_results = tokenizer(sequence, return_tensors="pt")
-    input_ids = tokenized_results.input_ids.to(device)
-    attention_mask = tokenized_results.attention_mask.to(device)
-    
-    # Compute logits
-    logits = model(input_ids, attention_mask=attention_mask).logits[0, 1:-1, :].log_softmax(dim=-1)
-    scores = []
-
-    # Compute scores for each mutant
-    for mutant in mutants:
-        wt, idx, mt = mutant[0], int(mutant[1:-1]) - 1, mutant[-1]
-        score = (logits[idx, tokenizer.get_vocab()[mt]] - logits[idx, tokenizer.get_vocab()[wt]]).item()
-        scores.append((mutant, score))
-    
-    # Convert to DataFrame
-    df = pd.DataFrame(scores, columns=["mutant", "predict_score"])
+    # One forward pass, then every mutant is a gather from the log-prob matrix
+    log_probs = get_log_probs(sequence, model, tokenizer, device, window=window, stride=stride,
+                              window_mode=window_mode, cache=cache)
+    return saturation_table(saturation_matrix(log_probs, sequence, tokenizer), sequence)
+
+@torch.no_grad()
+def score_csv(fasta, mutant_file, model, tokenizer, device, cache=None):
+    """
+    Score the mutants listed in a ProteinGym-style CSV ("mutant" column,
+    colon-separated multi-mutants) and add a predict_score column.
+    """
+    df = pd.read_csv(mutant_file)
+    sequence = read_seq(fasta)
+    log_probs = get_log_probs(sequence, model, tokenizer, device, cache=cache)
+    df["predict_score"] = score_mutants(log_probs, df["mutant"].tolist(), tokenizer)
     return df
 
-def main(sequence_folder, output_folder, model_path="AI4Protein/Prime_690M"):
+def configure_threads(threads=None, interop_threads=None):
+    """
+    Set torch's intra-op and inter-op CPU thread counts (None keeps the default).
+    """
+    if threads:
+        torch.set_num_threads(threads)
+    if interop_threads:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError as e:  # Only allowed before any parallel work has run
+            print(f"Could not set inter-op threads: {e}")
+
+def load_model(model_path, device, mode="fp32", compile_model=False):
+    """
+    Load the PRIME model and tokenizer and prepare the model for `mode`.
+    """
+    model = AutoModel.from_pretrained(model_path, trust_remote_code=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_path, trust_remote_code=True)
+    return prepare_model(model, device, mode, compile_model), tokenizer
+
+def prepare_model(model, device, mode="fp32", compile_model=False):
+    """
+    Put a loaded model in eval mode on `device` for one of the CPU_MODES.
+
+    "fp32" is the reference; "bf16" keeps the weights and runs the forward
+    pass under bfloat16 autocast (see inference_context); "int8" returns a
+    copy with every nn.Linear dynamically quantised to int8 (CPU only).
+    compile_model wraps the result in torch.compile with dynamic shapes.
+    """
+    if mode not in CPU_MODES:
+        raise ValueError(f"Unknown mode {mode}, expected one of {CPU_MODES}")
+    model = model.to(device)
+    model.eval()
+
+    if mode == "int8":
+        if device.type != "cpu":
+            raise ValueError("int8 dynamic quantisation is only supported on CPU")
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    if compile_model:
+        model = torch.compile(model, dynamic=True)
+    return model
+
+def inference_context(mode, device):
+    """
+    Context for scoring: torch.inference_mode, plus bfloat16 autocast in "bf16" mode.
+    """
+    stack = contextlib.ExitStack()
+    stack.enter_context(torch.inference_mode())
+    if mode == "bf16":
+        stack.enter_context(torch.autocast(device_type=device.type, dtype=torch.bfloat16))
+    return stack
+
+def score_records(records, model, tokenizer, device, output_folder, batch_size=1, max_tokens=None,
+                  window=None, stride=None, window_mode="center", cache=None, output_format="csv"):
+    """
+    Score a stream of records in batches and write one output per record,
+    in one of the saturation_io OUTPUT_FORMATS. A record whose output name
+    is already taken in this run fails instead of overwriting the other.
+    Returns (completed, failed) lists of Records.
+    """
+    output_folder = Path(output_folder)
+    completed, failed = [], []
+    claimed = {}
+    for batch in make_batches(records, batch_size, max_tokens):
+        try:
+            log_probs = compute_log_probs_for_records(batch, model, tokenizer, device, window=window, stride=stride,
+                                                      window_mode=window_mode, cache=cache)
+        except Exception as e:
+            for record in batch:
+                print(f"Error processing {record.stem}/{record.record_id}: {e}")
+            failed.extend(batch)
+            continue
+
+        for record, record_log_probs in zip(batch, log_probs):
+            try:
+                # Score every single-point mutant from the record's log-probs
+                matrix = saturation_matrix(record_log_probs, record.sequence, tokenizer)
+
+                # Save the results
+                output_file = output_folder / claim_output_name(claimed, record, output_suffix(output_format))
+                write_scores(output_file, matrix.float().cpu().numpy(), record.sequence)
+                print(f"Processed {record.stem}/{record.record_id}, results saved to {output_file}")
+                completed.append(record)
+            except Exception as e:
+                print(f"Error processing {record.stem}/{record.record_id}: {e}")
+                failed.append(record)
+    return completed, failed
+
+def score_records_pipelined(records, model, tokenizer, device, output_folder, batch_size=1, max_tokens=None,
+                            window=None, stride=None, window_mode="center", cache=None, output_format="csv",
+                            prefetch=2, write_backlog=16):
+    """
+    score_records with the CPU work overlapped with the forward passes.
+
+    A prefetch thread reads FASTA records, batches them, looks them up in the
+    cache and tokenises up to `prefetch` batches ahead; a writer thread
+    builds and writes the output files from a queue of at most
+    `write_backlog` finished records. The calling thread only runs the model
+    and the gather, so the forward pass never waits on parsing or disk.
+    Unreadable FASTA files are skipped by iter_records; should reading the
+    records fail in some other way, the error is reported, the batches
+    already read are still scored and written, and the loop returns.
+    Both queue sizes must be at least 1 (a Queue of size 0 is unbounded).
+    Returns (completed, failed) lists of Records.
+    """
+    if prefetch < 1 or write_backlog < 1:
+        raise ValueError(f"prefetch and write_backlog must be at least 1, got {prefetch} and {write_backlog}")
+    output_folder = Path(output_folder)
+    prepared_queue = queue.Queue(maxsize=prefetch)
+    write_queue = queue.Queue(maxsize=write_backlog)
+    stop = threading.Event()
+    completed, failed = [], []
+    claimed = {}  # Only touched by the writer thread
+
+    def put(q, item):
+        # Give up if the consumer has stopped, instead of blocking on a full queue forever
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def prefetch_batches():
+        try:
+            for batch in make_batches(records, batch_size, max_tokens):
+                try:
+                    item = (batch, prepare_batch(batch, tokenizer, device, window=window, stride=stride,
+                                                 window_mode=window_mode, cache=cache), None)
+                except Exception as e:
+                    item = (batch, None, e)
+                if not put(prepared_queue, item):
+                    return
+        except Exception as e:  # Reading the records failed past any one file
+            print(f"Error reading records: {e}")
+        finally:
+            put(prepared_queue, _DONE)
+
+    def write_results():
+        while True:
+            item = write_queue.get()
+            if item is _DONE:
+                return
+            record, matrix = item
+            try:
+                output_file = output_folder / claim_output_name(claimed, record, output_suffix(output_format))
+                write_scores(output_file, matrix, record.sequence)
+                print(f"Processed {record.stem}/{record.record_id}, results saved to {output_file}")
+                completed.append(record)
+            except Exception as e:
+                print(f"Error processing {record.stem}/{record.record_id}: {e}")
+                failed.append(record)
+
+    reader = threading.Thread(target=prefetch_batches, name="prime-prefetch", daemon=True)
+    writer = threading.Thread(target=write_results, name="prime-writer", daemon=True)
+    reader.start()
+    writer.start()
+    try:
+        while True:
+            item = prepared_queue.get()
+            if item is _DONE:
+                break
+            batch, prepared, error = item
+            if error is None:
+                try:
+                    log_probs = run_batch(prepared, model, tokenizer, device, window=window, stride=stride,
+                                          window_mode=window_mode, cache=cache)
+                except Exception as e:
+                    error = e
+            if error is not None:
+                for record in batch:
+                    print(f"Error processing {record.stem}/{record.record_id}: {error}")
+                failed.extend(batch)
+                continue
+
+            for record, record_log_probs in zip(batch, log_probs):
+                try:
+                    matrix = saturation_matrix(record_log_probs, record.sequence, tokenizer).float().cpu().numpy()
+                except Exception as e:
+                    print(f"Error processing {record.stem}/{record.record_id}: {e}")
+                    failed.append(record)
+                    continue
+                write_queue.put((record, matrix))
+    finally:
+        stop.set()
+        write_queue.put(_DONE)
+        writer.join()
+        reader.join()
+    return completed, failed
+
+def main(sequence_folder, output_folder, model_path="AI4Protein/Prime_690M", batch_size=1, max_tokens=None,
+         window=None, stride=None, window_mode="center", cache_dir=None, cache_max_gb=10.0, cache_float16=False,
+         mode="fp32", threads=None, interop_threads=None, compile_model=False, output_format="csv",
+         pipeline=False, prefetch=2):
     """
     Main function to process multiple FASTA files and score their mutants.
+    Every record of every file is scored, in length-bucketed padded batches;
+    records longer than `window` are scored in sliding windows. With
+    `pipeline`, reading/tokenising and writing run in background threads.
     """
+    # Fail before loading the model
+    if window is not None:
+        resolve_stride(window, stride)
+    if pipeline and prefetch < 1:
+        raise ValueError(f"prefetch must be at least 1, got {prefetch}")
+
     # Initialize the model and tokenizer
+    configure_threads(threads, interop_threads)
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    model = AutoModel.from_pretrained(model_path, trust_remote_code=True).to(device)
-    tokenizer = AutoTokenizer.from_pretrained(model_path, trust_remote_code=True)
-    model.eval()
+    model, tokenizer = load_model(model_path, device, mode=mode, compile_model=compile_model)
+
+    # Optional content-addressed cache of per-sequence log-probs
+    cache = None
+    if cache_dir:
+        # Reduced-precision modes give different log-probs, so they get their own keys
+        model_id = model_identity(model, model_path) + ("" if mode == "fp32" else f"+{mode}")
+        cache = LogitsCache(cache_dir, model_id, max_bytes=int(cache_max_gb * 1024 ** 3), float16=cache_float16)
 
     # Ensure output folder exists
     output_folder = Path(output_folder)
     output_folder.mkdir(parents=True, exist_ok=True)
 
-    # Process all FASTA files in the sequence folder
-    sequence_folder = Path(sequence_folder)
-    for fasta_file in sequence_folder.glob("*.fasta"):
-        stem = fasta_file.stem
-        try:
-            # Generate and score mutants
-            df = score_auto(fasta_file, model, tokenizer, device)
-            
-            # Save the results
-            output_file = output_folder / f"{stem}_auto.csv"
-            df.to_csv(output_file, index=False)
-            print(f"Processed {stem}, results saved to {output_file}")
-        except Exception as e:
-            print(f"Error processing {stem}: {e}")
+    # Process all records of all FASTA files in the sequence folder
+    start = time.perf_counter()
+    failed_files = []
+    score = score_records
+    options = {}
+    if pipeline:
+        score = score_records_pipelined
+        options["prefetch"] = prefetch
+    with inference_context(mode, device):
+        completed, failed = score(iter_records(sequence_folder, failed_files), model, tokenizer, device, output_folder,
+                                  batch_size=batch_size, max_tokens=max_tokens, window=window,
+                                  stride=stride, window_mode=window_mode, cache=cache,
+                                  output_format=output_format, **options)
+
+    elapsed = time.perf_counter() - start
+    print(f"Scored {len(completed)} sequences in {elapsed:.1f}s "
+          f"({len(completed) / max(elapsed, 1e-9):.2f} sequences/s), {len(failed)} failed")
+    if failed_files:
+        print(f"Could not read {len(failed_files)} FASTA files: {', '.join(p.name for p, _ in failed_files)}")
+    if cache is not None:
+        print(f"Logits cache: {cache.hits} hits, {cache.misses} misses")
 
 if __name__ == "__main__":
     import argparse
@@ -88,9 +642,33 @@ if __name__ == "__main__":
     # Set up command-line arguments
     parser = argparse.ArgumentParser(description="Generate and score protein mutants using the PRIME model.")
     parser.add_argument("--sequence_folder", type=str, required=True, help="Path to folder containing FASTA files.")
-    parser.add_argument("--output_folder", type=str, required=True, help="Path to save output CSV files.")
+    parser.add_argument("--output_folder", type=str, required=True, help="Path to save output files.")
     parser.add_argument("--model_path", type=str, default="AI4Protein/Prime_690M", help="Path to the pretrained PRIME model.")
+    parser.add_argument("--batch_size", type=int, default=1, help="Maximum sequences per forward pass.")
+    parser.add_argument("--max_tokens", type=int, default=None, help="Maximum padded tokens per forward pass.")
+    parser.add_argument("--window", type=int, default=None, help="Score proteins longer than this many residues in sliding windows.")
+    parser.add_argument("--stride", type=int, default=None, help="Residues between window starts (default: window // 2).")
+    parser.add_argument("--window_mode", choices=["center", "mean"], default="center",
+                        help="Take each residue from its best-centred window, or average overlapping windows.")
+    parser.add_argument("--cache_dir", type=str, default=None, help="Directory for cached per-sequence log-probs.")
+    parser.add_argument("--cache_max_gb", type=float, default=10.0, help="Size cap of the log-probs cache in GB.")
+    parser.add_argument("--cache_float16", action="store_true", help="Store cached log-probs as float16.")
+    parser.add_argument("--mode", choices=CPU_MODES, default="fp32", help="Numeric mode: float32, bfloat16 autocast or int8 dynamic quantisation.")
+    parser.add_argument("--threads", type=int, default=None, help="Intra-op CPU threads for torch.")
+    parser.add_argument("--interop_threads", type=int, default=None, help="Inter-op CPU threads for torch.")
+    parser.add_argument("--compile", action="store_true", help="Wrap the model in torch.compile.")
+    parser.add_argument("--output_format", choices=OUTPUT_FORMATS, default="csv",
+                        help="Long mutant CSV, or an L x 20 float32 matrix as .npz or Parquet.")
+    parser.add_argument("--pipeline", action="store_true", help="Read/tokenise ahead and write in background threads.")
+    parser.add_argument("--prefetch", type=int, default=2, help="Batches prepared ahead of the forward pass with --pipeline.")
     args = parser.parse_args()
+    if args.prefetch < 1:
+        parser.error("--prefetch must be at least 1")
 
     # Run the main function
-    main(args.sequence_folder, args.output_folder, args.model_path)
+    main(args.sequence_folder, args.output_folder, args.model_path,
+         batch_size=args.batch_size, max_tokens=args.max_tokens,
+         window=args.window, stride=args.stride, window_mode=args.window_mode,
+         cache_dir=args.cache_dir, cache_max_gb=args.cache_max_gb, cache_float16=args.cache_float16,
+         mode=args.mode, threads=args.threads, interop_threads=args.interop_threads, compile_model=args.compile,
+         output_format=args.output_format, pipeline=args.pipeline, prefetch=args.prefetch)
@@ -0,0 +1,249 @@
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import torch
+
+from logits_cache import LogitsCache, model_identity
+from prime_mutant_scoring import (CPU_MODES, configure_threads, inference_context, load_model, read_records,
+                                  record_output_name, resolve_stride, score_records)
+from saturation_io import OUTPUT_FORMATS, atomic_write, output_suffix
+
+MANIFEST_NAME = "scoring_manifest.json"
+# Memory a worker is assumed to need per byte of checkpoint: the fp32 weights
+# (a half-precision checkpoint doubles on load) plus activations and the tokenizer
+WORKER_MEMORY_FACTOR = 2.0
+# Checkpoint size assumed when it cannot be found on disk: 690M fp32 parameters
+DEFAULT_CHECKPOINT_BYTES = 690_000_000 * 4
+WEIGHT_FILE_PATTERNS = ("*.safetensors", "*.bin", "*.pt")
+
+# Model, tokenizer, device and cache of the current worker process
+_WORKER = {}
+
+def load_manifest(manifest_file, model_path, mode):
+    """
+    Load the scoring manifest, or start an empty one. Entries were scored
+    with a particular model and mode; if either changed, nothing counts as done.
+    """
+    empty = {"model_path": str(model_path), "mode": mode, "stems": {}}
+    if not os.path.exists(manifest_file):
+        return empty
+    with open(manifest_file) as f:
+        manifest = json.load(f)
+    if manifest.get("model_path") != str(model_path) or manifest.get("mode") != mode:
+        print(f"{manifest_file} was written for another model or mode, rescoring everything")
+        return empty
+    return manifest
+
+def save_manifest(manifest_file, manifest):
+    with atomic_write(manifest_file) as f:
+        json.dump(manifest, f, indent=2)
+
+def pending_files(sequence_folder, output_folder, manifest):
+    """
+    FASTA files still to score: not marked done, or done but with an output
+    missing. Largest first, so the long tail is not one big file at the end.
+    """
+    pending = []
+    for fasta_file in Path(sequence_folder).glob("*.fasta"):
+        entry = manifest["stems"].get(fasta_file.stem)
+        if entry and entry["status"] == "done" and all((Path(output_folder) / name).exists()
+                                                       for name in entry["outputs"]):
+            continue
+        pending.append(fasta_file)
+    return sorted(pending, key=lambda p: p.stat().st_size, reverse=True)
+
+def available_memory():
+    """Bytes of memory available to new processes (MemAvailable), or None if unknown."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+def checkpoint_bytes(model_path):
+    """
+    Size of the weight files of a local model folder, or of the cached hub
+    snapshot of a model id; DEFAULT_CHECKPOINT_BYTES when neither is on disk.
+    """
+    folder = Path(model_path)
+    if not folder.is_dir():
+        try:
+            from huggingface_hub import snapshot_download
+            folder = Path(snapshot_download(str(model_path), local_files_only=True))
+        except Exception:
+            return DEFAULT_CHECKPOINT_BYTES
+    size = sum(p.stat().st_size for pattern in WEIGHT_FILE_PATTERNS for p in folder.glob(pattern))
+    return size or DEFAULT_CHECKPOINT_BYTES
+
+def memory_capped_workers(model_bytes, available_bytes, cpus):
+    """
+    Workers that fit in memory: one per core, but no more than
+    available_bytes / (WORKER_MEMORY_FACTOR * model_bytes), and at least one.
+    """
+    workers = cpus
+    if available_bytes is not None:
+        workers = min(workers, int(available_bytes // (WORKER_MEMORY_FACTOR * model_bytes)))
+    return max(1, workers)
+
+def _load_worker_model(model_path, mode, compile_model):
+    if "model" not in _WORKER:
+        device = torch.device("cpu")
+        model, tokenizer = load_model(model_path, device, mode=mode, compile_model=compile_model)
+        _WORKER.update(model=model, tokenizer=tokenizer, device=device)
+
+def _init_worker(model_path, mode, compile_model, threads, cache_dir, cache_max_gb, cache_float16):
+    # Threads are set before the model loads, in a process that has not run any torch op yet
+    configure_threads(threads)
+    _load_worker_model(model_path, mode, compile_model)
+    _WORKER["cache"] = None
+    if cache_dir:
+        model_id = model_identity(_WORKER["model"], model_path) + ("" if mode == "fp32" else f"+{mode}")
+        _WORKER["cache"] = LogitsCache(cache_dir, model_id, max_bytes=int(cache_max_gb * 1024 ** 3),
+                                       float16=cache_float16)
+
+def _score_file(fasta_file, output_folder, mode, batch_size, max_tokens, window, stride, window_mode, output_format):
+    """Score every record of one FASTA file in a worker; returns its manifest entry."""
+    start = time.perf_counter()
+    entry = {"status": "failed", "outputs": [], "failed_records": [], "error": None, "worker": os.getpid()}
+    try:
+        with inference_context(mode, _WORKER["device"]):
+            completed, failed = score_records(read_records(fasta_file), _WORKER["model"], _WORKER["tokenizer"],
+                                              _WORKER["device"], output_folder, batch_size=batch_size,
+                                              max_tokens=max_tokens, window=window, stride=stride,
+                                              window_mode=window_mode, cache=_WORKER["cache"],
+                                              output_format=output_format)
+        entry["outputs"] = [record_output_name(record, output_suffix(output_format)) for record in completed]
+        entry["failed_records"] = [record.record_id for record in failed]
+        if completed and not failed:
+            entry["status"] = "done"
+        elif not completed and not failed:
+            entry["error"] = "no records"
+    except Exception as e:
+        entry["error"] = f"{type(e).__name__}: {e}"
+    entry["seconds"] = round(time.perf_counter() - start, 3)
+    return entry
+
+def main(sequence_folder, output_folder, model_path="AI4Protein/Prime_690M", workers=None, threads_per_worker=None,
+         batch_size=1, max_tokens=None, window=None, stride=None, window_mode="center", mode="fp32",
+         compile_model=False, cache_dir=None, cache_max_gb=10.0, cache_float16=False, start_method=None,
+         output_format="csv"):
+    """
+    Score a folder of FASTA files across `workers` processes, each loading
+    its own copy of the model and pulling files from the pool's shared queue.
+
+    Workers are started with "spawn" by default: forking a process after
+    torch has initialised its OpenMP/intra-op thread pools (or compiled a
+    model) can deadlock or crash the children, so the parent never loads the
+    model and each worker loads it after it starts. Memory use is therefore
+    about `workers` times the model size, so without an explicit `workers`
+    the one-per-core default is capped by memory_capped_workers to what the
+    available memory holds (WORKER_MEMORY_FACTOR times the checkpoint each).
+
+    Progress is recorded per file stem in <output_folder>/scoring_manifest.json,
+    so a re-run skips finished files and retries only the failed ones. Every
+    run also appends its throughput (files and records per second for the
+    worker/thread split) to the manifest's "runs" list.
+    """
+    if window is not None:
+        resolve_stride(window, stride)  # Fail before starting any worker
+    if not workers:
+        workers = memory_capped_workers(checkpoint_bytes(model_path), available_memory(), os.cpu_count())
+        if workers < os.cpu_count():
+            print(f"Using {workers} workers: each loads its own copy of the model and more would not fit in memory")
+    # Split the cores between workers instead of letting every worker use all of them
+    threads_per_worker = threads_per_worker or max(1, os.cpu_count() // workers)
+    start_method = start_method or "spawn"
+
+    output_folder = Path(output_folder)
+    output_folder.mkdir(parents=True, exist_ok=True)
+    manifest_file = output_folder / MANIFEST_NAME
+    manifest = load_manifest(manifest_file, model_path, mode)
+    files = pending_files(sequence_folder, output_folder, manifest)
+    skipped = sum(1 for _ in Path(sequence_folder).glob("*.fasta")) - len(files)
+    print(f"{len(files)} FASTA files to score, {skipped} already done, "
+          f"{workers} workers x {threads_per_worker} threads ({start_method})")
+    if not files:
+        return manifest
+
+    start = time.perf_counter()
+    done = failed = records = 0
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(start_method),
+                             initializer=_init_worker,
+                             initargs=(model_path, mode, compile_model, threads_per_worker,
+                                       cache_dir, cache_max_gb, cache_float16)) as pool:
+        futures = {pool.submit(_score_file, fasta_file, output_folder, mode, batch_size, max_tokens,
+                               window, stride, window_mode, output_format): fasta_file for fasta_file in files}
+        for future in as_completed(futures):
+            fasta_file = futures[future]
+            try:
+                entry = future.result()
+            except Exception as e:  # e.g. a worker killed by the OOM killer
+                entry = {"status": "failed", "outputs": [], "failed_records": [],
+                         "error": f"{type(e).__name__}: {e}", "worker": None}
+            entry["finished_at"] = time.time()
+            manifest["stems"][fasta_file.stem] = entry
+            save_manifest(manifest_file, manifest)
+            records += len(entry["outputs"])
+            if entry["status"] == "done":
+                done += 1
+            else:
+                failed += 1
+                print(f"Failed {fasta_file.name}: {entry['error'] or entry['failed_records']}")
+
+    # Workers only see their own files, so collisions between files are checked here
+    owners = {}
+    for stem, entry in manifest["stems"].items():
+        for name in entry["outputs"]:
+            if owners.setdefault(name, stem) != stem:
+                print(f"Warning: {owners[name]} and {stem} both wrote {name}; one overwrote the other")
+
+    elapsed = time.perf_counter() - start
+    run = {"workers": workers, "threads_per_worker": threads_per_worker, "start_method": start_method,
+           "files": done, "failed": failed, "records": records, "seconds": round(elapsed, 3),
+           "files_per_second": round(done / max(elapsed, 1e-9), 3),
+           "records_per_second": round(records / max(elapsed, 1e-9), 3), "finished_at": time.time()}
+    manifest.setdefault("runs", []).append(run)
+    save_manifest(manifest_file, manifest)
+    print(f"Scored {done} files ({records} records) in {elapsed:.1f}s ({run['files_per_second']:.2f} files/s, "
+          f"{run['records_per_second']:.1f} records/s), {failed} failed; see {manifest_file}")
+    return manifest
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Score FASTA files with the PRIME model across worker processes.")
+    parser.add_argument("--sequence_folder", type=str, required=True, help="Path to folder containing FASTA files.")
+    parser.add_argument("--output_folder", type=str, required=True, help="Path to save output files and the manifest.")
+    parser.add_argument("--model_path", type=str, default="AI4Protein/Prime_690M", help="Path to the pretrained PRIME model.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per core, capped by available memory / model size).")
+    parser.add_argument("--threads_per_worker", type=int, default=None, help="Torch threads per worker (default: cores / workers).")
+    parser.add_argument("--start_method", choices=["fork", "spawn", "forkserver"], default=None,
+                        help="multiprocessing start method (default: spawn; fork is unsafe once torch threads exist).")
+    parser.add_argument("--batch_size", type=int, default=1, help="Maximum sequences per forward pass.")
+    parser.add_argument("--max_tokens", type=int, default=None, help="Maximum padded tokens per forward pass.")
+    parser.add_argument("--window", type=int, default=None, help="Score proteins longer than this many residues in sliding windows.")
+    parser.add_argument("--stride", type=int, default=None, help="Residues between window starts (default: window // 2).")
+    parser.add_argument("--window_mode", choices=["center", "mean"], default="center", help="How overlapping windows are combined.")
+    parser.add_argument("--mode", choices=CPU_MODES, default="fp32", help="Numeric mode of the model.")
+    parser.add_argument("--compile", action="store_true", help="Wrap the model in torch.compile.")
+    parser.add_argument("--cache_dir", type=str, default=None, help="Directory for cached per-sequence log-probs.")
+    parser.add_argument("--cache_max_gb", type=float, default=10.0, help="Size cap of the log-probs cache in GB.")
+    parser.add_argument("--cache_float16", action="store_true", help="Store cached log-probs as float16.")
+    parser.add_argument("--output_format", choices=OUTPUT_FORMATS, default="csv", help="Format of the score files.")
+    args = parser.parse_args()
+
+    main(args.sequence_folder, args.output_folder, args.model_path, workers=args.workers,
+         threads_per_worker=args.threads_per_worker, batch_size=args.batch_size, max_tokens=args.max_tokens,
+         window=args.window, stride=args.stride, window_mode=args.window_mode, mode=args.mode,
+         compile_model=args.compile, cache_dir=args.cache_dir, cache_max_gb=args.cache_max_gb,
+         cache_float16=args.cache_float16, start_method=args.start_method, output_format=args.output_format)
@@ -0,0 +1,214 @@
+import json
+import math
+import resource
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+import torch
+
+from prime_mutant_scoring import (CPU_MODES, compute_log_probs_windowed, configure_threads, forward_log_probs,
+                                  inference_context, load_model, read_seq, score_mutants, tokenize)
+
+STAGES = ("read", "tokenize", "forward", "gather", "write")
+
+class StageTimer:
+    """
+    Wall-clock seconds per pipeline stage. On CUDA the device is synchronised
+    when a stage ends, so asynchronous kernels are charged to the right stage.
+    """
+    def __init__(self, device=None):
+        self.device = device
+        self.seconds = defaultdict(float)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.device is not None and self.device.type == "cuda":
+                torch.cuda.synchronize(self.device)
+            self.seconds[name] += time.perf_counter() - start
+
+    def as_dict(self):
+        return {name: round(self.seconds.get(name, 0.0), 4) for name in STAGES}
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+def iter_assays(sequence_folder, mutant_folder):
+    """Yield (stem, fasta_file, mutant_file) for every FASTA file with a matching mutant CSV."""
+    for fasta_file in sorted(Path(sequence_folder).glob("*.fasta")):
+        mutant_file = Path(mutant_folder) / f"{fasta_file.stem}.csv"
+        if mutant_file.exists():
+            yield fasta_file.stem, fasta_file, mutant_file
+        else:
+            print(f"No mutant file for {fasta_file.stem}, skipping")
+
+def score_assay(fasta_file, mutant_file, model, tokenizer, device, output_file=None, chunksize=100000,
+                window=None):
+    """
+    Score one ProteinGym assay, streaming its mutant CSV in chunks, and
+    return its report entry: Spearman of predict_score against the DMS
+    `score` column, mutant count and per-stage timings.
+    """
+    timer = StageTimer(device)
+    with timer.stage("read"):
+        sequence = read_seq(fasta_file)
+    if window and len(sequence) > window:
+        # Windowed scoring tokenises internally; its time counts as forward
+        with timer.stage("forward"):
+            log_probs = compute_log_probs_windowed(sequence, model, tokenizer, device, window=window)
+    else:
+        with timer.stage("tokenize"):
+            input_ids, attention_mask = tokenize(sequence, tokenizer, device)
+        with timer.stage("forward"):
+            log_probs = forward_log_probs(input_ids, attention_mask, model)
+
+    true_scores, predicted = [], []
+    first_chunk = True
+    with timer.stage("read"):
+        chunks = pd.read_csv(mutant_file, chunksize=chunksize)
+    while True:
+        with timer.stage("read"):
+            df = next(chunks, None)
+        if df is None:
+            break
+        with timer.stage("gather"):
+            df["predict_score"] = score_mutants(log_probs, df["mutant"].tolist(), tokenizer)
+        true_scores.append(df["score"])
+        predicted.append(df["predict_score"])
+        if output_file is not None:
+            with timer.stage("write"):
+                df.to_csv(output_file, index=False, header=first_chunk, mode="w" if first_chunk else "a")
+        first_chunk = False
+
+    true_scores = pd.concat(true_scores, ignore_index=True) if true_scores else pd.Series(dtype=float)
+    predicted = pd.concat(predicted, ignore_index=True) if predicted else pd.Series(dtype=float)
+    # Undefined (NaN) for constant scores or predictions; None keeps the JSON report valid
+    spearman = float(true_scores.corr(predicted, method="spearman")) if len(predicted) > 1 else None
+    stages = timer.as_dict()
+    return {
+        "length": len(sequence),
+        "mutants": len(predicted),
+        "spearman": None if spearman is None or math.isnan(spearman) else spearman,
+        "seconds": round(sum(stages.values()), 4),
+        "stages": stages,
+    }
+
+def run_benchmark(assays, model, tokenizer, device, output_folder=None, chunksize=100000, window=None):
+    """
+    Score (stem, fasta_file, mutant_file) assays one at a time and build the
+    report: per-assay entries plus totals, throughput and peak RSS. An assay
+    that fails (e.g. a missing column) is recorded with its error and left
+    out of the totals; the rest of the run carries on.
+    """
+    if output_folder is not None:
+        output_folder = Path(output_folder)
+        output_folder.mkdir(parents=True, exist_ok=True)
+
+    results, failures = {}, {}
+    totals = defaultdict(float)
+    for stem, fasta_file, mutant_file in assays:
+        output_file = output_folder / f"{stem}.csv" if output_folder is not None else None
+        try:
+            entry = score_assay(fasta_file, mutant_file, model, tokenizer, device, output_file, chunksize, window)
+        except Exception as e:
+            failures[stem] = f"{type(e).__name__}: {e}"
+            print(f"Error scoring {stem}: {failures[stem]}")
+            continue
+        results[stem] = entry
+        for name, seconds in entry["stages"].items():
+            totals[name] += seconds
+        print(f"Scoring {stem}, rs = {entry['spearman'] if entry['spearman'] is not None else float('nan'):.4f}, "
+              f"{entry['mutants']} mutants in {entry['seconds']:.2f}s")
+
+    correlations = pd.Series([r["spearman"] for r in results.values()], dtype=float).dropna()
+    mutants = sum(r["mutants"] for r in results.values())
+    total_seconds = sum(totals.values())
+    return {
+        "assays": results,
+        "failed": failures,
+        "summary": {
+            "assays": len(results),
+            "failed": len(failures),
+            "mutants": mutants,
+            "mean_spearman": float(correlations.mean()) if len(correlations) else None,
+            "median_spearman": float(correlations.median()) if len(correlations) else None,
+            "seconds": round(total_seconds, 4),
+            "mutants_per_second": round(mutants / max(total_seconds, 1e-9), 2),
+            "stages": {name: round(totals.get(name, 0.0), 4) for name in STAGES},
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        },
+    }
+
+def compare_reports(report, baseline, spearman_tolerance=0.005, throughput_tolerance=0.2):
+    """
+    Return regression messages for `report` against a `baseline` report:
+    mean Spearman lower by more than spearman_tolerance, or throughput lower
+    by more than throughput_tolerance (a fraction), or assays that now fail.
+    """
+    regressions = []
+    summary, base = report["summary"], baseline["summary"]
+    for stem, error in report.get("failed", {}).items():
+        if stem not in baseline.get("failed", {}):
+            regressions.append(f"{stem} failed: {error}")
+    if summary["mean_spearman"] is not None and base.get("mean_spearman") is not None:
+        drop = base["mean_spearman"] - summary["mean_spearman"]
+        if drop > spearman_tolerance:
+            regressions.append(f"mean Spearman {summary['mean_spearman']:.4f} vs {base['mean_spearman']:.4f}")
+    if base.get("mutants_per_second"):
+        ratio = summary["mutants_per_second"] / base["mutants_per_second"]
+        if ratio < 1 - throughput_tolerance:
+            regressions.append(f"throughput {summary['mutants_per_second']:.0f} vs "
+                               f"{base['mutants_per_second']:.0f} mutants/s ({ratio:.2f}x)")
+    return regressions
+
+def print_summary(summary):
+    stages = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in summary["stages"].items())
+    failed = f" ({summary['failed']} failed)" if summary.get("failed") else ""
+    print(f"{summary['assays']} assays{failed}, {summary['mutants']} mutants, mean Spearman {summary['mean_spearman']}, "
+          f"{summary['mutants_per_second']:.0f} mutants/s, peak RSS {summary['peak_rss_mb']:.0f} MB")
+    print(f"Stages: {stages}")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Score ProteinGym assays with PRIME and report Spearman and timings.")
+    parser.add_argument("--sequence_folder", type=str, required=True, help="Folder of ProteinGym FASTA files.")
+    parser.add_argument("--mutant_folder", type=str, required=True, help="Folder of ProteinGym mutant CSVs.")
+    parser.add_argument("--output_folder", type=str, default=None, help="Also write the scored CSVs here.")
+    parser.add_argument("--model_path", type=str, default="AI4Protein/Prime_690M", help="Path to the pretrained PRIME model.")
+    parser.add_argument("--mode", choices=CPU_MODES, default="fp32", help="Numeric mode of the model.")
+    parser.add_argument("--threads", type=int, default=None, help="Intra-op CPU threads for torch.")
+    parser.add_argument("--window", type=int, default=None, help="Score proteins longer than this in sliding windows.")
+    parser.add_argument("--chunksize", type=int, default=100000, help="Mutant rows read per chunk.")
+    parser.add_argument("--report", type=str, default="proteingym_report.json", help="JSON report to write.")
+    parser.add_argument("--baseline", type=str, default=None, help="Earlier report to check for regressions.")
+    args = parser.parse_args()
+
+    configure_threads(args.threads)
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    model, tokenizer = load_model(args.model_path, device, mode=args.mode)
+
+    with inference_context(args.mode, device):
+        report = run_benchmark(iter_assays(args.sequence_folder, args.mutant_folder), model, tokenizer, device,
+                               args.output_folder, args.chunksize, args.window)
+    report.update(model_path=args.model_path, mode=args.mode, device=str(device), threads=torch.get_num_threads())
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2, allow_nan=False)
+    print_summary(report["summary"])
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_reports(report, json.load(f))
+        for message in regressions:
+            print(f"Regression: {message}")
+        if regressions:
+            sys.exit(1)
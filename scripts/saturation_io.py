@@ -0,0 +1,101 @@
+import contextlib
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+AMINO_ACIDS = "ACDEFGHIKLMNPQRSTVWY"  # All possible amino acids, in saturation-matrix column order
+
+OUTPUT_FORMATS = ("csv", "npz", "parquet")
+
+def output_suffix(output_format="csv"):
+    """File name suffix of a saturation-mutagenesis output, e.g. "_auto.npz"."""
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format {output_format}, expected one of {OUTPUT_FORMATS}")
+    return f"_auto.{output_format}"
+
+@contextlib.contextmanager
+def atomic_write(path, mode="w", **open_kwargs):
+    """
+    Open a temporary file next to `path` and move it over `path` when the
+    with-block finishes; if the block raises, `path` is left as it was.
+    scripts/ runs without the repository root on sys.path, so this mirrors
+    atomic_file.atomic_write there.
+    """
+    path = os.fspath(path)
+    tmp_file = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_file, mode, **open_kwargs) as f:
+            yield f
+        os.replace(tmp_file, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_file)
+        raise
+
+def long_table(matrix, sequence):
+    """
+    The long mutant/predict_score view of an (L, 20) score matrix, in
+    generate_mutants order with the wild-type-to-itself entries dropped.
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    wt = np.array(list(sequence))
+    aa = np.array(list(AMINO_ACIDS))
+    is_mutant = wt[:, None] != aa[None, :]
+    prefixes = np.char.add(wt, np.arange(1, len(sequence) + 1).astype(str))
+    mutants = np.char.add(prefixes[:, None], aa[None, :])[is_mutant]
+    return pd.DataFrame({"mutant": mutants.astype(object), "predict_score": matrix[is_mutant]})
+
+def wide_table(matrix, sequence):
+    """One row per position: position, wild type, and one float32 column per amino acid."""
+    df = pd.DataFrame(np.asarray(matrix, dtype=np.float32), columns=list(AMINO_ACIDS))
+    df.insert(0, "wt", pd.Categorical(list(sequence)))
+    df.insert(0, "position", np.arange(1, len(sequence) + 1, dtype=np.int32))
+    return df
+
+def write_scores(path, matrix, sequence):
+    """
+    Write an (L, 20) score matrix in the format given by the path suffix:
+    .csv is the long mutant/predict_score table, .npz holds the float32
+    matrix and the wild-type sequence, and .parquet holds the wide_table.
+    """
+    path = Path(path)
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if path.suffix == ".npz":
+        with open(path, "wb") as f:  # np.savez would append .npz to a str path without it
+            np.savez(f, scores=matrix, sequence=np.array(sequence))
+    elif path.suffix == ".parquet":
+        wide_table(matrix, sequence).to_parquet(path, index=False)
+    else:
+        long_table(matrix, sequence).to_csv(path, index=False)
+
+def load_matrix(path):
+    """
+    Load (matrix, sequence) from any output written by write_scores. A long
+    CSV is folded back into the matrix, with 0 at the wild-type entries.
+    """
+    path = Path(path)
+    if path.suffix == ".npz":
+        with np.load(path) as data:
+            return data["scores"], str(data["sequence"])
+    if path.suffix == ".parquet":
+        df = pd.read_parquet(path).sort_values("position")
+        return df[list(AMINO_ACIDS)].to_numpy(dtype=np.float32), "".join(df["wt"].astype(str))
+
+    df = pd.read_csv(path)
+    parts = df["mutant"].str.extract(r"^([A-Z])(\d+)([A-Z])$")
+    positions = parts[1].astype(int).to_numpy() - 1
+    wt = pd.Series(parts[0].to_numpy(), index=positions)
+    wt = wt[~wt.index.duplicated()].sort_index()
+    matrix = np.zeros((len(wt), len(AMINO_ACIDS)), dtype=np.float32)
+    columns = parts[2].map({aa: j for j, aa in enumerate(AMINO_ACIDS)}).to_numpy()
+    matrix[positions, columns] = df["predict_score"].to_numpy(dtype=np.float32)
+    return matrix, "".join(wt)
+
+def load_scores(path):
+    """Load any output written by write_scores as the long mutant/predict_score table."""
+    if Path(path).suffix == ".csv":
+        return pd.read_csv(path)
+    return long_table(*load_matrix(path))
@@ -0,0 +1,24 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+# The modules are flat scripts, not an installed package; benchmarks/ holds the tiny PRIME model
+sys.path[:0] = [str(ROOT), str(ROOT / "scripts"), str(ROOT / "benchmarks")]
+
+@pytest.fixture
+def fixtures_dir():
+    return Path(__file__).resolve().parent / "fixtures"
+
+@pytest.fixture(scope="session")
+def tiny_prime():
+    """(model, tokenizer) of the tiny random-weight PRIME stand-in."""
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    pytest.importorskip("Bio")
+    from tiny_prime import build_tiny_model
+
+    import torch
+    torch.set_grad_enabled(False)
+    return build_tiny_model()
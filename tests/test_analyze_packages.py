@@ -0,0 +1,68 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from analyze_packages import clean_text, clean_texts, filter_package_name, filter_package_names
+
+NAMES = [
+    "samtools", "Phylo_Tree.Tools", "k-mer--counter", "--metagenome-binner--", "a", " ", "",
+    "RNASeq-Assembler", "illumina trim galore", "GPU.Phylo!", "Genome(s)_Toolkit", "ÉGÉNOME-phylo",
+    "phylo__", "cluster²", "MAGpie", "bayesian\ttools", "hic-assembler", "readmapper v2.0",
+]
+
+TEXTS = [
+    "Tools for dealing with SAM, BAM and CRAM files",
+    "  Multiple   spaces\tand\ttabs\n",
+    "Under_scores, hyphen-ated -- and (parentheses)!",
+    "Ünïcödé café – naïve résumé",
+    "",
+    "12.5% of reads; 3'-end trimming",
+    "superscript² and fractions ½",
+]
+
+def assert_same(expected, actual):
+    # Row by row, treating NaN == NaN
+    assert expected.fillna("<NA>").tolist() == actual.fillna("<NA>").tolist()
+
+@pytest.mark.parametrize("dtype", [object, None])
+def test_filter_package_names_matches_scalar(dtype):
+    names = pd.Series(NAMES + [None], dtype=dtype)
+    expected = names.apply(lambda name: None if pd.isna(name) else filter_package_name(name))
+    assert_same(expected, filter_package_names(names))
+
+def test_filter_package_names_keeps_and_drops():
+    result = filter_package_names(pd.Series(["Phylo_Tree.Tools", "RNASeq-Assembler", "a"]))
+    assert result.tolist()[0] == "phylo-tree-tools"
+    assert result.isna().tolist() == [False, True, True]
+
+@pytest.mark.parametrize("dtype", [object, None])
+def test_clean_texts_matches_scalar(dtype):
+    texts = pd.Series(TEXTS + NAMES + [None, float("nan")], dtype=dtype)
+    assert_same(texts.apply(clean_text), clean_texts(texts))
+    assert clean_texts(pd.Series([float("nan")])).tolist() == ["nan"]
+
+MISSING_VALUES_TSV = (
+    "Package_Name\tDescription\tUpdated_Date\n"
+    "phylo-tree\tPhylogenetic trees\t\n"
+    "genome-assembler\t\t2024-03-01\n"
+    "\tNo name\t2024-02-01\n"
+    "python-metagenome\tBinning, v2\t2023-12-24\n"
+    "r-phylo\t\t2024-03-01\n"
+)
+
+@pytest.mark.parametrize("chunksize", [1, 2, 3])
+def test_chunked_statistics_match_whole_file(tmp_path, capsys, chunksize):
+    from analyze_packages import analyze_bioconda_packages
+
+    tsv = tmp_path / "packages.tsv"
+    tsv.write_text(MISSING_VALUES_TSV)
+    analyze_bioconda_packages(str(tsv))
+    whole = capsys.readouterr().out
+    analyze_bioconda_packages(str(tsv), chunksize=chunksize)
+    chunked = capsys.readouterr().out
+    # Statistics, then prefix counts; tied dates or counts may be listed in either order
+    whole, chunked = whole.split("\n==="), chunked.split("\n===")
+    assert chunked[1] == whole[1]
+    assert sorted(chunked[3].splitlines()) == sorted(whole[3].splitlines())
+    whole = whole[1]
+    assert "Unique update dates: 2" in whole and "Oldest update: 2023-12-24" in whole
@@ -0,0 +1,22 @@
+import pytest
+
+from atomic_file import atomic_write
+
+def test_replaces_the_file_on_success(tmp_path):
+    path = tmp_path / "out.json"
+    path.write_text("old")
+    with atomic_write(path) as f:
+        f.write("new")
+        assert path.read_text() == "old"
+    assert path.read_text() == "new"
+    assert [p.name for p in tmp_path.iterdir()] == ["out.json"]
+
+def test_leaves_the_file_alone_on_error(tmp_path):
+    path = tmp_path / "out.json"
+    path.write_text("old")
+    with pytest.raises(RuntimeError):
+        with atomic_write(path) as f:
+            f.write("partial")
+            raise RuntimeError("crash")
+    assert path.read_text() == "old"
+    assert [p.name for p in tmp_path.iterdir()] == ["out.json"]
@@ -0,0 +1,94 @@
+import json
+import time
+
+import pytest
+
+from channel_index import ChannelIndex, compare_versions, load_channel_index, newest_version, version_key
+
+@pytest.mark.parametrize("older, newer", [
+    ("1.9", "1.10"),
+    ("1.10", "1.17"),
+    ("2.1.6", "2.2.0rc1"),
+    ("2.2.0rc1", "2.2.0"),
+    ("1.0a1", "1.0b1"),
+    ("1.0.dev0", "1.0a1"),
+    ("1.0", "1.0.post1"),
+    ("1.4.14", "1.4.15.dev0"),
+    ("3.15.5", "1!3.13.0"),
+])
+def test_compare_versions_orders_conda_versions(older, newer):
+    assert compare_versions(older, newer) == -1
+    assert compare_versions(newer, older) == 1
+
+@pytest.mark.parametrize("a, b", [("1.0", "1.0.0"), ("1.0", "1.0+build5"), ("1.0RC1", "1.0rc1"), ("0!2.1", "2.1")])
+def test_compare_versions_equal(a, b):
+    assert compare_versions(a, b) == 0
+
+def test_version_key_splits_epoch_and_components():
+    assert version_key("2!1.10rc2") == (2, [(1, 1, ""), (1, 10, ""), (-1, 0, "rc"), (1, 2, "")])
+
+def test_newest_version():
+    assert newest_version(["1.9", "1.17", "1.10", "1.2"]) == "1.17"
+
+def test_from_repodata_merges_subdirs(fixtures_dir):
+    index = ChannelIndex.from_snapshots([fixtures_dir / "repodata_linux-64.json",
+                                         fixtures_dir / "repodata_noarch.json"])
+    assert index.versions == {
+        "kma": "1.4.15.dev0",
+        "mob_suite": "3.1.0",
+        "plasmidfinder": "2.2.0rc1",
+        "samtools": "1.18",  # noarch 1.18 beats linux-64 1.17
+        "spades": "1!3.13.0",
+    }
+
+def test_from_channeldata(fixtures_dir):
+    index = ChannelIndex.from_snapshots([fixtures_dir / "channeldata.json"])
+    assert len(index) == 3  # retired-tool has no version
+    assert index.latest_version("bowtie2") == "2.5.4"
+    assert "mash" in index and "MASH" in index
+    assert index.latest_version("retired-tool") is None
+    assert "not-a-package" not in index
+
+def test_save_and_load_round_trip(fixtures_dir, tmp_path):
+    index = ChannelIndex.from_snapshots([fixtures_dir / "channeldata.json"])
+    path = tmp_path / "index.json"
+    index.save(path)
+    loaded = load_channel_index(str(path))
+    assert loaded.versions == index.versions
+    assert loaded.source == index.source
+    assert loaded.built_at == pytest.approx(index.built_at)
+
+def _write_index(path, age):
+    path.write_text(json.dumps({"source": "test", "built_at": time.time() - age, "packages": {"kma": "1.4.14"}}))
+
+def test_load_channel_index_missing_returns_none(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("BIOCONDA_CHANNEL_INDEX", raising=False)
+    assert load_channel_index() is None
+
+def test_stale_implicit_index_is_ignored(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("BIOCONDA_CHANNEL_INDEX", raising=False)
+    _write_index(tmp_path / "bioconda_channel_index.json", age=30 * 86400)
+    assert load_channel_index() is None
+    assert "Ignoring" in capsys.readouterr().out
+    assert load_channel_index(max_age=60 * 86400).latest_version("kma") == "1.4.14"
+
+def test_stale_explicit_index_is_used_with_a_warning(tmp_path, capsys):
+    path = tmp_path / "old_index.json"
+    _write_index(path, age=30 * 86400)
+    assert load_channel_index(str(path)).latest_version("kma") == "1.4.14"
+    assert "Warning" in capsys.readouterr().out
+
+def test_filter_bioconda_dependencies_uses_index(fixtures_dir):
+    pytest.importorskip("requests")
+    from check_dependencies import filter_bioconda_dependencies
+
+    class NoNetwork:
+        def get(self, *args, **kwargs):
+            raise AssertionError("the index path must not make requests")
+
+    index = ChannelIndex.from_snapshots([fixtures_dir / "repodata_linux-64.json",
+                                         fixtures_dir / "repodata_noarch.json"])
+    dependencies = ["samtools", "numpy", "KMA", "python", "spades"]
+    assert filter_bioconda_dependencies(dependencies, index=index, session=NoNetwork()) == ["samtools", "KMA", "spades"]
@@ -0,0 +1,52 @@
+import os
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("yaml")
+
+from env_builder import BuildResult, build_envs, package_jobs, record_builds, yaml_jobs
+
+def write_yaml(folder, stem, name=None):
+    path = folder / f"{stem}.yaml"
+    path.write_text((f"name: {name}\n" if name else "") + "dependencies:\n  - samtools\n")
+    return path
+
+def test_jobs_are_named_after_the_yaml_name_field(tmp_path):
+    named = write_yaml(tmp_path, "a", name="samtools_env")
+    unnamed = write_yaml(tmp_path, "b")
+    jobs = yaml_jobs([unnamed, named])
+    assert [job.name for job in jobs] == ["samtools_env", "b"]
+    assert jobs[0].command[-3:] == ["-n", "samtools_env", "--force"]
+    assert jobs[1].yaml_file == str(unnamed)
+
+def test_duplicate_environment_names_are_rejected(tmp_path):
+    write_yaml(tmp_path, "a", name="tools")
+    write_yaml(tmp_path, "b", name="tools")
+    with pytest.raises(ValueError, match="tools"):
+        yaml_jobs(tmp_path.glob("*.yaml"))
+
+def test_successful_builds_are_recorded_under_their_yaml(tmp_path):
+    jobs = yaml_jobs([write_yaml(tmp_path, "a", name="env_a"), write_yaml(tmp_path, "b", name="env_b")])
+    results = [BuildResult("env_a", 0, 1.0, 1, "a.log"), BuildResult("env_b", 1, 1.0, 2, "b.log")]
+    manifest = {}
+    record_builds(manifest, jobs, results, {"a.yaml": "hash_a", "b.yaml": "hash_b"})
+    assert manifest == {"a.yaml": "hash_a"}
+
+STUB_CONDA = Path(__file__).resolve().parent.parent / "benchmarks" / "stub_conda"
+
+@pytest.mark.parametrize("pkgs_root, shared", [("pkgs", False), (None, True)])
+def test_parallel_builds_get_their_own_package_cache(tmp_path, monkeypatch, pkgs_root, shared):
+    monkeypatch.setenv("PATH", f"{STUB_CONDA}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("STUB_CONDA_SECONDS", "0.5")
+    monkeypatch.setenv("STUB_CONDA_STATE", str(tmp_path))
+    monkeypatch.delenv("CONDA_PKGS_DIRS", raising=False)
+    jobs = package_jobs({f"tool{i}": f"tool{i}_env" for i in range(6)})
+    results, _ = build_envs(jobs, workers=3, log_dir=tmp_path / "logs", retries=0,
+                            pkgs_root=tmp_path / pkgs_root if pkgs_root else None)
+    failed = [r.name for r in results if r.returncode != 0]
+    if shared:  # The stub refuses a cache another build is using
+        assert failed
+    else:
+        assert not failed
+        assert sorted(p.name for p in (tmp_path / "pkgs").iterdir()) == ["worker0", "worker1", "worker2"]
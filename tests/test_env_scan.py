@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+pytest.importorskip("yaml")
+
+import env_scan
+
+ENV = """name: {name}
+channels:
+  - conda-forge
+  - bioconda
+dependencies:
+  - samtools=1.17=h00cdaf9_0
+  - pip:
+    - numpy==1.26.4
+"""
+
+def write_env(folder, name):
+    path = folder / f"{name}.yaml"
+    path.write_text(ENV.format(name=name))
+    return path
+
+def test_scan_parses_conda_and_pip(tmp_path):
+    write_env(tmp_path, "a")
+    scanned = env_scan.scan_env_dir(tmp_path, workers=1, cache_path=tmp_path / "cache.json")
+    assert scanned == {"a.yaml": [["samtools", "1.17", "conda"], ["numpy", "1.26.4", "pip"]]}
+
+def test_deleted_files_are_pruned_from_the_cache(tmp_path):
+    cache_path = tmp_path / "cache.json"
+    write_env(tmp_path, "a")
+    gone = write_env(tmp_path, "b")
+    env_scan.scan_env_dir(tmp_path, workers=1, cache_path=cache_path)
+    gone.unlink()
+    assert list(env_scan.scan_env_dir(tmp_path, workers=1, cache_path=cache_path)) == ["a.yaml"]
+    assert [path.rsplit("/", 1)[-1] for path in json.loads(cache_path.read_text())] == ["a.yaml"]
+
+def test_file_rewritten_while_parsing_is_parsed_again(tmp_path, monkeypatch):
+    cache_path = tmp_path / "cache.json"
+    path = write_env(tmp_path, "a")
+    parse = env_scan._parse_env
+
+    def parse_then_rewrite(yaml_file):
+        environment = parse(yaml_file)
+        path.write_text(ENV.format(name="a").replace("1.17", "1.18") + "  - bwa\n")
+        return environment
+
+    monkeypatch.setattr(env_scan, "_parse_env", parse_then_rewrite)
+    env_scan.scan_env_dir(tmp_path, workers=1, cache_path=cache_path)
+    monkeypatch.setattr(env_scan, "_parse_env", parse)
+    scanned = env_scan.scan_env_dir(tmp_path, workers=1, cache_path=cache_path)
+    assert ["samtools", "1.18", "conda"] in scanned["a.yaml"]
+
+def test_channel_order_changes_the_hash(tmp_path):
+    cache_path = tmp_path / "cache.json"
+    path = write_env(tmp_path, "a")
+    before = env_scan.env_hashes(tmp_path, workers=1, cache_path=cache_path)
+    path.write_text(ENV.format(name="a").replace("  - conda-forge\n  - bioconda", "  - bioconda\n  - conda-forge"))
+    after = env_scan.env_hashes(tmp_path, workers=1, cache_path=cache_path)
+    assert before["a.yaml"] != after["a.yaml"]
+    # Reordering the dependencies alone leaves it unchanged
+    assert env_scan.dependency_hash([["b", None, "conda"], ["a", "1", "conda"]], ["bioconda"]) == \
+        env_scan.dependency_hash([["a", "1", "conda"], ["b", None, "conda"]], ["bioconda"])
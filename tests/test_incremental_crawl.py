@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+requests = pytest.importorskip("requests")
+pytest.importorskip("bs4")
+
+from bioconda_search import fetch_package_details_incremental, load_checkpoint, merge_into_tsv
+from stub_repo import EMPTY_PAGE, render_listing_page
+
+KEYWORDS = ["genome"]
+BASE_URL = "https://stub.test/bioconda/repo"
+
+class StubResponse:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.encoding = "utf-8"
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} error")
+
+class StubSession:
+    """
+    Serves listing pages from memory, honouring If-None-Match with a 304.
+    Pages listed in `fail` raise a ConnectionError once.
+    """
+    def __init__(self, pages, fail=()):
+        self.pages = pages
+        self.fail = set(fail)
+        self.requested = []
+
+    def get(self, url, headers=None, timeout=None):
+        page = int(url.rsplit("page=", 1)[1])
+        self.requested.append((page, dict(headers or {})))
+        if page in self.fail:
+            self.fail.discard(page)
+            raise requests.exceptions.ConnectionError(f"page {page} unreachable")
+        if page > len(self.pages):
+            return StubResponse(200, EMPTY_PAGE)
+        etag = f'"page{page}-{hash(tuple(self.pages[page - 1]))}"'
+        if (headers or {}).get("If-None-Match") == etag:
+            return StubResponse(304)
+        return StubResponse(200, render_listing_page(self.pages[page - 1]), {"ETag": etag})
+
+def crawl(session, output_file):
+    return fetch_package_details_incremental(session, KEYWORDS, [], str(output_file), base_url=BASE_URL, delay=0)
+
+def read_tsv(path):
+    lines = path.read_text().splitlines()
+    assert lines[0] == "Package_Name\tDescription\tUpdated_Date"
+    return [tuple(line.split("\t")) for line in lines[1:]]
+
+PAGES = [
+    [("genome-a", "Genome assembler", "2024-05-03"), ("other", "Unrelated tool", "2024-05-02")],
+    [("genome-b", "Genome browser", "2024-04-01"), ("genome-c", "Genome checker", "2024-03-01")],
+]
+
+def test_first_crawl_writes_everything_and_the_high_water_mark(tmp_path):
+    output_file = tmp_path / "packages.tsv"
+    assert crawl(StubSession(PAGES), output_file)
+    assert [row[0] for row in read_tsv(output_file)] == ["genome-a", "genome-b", "genome-c"]
+    checkpoint = load_checkpoint(f"{output_file}.checkpoint.json")
+    assert checkpoint["high_water"] == "2024-05-03" and checkpoint["run"] is None
+    assert set(checkpoint["pages"]) == {"1", "2"}
+    assert not (tmp_path / "packages.tsv.partial").exists()
+
+def test_unchanged_first_page_stops_at_the_304(tmp_path):
+    output_file = tmp_path / "packages.tsv"
+    crawl(StubSession(PAGES), output_file)
+    session = StubSession(PAGES)
+    assert crawl(session, output_file)
+    assert [page for page, _ in session.requested] == [1]
+    assert session.requested[0][1]["If-None-Match"].startswith('"page1-')
+    assert len(read_tsv(output_file)) == 3
+
+def test_stops_at_the_high_water_mark_and_merges_updates(tmp_path):
+    output_file = tmp_path / "packages.tsv"
+    crawl(StubSession(PAGES), output_file)
+    # genome-c moved to the top with a new description; page 2 now starts below the high-water mark
+    updated = [
+        [("genome-c", "Genome checker v2", "2024-06-01"), ("genome-d", "Genome differ", "2024-05-10")],
+        [("genome-a", "Genome assembler", "2024-05-03"), ("genome-b", "Genome browser", "2024-04-01")],
+        [("genome-z", "Never reached", "2020-01-01")],
+    ]
+    session = StubSession(updated)
+    assert crawl(session, output_file)
+    assert [page for page, _ in session.requested] == [1, 2]
+    rows = read_tsv(output_file)
+    assert [row[0] for row in rows] == ["genome-c", "genome-d", "genome-a", "genome-b"]
+    assert rows[0] == ("genome-c", "Genome checker v2", "2024-06-01")
+    assert load_checkpoint(f"{output_file}.checkpoint.json")["high_water"] == "2024-06-01"
+
+def test_interrupted_crawl_resumes_after_the_last_checkpointed_page(tmp_path):
+    output_file = tmp_path / "packages.tsv"
+    session = StubSession(PAGES, fail={2})
+    assert not crawl(session, output_file)
+    assert not output_file.exists()
+    checkpoint = json.loads((tmp_path / "packages.tsv.checkpoint.json").read_text())
+    assert checkpoint["run"]["last_page"] == 1 and checkpoint["high_water"] is None
+
+    assert crawl(session, output_file)
+    assert [page for page, _ in session.requested] == [1, 2, 2, 3]
+    assert [row[0] for row in read_tsv(output_file)] == ["genome-a", "genome-b", "genome-c"]
+
+def test_merge_puts_staged_rows_first_and_replaces_old_ones(tmp_path):
+    output_file, staging_file = tmp_path / "packages.tsv", tmp_path / "staged"
+    output_file.write_text("Package_Name\tDescription\tUpdated_Date\n"
+                           "genome-a\tOld\t2024-01-01\ngenome-b\tKept\t2023-01-01\n")
+    staging_file.write_text("genome-new\tNew\t2024-06-02\ngenome-a\tUpdated\t2024-06-01\n")
+    assert merge_into_tsv(str(output_file), str(staging_file)) == 1
+    assert read_tsv(output_file) == [("genome-new", "New", "2024-06-02"), ("genome-a", "Updated", "2024-06-01"),
+                                     ("genome-b", "Kept", "2023-01-01")]
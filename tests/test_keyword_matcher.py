@@ -0,0 +1,70 @@
+import random
+import re
+
+import pytest
+
+from analyze_packages import EXCLUSION_KEYWORDS, INCLUSION_KEYWORDS
+from keyword_matcher import KeywordMatcher, get_filter, normalise_keywords
+
+pytest.importorskip("requests")  # bioconda_search imports it at module level
+from bioconda_search import exclusion_keywords, keywords
+
+KEYWORD_SETS = [
+    ("bioconda_search", keywords, exclusion_keywords),
+    ("analyze_packages", INCLUSION_KEYWORDS, EXCLUSION_KEYWORDS),
+    ("overlapping", ["rna", "rnaseq", "rna-seq", "seq", "a", "hi", "hic", "hichip"], ["chip", "c"]),
+]
+
+TEXTS = [
+    "",
+    "samtools",
+    "Tools for dealing with SAM, BAM and CRAM files",
+    "Fast and sensitive read alignment",
+    "HiChIP loop calling for Hi-C data",
+    "rnaseq-pipeline",
+    "RNA-Seq quantification with k-mer counting",
+    "Phylogenetic placement of metagenomic reads",
+    "image analysis (MAG binning) on the GPU",
+    "antimicrobial RESISTANCE gene detection in pathogen genomes",
+    "10X single-cell chromatin accessibility",
+    "Bayesian bootstrap for population statistics",
+    "a",
+    "ÉPIGENOMIQUE – évaluation",
+]
+
+def random_texts(words, count=2000, seed=0):
+    """Texts stitched together from keyword fragments and filler, so partial and overlapping hits are common."""
+    rng = random.Random(seed)
+    pieces = [w[:rng.randint(1, len(w))] for w in words] + ["-", " ", "_", "x", "tool", "Seq", "CHIP", "é"]
+    return ["".join(rng.choice(pieces) for _ in range(rng.randint(0, 8))) for _ in range(count)]
+
+def per_keyword_regex_keep(text, include, exclude):
+    # The reference: one escaped regex search per keyword
+    text = text.lower()
+    def hit(words):
+        return any(re.search(re.escape(w.lower()), text) for w in words if w.strip())
+    return hit(include) and not hit(exclude)
+
+@pytest.mark.parametrize("name, include, exclude", KEYWORD_SETS, ids=[s[0] for s in KEYWORD_SETS])
+def test_filter_matches_per_keyword_regex(name, include, exclude):
+    keyword_filter = get_filter(include, exclude)
+    for text in TEXTS + random_texts(list(include) + list(exclude)):
+        assert keyword_filter.keep(text) == per_keyword_regex_keep(text, include, exclude), text
+
+@pytest.mark.parametrize("name, include, exclude", KEYWORD_SETS, ids=[s[0] for s in KEYWORD_SETS])
+def test_explain_reports_every_keyword(name, include, exclude):
+    keyword_filter = get_filter(include, exclude)
+    for text in TEXTS + random_texts(list(include) + list(exclude), seed=1):
+        lower = text.lower()
+        expected = ({k for k in normalise_keywords(include) if k in lower},
+                    {k for k in normalise_keywords(exclude) if k in lower})
+        assert keyword_filter.explain(text) == expected, text
+
+def test_normalise_keywords_dedupes_in_order():
+    assert normalise_keywords(["Phylo", " phylo ", "", "K-mer", "phylo"]) == ("phylo", "k-mer")
+
+def test_empty_matcher_never_matches():
+    matcher = KeywordMatcher([])
+    assert matcher.pattern is None
+    assert not matcher.search("anything")
+    assert matcher.matches("anything") == set()
@@ -0,0 +1,75 @@
+import os
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+torch = pytest.importorskip("torch")
+
+from logits_cache import LogitsCache
+
+@pytest.fixture
+def log_probs():
+    torch.manual_seed(0)
+    return torch.randn(12, 33).log_softmax(-1)
+
+def test_round_trip(tmp_path, log_probs):
+    cache = LogitsCache(tmp_path, "model")
+    assert cache.get("MKV") is None
+    cache.put("MKV", log_probs)
+    torch.testing.assert_close(cache.get("MKV"), log_probs, rtol=0, atol=0)
+    assert cache.get("MKV", variant="window=8") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+def test_float16_entries_come_back_as_float32(tmp_path, log_probs):
+    cache = LogitsCache(tmp_path, "model", float16=True)
+    cache.put("MKV", log_probs)
+    cached = cache.get("MKV")
+    assert cached.dtype == torch.float32
+    torch.testing.assert_close(cached, log_probs, rtol=0, atol=1e-2)
+
+def test_writes_to_a_cached_tensor_do_not_reach_the_file(tmp_path, log_probs):
+    cache = LogitsCache(tmp_path, "model")
+    cache.put("MKV", log_probs)
+    cache.get("MKV")[0] = 0.0
+    torch.testing.assert_close(cache.get("MKV"), log_probs, rtol=0, atol=0)
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="reads /proc/self/maps")
+def test_float32_entries_are_memory_mapped(tmp_path, log_probs):
+    cache = LogitsCache(tmp_path, "model")
+    cache.put("MKV", log_probs)
+    cached = cache.get("MKV")
+    assert str(cache.path("MKV")) in Path("/proc/self/maps").read_text()
+    del cached
+
+def test_evicts_least_recently_used(tmp_path, log_probs):
+    entry_bytes = log_probs.numel() * 4 + 128
+    cache = LogitsCache(tmp_path, "model", max_bytes=int(entry_bytes * 2.5))
+    for age, sequence in enumerate(("A", "C")):
+        cache.put(sequence, log_probs)
+        os.utime(cache.path(sequence), (1000 + age, 1000 + age))
+    cache.put("D", log_probs)
+    assert cache.get("A") is None
+    assert cache.get("C") is not None and cache.get("D") is not None
+
+def test_concurrent_use_keeps_counts_and_size(tmp_path, log_probs):
+    entry_bytes = log_probs.numel() * 4 + 128
+    cache = LogitsCache(tmp_path, "model", max_bytes=entry_bytes * 4)
+    sequences = [f"M{i}" for i in range(16)]
+
+    def work(offset):
+        for i in range(64):
+            sequence = sequences[(offset + i) % len(sequences)]
+            if cache.get(sequence) is None:
+                cache.put(sequence, log_probs)
+
+    threads = [threading.Thread(target=work, args=(offset,)) for offset in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.hits + cache.misses == 4 * 64
+    assert cache._total_bytes == sum(p.stat().st_size for p in tmp_path.glob("*.npy")) <= cache.max_bytes
+    assert not list(tmp_path.glob("*.tmp"))
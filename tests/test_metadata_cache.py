@@ -0,0 +1,71 @@
+import pytest
+
+from metadata_cache import ANACONDA_API, ANACONDA_PAGE, RECIPE_PAGE, MetadataCache
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+@pytest.fixture
+def cache(clock):
+    cache = MetadataCache(":memory:", ttl=100, negative_ttl=1000, max_entries=3, clock=clock)
+    yield cache
+    cache.conn.close()
+
+def test_positive_membership_expires_after_ttl(cache, clock):
+    cache.set_membership("samtools", RECIPE_PAGE, True)
+    clock.advance(99)
+    assert cache.get_membership("samtools", RECIPE_PAGE) is True
+    clock.advance(1)
+    assert cache.get_membership("samtools", RECIPE_PAGE) is None
+
+def test_negative_membership_uses_negative_ttl(cache, clock):
+    cache.set_membership("numpy", RECIPE_PAGE, False)
+    clock.advance(999)
+    assert cache.get_membership("numpy", RECIPE_PAGE) is False
+    clock.advance(1)
+    assert cache.get_membership("numpy", RECIPE_PAGE) is None
+
+def test_memberships_are_keyed_by_check(cache):
+    # The same name can be on anaconda.org's bioconda channel without a bioconda recipe page
+    cache.set_membership("python", ANACONDA_PAGE, True)
+    cache.set_membership("python", RECIPE_PAGE, False)
+    assert cache.get_membership("python", ANACONDA_PAGE) is True
+    assert cache.get_membership("python", RECIPE_PAGE) is False
+    assert cache.get_membership("python", ANACONDA_API) is None
+
+def test_version_goes_stale_but_keeps_its_etag(cache, clock):
+    cache.set_version("samtools", "1.21", etag='"abc"')
+    assert cache.get_version("samtools") == ("1.21", '"abc"', True)
+    assert cache.get_membership("samtools", ANACONDA_API) is True
+    clock.advance(100)
+    assert cache.get_version("samtools") == ("1.21", '"abc"', False)
+    cache.touch_version("samtools")
+    assert cache.get_version("samtools").fresh
+
+def test_least_recently_used_memberships_are_evicted(cache, clock):
+    for name in ("a", "b", "c"):
+        cache.set_membership(name, RECIPE_PAGE, True)
+        clock.advance(1)
+    cache.get_membership("a", RECIPE_PAGE)  # "b" is now the least recently used
+    clock.advance(1)
+    cache.set_membership("d", RECIPE_PAGE, True)
+    assert cache.get_membership("b", RECIPE_PAGE) is None
+    assert all(cache.get_membership(name, RECIPE_PAGE) for name in ("a", "c", "d"))
+
+def test_least_recently_used_versions_are_evicted(cache, clock):
+    for name in ("a", "b", "c", "d"):
+        cache.set_version(name, "1.0")
+        clock.advance(1)
+    assert cache.get_version("a") is None
+    assert [cache.get_version(name).version for name in ("b", "c", "d")] == ["1.0"] * 3
@@ -0,0 +1,54 @@
+import re
+
+import pytest
+
+import package_table
+from package_table import extract_package_rows, iter_package_rows
+
+EXPECTED_ROWS = [
+    ("samtools", "Tools for dealing with SAM, BAM and CRAM files", "2024-05-02"),
+    ("kma", "KMA is mapping a method designed to map raw reads directly against redundant databases & more",
+     "2024-04-30"),
+    ("r-ape", "Phylogenetics <and> Evolution with R – Analyses", "2024-04-29"),
+    ("mob_suite", "Software tools for clustering, reconstruction and typing of plasmids", "2024-04-27"),
+    ("pérl-café", "", "2024-04-26"),
+]
+
+EMPTY_PAGE = b"<html><body><p>No packages found.</p></body></html>"
+
+@pytest.fixture
+def listing_page(fixtures_dir):
+    return (fixtures_dir / "listing_page.html").read_bytes()
+
+def test_extract_rows(listing_page):
+    assert extract_package_rows(listing_page) == EXPECTED_ROWS
+
+def test_extract_rows_from_text(listing_page):
+    assert extract_package_rows(listing_page.decode("utf-8")) == EXPECTED_ROWS
+
+def test_page_without_table_returns_none():
+    assert extract_package_rows(EMPTY_PAGE) is None
+    assert list(iter_package_rows(EMPTY_PAGE)) == []
+
+def test_empty_table_returns_empty_list():
+    assert extract_package_rows(b"<table><tr><th>Package</th></tr></table>") == []
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1000])
+def test_rows_survive_chunk_boundaries(listing_page, monkeypatch, chunk_size):
+    monkeypatch.setattr(package_table, "CHUNK_SIZE", chunk_size)
+    assert list(iter_package_rows(listing_page)) == EXPECTED_ROWS
+
+def test_unclosed_table_still_yields_last_row():
+    page = (b"<table><tr><th>h</th></tr><tr><td><a href='/a'>abc</a></td><td>public</td>"
+            b"<td>desc</td><td>2024-01-01</td>")
+    assert extract_package_rows(page) == [("abc", "desc", "2024-01-01")]
+
+def test_matches_beautifulsoup(listing_page):
+    pytest.importorskip("bs4")
+    pytest.importorskip("requests")
+    from bioconda_search import parse_package_rows_soup
+
+    # The BeautifulSoup path raises on a first cell without a link; the streaming one skips it
+    html = re.sub(r"<tr>\s*<td>no-link-package</td>.*?</tr>", "", listing_page.decode("utf-8"), flags=re.S)
+    assert extract_package_rows(html) == parse_package_rows_soup(html) == EXPECTED_ROWS
+    assert extract_package_rows(EMPTY_PAGE) == parse_package_rows_soup(EMPTY_PAGE.decode("utf-8"))
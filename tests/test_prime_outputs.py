@@ -0,0 +1,78 @@
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("Bio")
+
+from prime_mutant_scoring import (Record, claim_output_name, iter_records, record_output_name, score_records,
+                                 score_records_pipelined)
+from tiny_prime import random_sequence, write_fasta
+
+def test_first_record_keeps_historical_name():
+    assert record_output_name(Record("P12345", 0, "sp|P12345|X", "MK")) == "P12345_auto.csv"
+
+def test_ids_that_sanitise_alike_get_distinct_names():
+    names = {record_output_name(Record("prot", index, record_id, "MK"), "_auto.npz")
+             for index, record_id in enumerate(["first", "a|b", "a/b", "a b"])}
+    assert len(names) == 4
+    assert "prot_1_a_b_auto.npz" in names
+
+def test_claim_output_name_rejects_collisions_between_files():
+    claimed = {}
+    claim_output_name(claimed, Record("a", 1, "x", "MK"), "_auto.csv")
+    with pytest.raises(ValueError, match="a_1_x_auto.csv"):
+        claim_output_name(claimed, Record("a_1_x", 0, "y", "MK"), "_auto.csv")
+    # The same record may be claimed again (e.g. rescored in the same run)
+    assert claim_output_name(claimed, Record("a", 1, "x", "MK"), "_auto.csv") == "a_1_x_auto.csv"
+
+def test_score_records_never_overwrites(tiny_prime, tmp_path):
+    model, tokenizer = tiny_prime
+    sequence_folder, output_folder = tmp_path / "fasta", tmp_path / "out"
+    sequence_folder.mkdir()
+    output_folder.mkdir()
+    write_fasta(sequence_folder / "a.fasta", {"first": random_sequence(20, 1), "x": random_sequence(21, 2),
+                                             "p|q": random_sequence(22, 3), "p/q": random_sequence(23, 4)})
+    write_fasta(sequence_folder / "a_1_x.fasta", {"y": random_sequence(24, 5)})
+
+    completed, failed = score_records(iter_records(sequence_folder), model, tokenizer, "cpu", output_folder,
+                                      batch_size=2)
+    assert sorted(p.name for p in output_folder.iterdir()) == [
+        "a_1_x_auto.csv", "a_2_p_q_auto.csv", "a_3_p_q_auto.csv", "a_auto.csv"]
+    assert [(r.stem, r.record_id) for r in failed] == [("a_1_x", "y")]
+    assert len(completed) == 4
+
+@pytest.mark.parametrize("option", ["prefetch", "write_backlog"])
+def test_pipelined_rejects_unbounded_queues(tmp_path, option):
+    with pytest.raises(ValueError, match=option):
+        score_records_pipelined(iter([]), None, None, "cpu", tmp_path, **{option: 0})
+
+def test_unreadable_file_does_not_stop_later_files(tiny_prime, tmp_path):
+    model, tokenizer = tiny_prime
+    sequence_folder, output_folder = tmp_path / "fasta", tmp_path / "out"
+    sequence_folder.mkdir()
+    output_folder.mkdir()
+    (sequence_folder / "a.fasta").write_text("not a fasta header\n>x\nMKV\n")
+    write_fasta(sequence_folder / "b.fasta", {"b": random_sequence(20, 1)})
+
+    failed_files = []
+    completed, failed = score_records(iter_records(sequence_folder, failed_files), model, tokenizer, "cpu",
+                                      output_folder)
+    assert [p.name for p, _ in failed_files] == ["a.fasta"]
+    assert [r.stem for r in completed] == ["b"] and not failed
+    assert [p.name for p in output_folder.iterdir()] == ["b_auto.csv"]
+
+def test_pipelined_skips_an_unreadable_file(tiny_prime, tmp_path):
+    model, tokenizer = tiny_prime
+    sequence_folder, output_folder = tmp_path / "fasta", tmp_path / "out"
+    sequence_folder.mkdir()
+    output_folder.mkdir()
+    write_fasta(sequence_folder / "a.fasta", {"a": random_sequence(20, 1)})
+    (sequence_folder / "b.fasta").write_text("not a fasta header\n>x\nMKV\n")
+    for stem in "cde":
+        write_fasta(sequence_folder / f"{stem}.fasta", {stem: random_sequence(25, ord(stem))})
+
+    failed_files = []
+    completed, failed = score_records_pipelined(iter_records(sequence_folder, failed_files), model, tokenizer,
+                                                "cpu", output_folder, batch_size=2, prefetch=1)
+    assert [p.name for p, _ in failed_files] == ["b.fasta"]
+    assert sorted(r.stem for r in completed) == ["a", "c", "d", "e"] and not failed
+    assert sorted(p.name for p in output_folder.iterdir()) == ["a_auto.csv", "c_auto.csv", "d_auto.csv", "e_auto.csv"]
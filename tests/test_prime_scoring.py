@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+torch = pytest.importorskip("torch")
+pytest.importorskip("pandas")
+
+from prime_mutant_scoring import (compute_log_probs, generate_mutants, saturation_matrix, saturation_table,
+                                  score_mutants)
+from saturation_io import AMINO_ACIDS
+from tiny_prime import RESIDUES, random_sequence
+
+def reference_saturation(log_probs, sequence, tokenizer):
+    # The original score_auto loop: one vocab lookup and one .item() per mutant
+    scores = []
+    for mutant in generate_mutants(sequence):
+        wt, idx, mt = mutant[0], int(mutant[1:-1]) - 1, mutant[-1]
+        scores.append((log_probs[idx, tokenizer.get_vocab()[mt]] - log_probs[idx, tokenizer.get_vocab()[wt]]).item())
+    return np.array(scores)
+
+def reference_multi(log_probs, mutants, tokenizer):
+    # The ProteinGym notebook's score() loop
+    scores = []
+    for mutant in mutants:
+        score = 0
+        for sub_mutant in mutant.split(":"):
+            wt, idx, mt = sub_mutant[0], int(sub_mutant[1:-1]) - 1, sub_mutant[-1]
+            score += (log_probs[idx, tokenizer.get_vocab()[mt]] - log_probs[idx, tokenizer.get_vocab()[wt]]).item()
+        scores.append(score)
+    return np.array(scores)
+
+def random_multi_mutants(sequence, count, seed=0):
+    rng = random.Random(seed)
+    mutants = []
+    for _ in range(count):
+        positions = rng.sample(range(len(sequence)), rng.randint(1, min(4, len(sequence))))
+        mutants.append(":".join(f"{sequence[p]}{p + 1}{rng.choice(RESIDUES)}" for p in sorted(positions)))
+    return mutants
+
+@pytest.fixture(params=[1, 37, 120])
+def scored_sequence(request, tiny_prime):
+    model, tokenizer = tiny_prime
+    sequence = random_sequence(request.param, seed=request.param)
+    return sequence, compute_log_probs(sequence, model, tokenizer, torch.device("cpu"))
+
+def test_saturation_table_matches_loop(scored_sequence, tiny_prime):
+    sequence, log_probs = scored_sequence
+    tokenizer = tiny_prime[1]
+    table = saturation_table(saturation_matrix(log_probs, sequence, tokenizer), sequence)
+    assert table["mutant"].tolist() == generate_mutants(sequence)
+    np.testing.assert_allclose(table["predict_score"].to_numpy(), reference_saturation(log_probs, sequence, tokenizer),
+                               atol=1e-5)
+
+def test_saturation_matrix_is_zero_at_wild_type(scored_sequence, tiny_prime):
+    sequence, log_probs = scored_sequence
+    matrix = saturation_matrix(log_probs, sequence, tiny_prime[1])
+    assert matrix.shape == (len(sequence), 20)
+    wild_type = torch.tensor([AMINO_ACIDS.index(residue) for residue in sequence])
+    assert torch.all(matrix[torch.arange(len(sequence)), wild_type] == 0)
+
+def test_score_mutants_matches_loop(scored_sequence, tiny_prime):
+    sequence, log_probs = scored_sequence
+    tokenizer = tiny_prime[1]
+    mutants = random_multi_mutants(sequence, 500, seed=len(sequence))
+    np.testing.assert_allclose(score_mutants(log_probs, mutants, tokenizer),
+                               reference_multi(log_probs, mutants, tokenizer), atol=1e-4)
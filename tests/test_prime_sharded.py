@@ -0,0 +1,22 @@
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("Bio")
+
+from prime_sharded_scoring import (DEFAULT_CHECKPOINT_BYTES, WORKER_MEMORY_FACTOR, checkpoint_bytes,
+                                   memory_capped_workers)
+
+GB = 1024 ** 3
+
+def test_workers_are_capped_by_memory():
+    per_worker = WORKER_MEMORY_FACTOR * 3 * GB
+    assert memory_capped_workers(3 * GB, 64 * GB, 8) == 8
+    assert memory_capped_workers(3 * GB, int(per_worker * 3.5), 64) == 3
+    assert memory_capped_workers(3 * GB, GB, 64) == 1
+    assert memory_capped_workers(3 * GB, None, 16) == 16
+
+def test_checkpoint_bytes_of_a_local_folder(tmp_path):
+    (tmp_path / "model.safetensors").write_bytes(b"\0" * 1000)
+    (tmp_path / "config.json").write_text("{}")
+    assert checkpoint_bytes(tmp_path) == 1000
+    assert checkpoint_bytes(tmp_path / "missing") == DEFAULT_CHECKPOINT_BYTES
@@ -0,0 +1,53 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("Bio")
+
+from prime_mutant_scoring import compute_log_probs, compute_log_probs_windowed, resolve_stride, window_starts
+from tiny_prime import random_sequence
+
+@pytest.mark.parametrize("length, window, stride", [(10, 4, 2), (10, 4, 4), (10, 4, 3), (11, 4, 1), (5, 5, 5), (6, 5, 5)])
+def test_windows_cover_every_residue(length, window, stride):
+    starts = window_starts(length, window, stride)
+    covered = set()
+    for start in starts:
+        assert 0 <= start <= length - window
+        covered.update(range(start, start + window))
+    assert covered == set(range(length))
+
+@pytest.mark.parametrize("stride", [0, -1, 5])
+def test_invalid_stride_is_rejected(stride):
+    with pytest.raises(ValueError, match="stride"):
+        resolve_stride(4, stride)
+    with pytest.raises(ValueError, match="stride"):
+        window_starts(10, 4, stride)
+
+def test_default_stride_is_half_the_window():
+    assert resolve_stride(10) == 5
+    assert resolve_stride(1) == 1
+
+def test_windowed_rejects_bad_stride_even_for_short_sequences(tiny_prime):
+    model, tokenizer = tiny_prime
+    with pytest.raises(ValueError, match="stride"):
+        compute_log_probs_windowed(random_sequence(10), model, tokenizer, torch.device("cpu"), window=32, stride=64)
+
+@pytest.mark.parametrize("mode", ["center", "mean"])
+@pytest.mark.parametrize("stride", [None, 7, 16])
+def test_windowed_rows_are_log_probabilities(tiny_prime, mode, stride):
+    model, tokenizer = tiny_prime
+    log_probs = compute_log_probs_windowed(random_sequence(70, seed=3), model, tokenizer, torch.device("cpu"),
+                                           window=16, stride=stride, mode=mode)
+    assert log_probs.shape[0] == 70
+    assert torch.isfinite(log_probs).all()
+    # Every row comes from at least one window: no row is left at zero
+    assert (log_probs != 0).any(dim=-1).all()
+    if mode == "center":
+        # Each row is one window's distribution (mean averages log-probs, which is not normalised)
+        torch.testing.assert_close(log_probs.exp().sum(-1), torch.ones(70), atol=1e-4, rtol=0)
+
+def test_short_sequence_matches_unwindowed(tiny_prime):
+    model, tokenizer = tiny_prime
+    sequence = random_sequence(12, seed=4)
+    device = torch.device("cpu")
+    torch.testing.assert_close(compute_log_probs_windowed(sequence, model, tokenizer, device, window=16),
+                               compute_log_probs(sequence, model, tokenizer, device))
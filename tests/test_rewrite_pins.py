@@ -0,0 +1,56 @@
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("yaml")
+
+from append_new import rewrite_pins, update_yaml_with_new_versions
+
+ENV = """\
+name: tools
+channels:
+  - conda-forge
+  - bioconda
+dependencies:
+  - samtools=1.17=h00cdaf9_0
+  - "bwa=0.7.17"  # aligner
+  - 'minimap2'
+  - kma=1.4.9 # pinned for the paper
+  - pip:
+    - samtools==0.1.0
+    - bwa
+  - python=3.11
+prefix: /opt/conda/envs/tools
+"""
+
+def test_rewrites_only_the_updated_conda_pins():
+    new = rewrite_pins(ENV, {"samtools": "1.21", "bwa": "0.7.18", "minimap2": "2.28", "kma": "1.4.15"})
+    assert new == ENV.replace("samtools=1.17=h00cdaf9_0", "samtools=1.21") \
+                     .replace('"bwa=0.7.17"  # aligner', '"bwa=0.7.18"  # aligner') \
+                     .replace("'minimap2'", "'minimap2=2.28'") \
+                     .replace("kma=1.4.9 # pinned", "kma=1.4.15 # pinned")
+
+def test_nested_pip_entries_are_untouched():
+    new = rewrite_pins(ENV, {"samtools": "1.21", "bwa": "0.7.18"})
+    pip_block = new.split("  - pip:\n")[1].split("  - python")[0]
+    assert pip_block == "    - samtools==0.1.0\n    - bwa\n"
+
+def test_lists_outside_dependencies_are_untouched():
+    assert rewrite_pins(ENV, {"bioconda": "1.0", "conda-forge": "2.0"}) == ENV
+
+def test_top_level_dependency_list():
+    text = "dependencies:\n- samtools=1.17\n- pip:\n  - samtools==0.1\n- kma\nprefix: /x\n"
+    assert rewrite_pins(text, {"samtools": "1.21", "kma": "1.4.15"}) == \
+        "dependencies:\n- samtools=1.21\n- pip:\n  - samtools==0.1\n- kma=1.4.15\nprefix: /x\n"
+
+def test_unchanged_text_is_returned_as_is():
+    text = ENV.replace("\n", "\r\n")
+    assert rewrite_pins(text, {}) == text
+    assert rewrite_pins(text, {"kma": "1.4.15"}).count("\r\n") == text.count("\r\n")
+
+def test_update_reports_whether_the_file_changed(tmp_path):
+    yaml_file = tmp_path / "tools.yaml"
+    yaml_file.write_text(ENV)
+    assert not update_yaml_with_new_versions(yaml_file, {"not-listed": "1.0"})
+    assert update_yaml_with_new_versions(yaml_file, {"kma": "1.4.15"})
+    assert "  - kma=1.4.15 # pinned for the paper\n" in yaml_file.read_text()
+    assert [p.name for p in tmp_path.iterdir()] == ["tools.yaml"]
@@ -0,0 +1,102 @@
+import os
+import sys
+import time
+
+from metrics import default_metrics
+
+TSV_HEADER = ("Package_Name", "Description", "Updated_Date")
+
+class BatchedTSVWriter:
+    """
+    TSV writer that keeps one buffered handle open and writes rows in batches.
+
+    With `atomic=True` rows go to `<path>.tmp`, which is renamed over `path`
+    only by commit(), so an interrupted run never leaves a half-written TSV
+    in place. With `atomic=False` rows are written (or appended, mode='a')
+    straight to `path`. Used as a context manager it commits on success and
+    aborts on an exception.
+    """
+    def __init__(self, path, header=TSV_HEADER, batch_size=500, atomic=True, mode="w"):
+        self.path = str(path)
+        self.batch_size = batch_size
+        self.atomic = atomic
+        self.rows_written = 0
+        self._target = f"{self.path}.tmp" if atomic else self.path
+        self._batch = []
+        self._f = open(self._target, "w" if atomic else mode, buffering=1024 * 1024)
+        if header:
+            self._f.write("\t".join(header) + "\n")
+
+    def write_row(self, fields):
+        self._batch.append("\t".join(fields) + "\n")
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write the pending batch and push it to the OS."""
+        with default_metrics().timer("stage_seconds", stage="write"):
+            if self._batch:
+                self._f.writelines(self._batch)
+                self.rows_written += len(self._batch)
+                self._batch.clear()
+            self._f.flush()
+
+    def commit(self):
+        """Flush, close and (if atomic) move the finished file into place."""
+        if self._f.closed:
+            return
+        self.flush()
+        os.fsync(self._f.fileno())
+        self._f.close()
+        if self.atomic:
+            os.replace(self._target, self.path)
+
+    def abort(self):
+        """Close without publishing; an atomic writer's temp file is removed."""
+        if self._f.closed:
+            return
+        self._f.close()
+        if self.atomic and os.path.exists(self._target):
+            os.remove(self._target)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+        return False
+
+class ProgressReporter:
+    """
+    Throttled crawl progress: counts pages and rows and prints one status
+    line at most every `interval` seconds instead of a line per package.
+    """
+    def __init__(self, interval=5.0, stream=None):
+        self.interval = interval
+        self.stream = stream or sys.stdout
+        self.pages = 0
+        self.processed = 0
+        self.kept = 0
+        self.start = time.monotonic()
+        self._last_report = self.start
+
+    def update(self, pages=0, processed=0, kept=0):
+        self.pages += pages
+        self.processed += processed
+        self.kept += kept
+        now = time.monotonic()
+        if now - self._last_report >= self.interval:
+            self.report(now)
+
+    def report(self, now=None):
+        now = now or time.monotonic()
+        elapsed = max(now - self.start, 1e-9)
+        print(f"Pages: {self.pages}, packages processed: {self.processed}, kept: {self.kept} "
+              f"({self.processed / elapsed:.0f} packages/s)", file=self.stream)
+        self._last_report = now
+
+    def done(self):
+        self.report()
@@ -2,9 +2,7 @@
 
 yaml_dir="env/"
 
-for yaml_file in "$yaml_dir"*.yaml; do
-    env_name=$(basename "$yaml_file" .yaml)
-    echo "Recreating environment: $env_name"
-    conda env create -f "$yaml_file" --force
-done
-
+# Recreate, in parallel, the environments in $yaml_dir whose dependencies changed since
+# their last successful build (hashes in $yaml_dir.env_manifest.json); logs go to env_build_logs/.
+# Extra arguments are passed through, e.g. --workers 8 --retries 2
+python env_builder.py yamls --yaml_dir "$yaml_dir" --changed_only "$@"